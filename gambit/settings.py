@@ -2,6 +2,8 @@
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -27,6 +29,9 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Serves collected static files: precompressed variants, and a one-year immutable
+    # Cache-Control for content-hashed names
+    'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -59,16 +64,88 @@ TEMPLATES = [
 WSGI_APPLICATION = 'gambit.wsgi.application'
 
 # Database
-DATABASES = {
+
+# DB_ENGINE picks the backend: 'sqlite' (default) or 'postgresql', which needs
+# psycopg 3 (pip install -r requirements-postgresql.txt) and the DB_* variables below.
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+# Run on every new SQLite connection. WAL, which lets web requests keep reading
+# while import_puzzles or update_fide_ratings hold the write lock, is stored in
+# the database file and set once by a migration (web_page 0009), so merely
+# opening the database never rewrites it. synchronous=NORMAL is durable across
+# application crashes in WAL mode and avoids an fsync per commit.
+SQLITE_PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'cache_size': -64000,  # in KiB, i.e. 64 MB of page cache per connection
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
+}
+
+if DB_ENGINE == 'sqlite':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'OPTIONS': {
+                'init_command': ';'.join(f'PRAGMA {name}={value}' for name, value in SQLITE_PRAGMAS.items()),
+                # Take the write lock at BEGIN so concurrent writers wait on the busy timeout
+                # instead of failing when a read transaction tries to upgrade
+                'transaction_mode': 'IMMEDIATE',
+                # Seconds a connection waits for a lock before raising "database is locked"
+                'timeout': 20,
+            },
+            # Reuse connections across requests instead of reopening the file every time
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+elif DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'gambit'),
+            'USER': os.environ.get('DB_USER', 'gambit'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            # A directory here means a unix socket
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 600)),
+            'CONN_HEALTH_CHECKS': True,
+        }
+    }
+else:
+    raise ImproperlyConfigured(f"DB_ENGINE must be 'sqlite' or 'postgresql', not {DB_ENGINE!r}")
+
+# Cache shared by all worker processes, so signal-based invalidation of
+# home page fragments reaches every process
+CACHES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
     }
 }
 
+# manage.py test swaps CACHES for a local-memory cache, so tests neither read nor fill BASE_DIR/cache
+TEST_RUNNER = 'gambit.test_runner.TestRunner'
+
+# Server-rendered board diagrams (puzzles.diagrams), least recently used evicted past the cap
+DIAGRAM_CACHE_DIR = BASE_DIR / 'cache' / 'diagrams'
+DIAGRAM_CACHE_MAX_BYTES = int(os.environ.get('DIAGRAM_CACHE_MAX_BYTES', 100 * 1024 * 1024))
+
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = 'static/'
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# collectstatic writes content-hashed copies plus .gz/.br versions of every asset;
+# {% static %} only switches to the hashed names when DEBUG is off
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'whitenoise.storage.CompressedManifestStaticFilesStorage',
+    },
+}
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
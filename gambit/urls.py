@@ -21,6 +21,7 @@ from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/puzzles/', include('puzzles.urls')),
     path('', include('web_page.urls')),
 ]
 
@@ -1,54 +1,97 @@
 from django.contrib import admin
-from .models import Puzzle
+from django.db.models import Q
+from web_page.models import Job
+from .models import OpeningTag, Puzzle, RatingPeriod, Theme, TrainingProfile
+from .utils import id_ranges
 
 class DifficultyFilter(admin.SimpleListFilter):
-    """Custom filter for difficulty property"""
+    """Filter on the stored difficulty bucket (indexed together with random_key)"""
     title = 'difficulty'
     parameter_name = 'difficulty'
 
     def lookups(self, request, model_admin):
-        return [
-            ('easy', 'Easy'),
-            ('medium', 'Medium'),
-            ('hard', 'Hard'),
-            ('expert', 'Expert'),
-        ]
+        return Puzzle.Difficulty.choices
 
     def queryset(self, request, queryset):
-        if self.value() == 'easy':
-            return queryset.filter(rating__lt=1200)
-        elif self.value() == 'medium':
-            return queryset.filter(rating__gte=1200, rating__lt=1800)
-        elif self.value() == 'hard':
-            return queryset.filter(rating__gte=1800, rating__lt=2400)
-        elif self.value() == 'expert':
-            return queryset.filter(rating__gte=2400)
+        if self.value() in Puzzle.Difficulty.values:
+            return queryset.filter(difficulty=self.value())
         return queryset
 
 @admin.register(Puzzle)
 class PuzzleAdmin(admin.ModelAdmin):
     list_display = ('puzzle_id', 'rating', 'get_difficulty', 'nb_plays', 'created_at')
-    list_filter = (DifficultyFilter, 'rating')
-    search_fields = ('puzzle_id', 'themes', 'opening_tags')
+    list_filter = (DifficultyFilter, 'tagged_themes', 'rating')
+    search_fields = ('puzzle_id',)
+    search_help_text = 'Puzzle id, or an exact theme / opening name (e.g. mateIn2)'
+    actions = ['revalidate_action']
+
+    def revalidate_action(self, request, queryset):
+        # Id runs rather than every id, so selecting the whole table stays a small job
+        pks = queryset.order_by('pk').values_list('pk', flat=True).iterator()
+        Job.enqueue(Job.Command.PRERENDER_PUZZLES, all=True, ranges=id_ranges(pks))
+        self.message_user(request, "Re-validation queued; track it under Jobs.")
+    revalidate_action.short_description = 'Re-validate and re-render selected puzzles'
     
+    def get_search_results(self, request, queryset, search_term):
+        """Exact, index-backed matches on id and tag names instead of LIKE scans over the text fields"""
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        matches = (
+            Q(puzzle_id=term)
+            | Q(pk__in=Puzzle.tagged_themes.through.objects.filter(theme__name=term).values('puzzle_id'))
+            | Q(pk__in=Puzzle.tagged_openings.through.objects.filter(openingtag__name=term).values('puzzle_id'))
+        )
+        return queryset.filter(matches), False
+
     # Add a method to display difficulty in list view
     def get_difficulty(self, obj):
-        return obj.difficulty
+        return obj.get_difficulty_display()
     get_difficulty.short_description = 'Difficulty'
     get_difficulty.admin_order_field = 'rating'  # Allow ordering by rating
     
-    readonly_fields = ('get_difficulty',)
+    readonly_fields = ('get_difficulty', 'rating_volatility', 'start_fen', 'solution')
     fieldsets = (
         ('Basic Info', {
             'fields': ('puzzle_id', 'fen', 'moves', 'rating')
         }),
         ('Statistics', {
-            'fields': ('rating_deviation', 'popularity', 'nb_plays')
+            'fields': ('rating_deviation', 'rating_volatility', 'popularity', 'nb_plays')
         }),
         ('Metadata', {
             'fields': ('themes', 'game_url', 'opening_tags')
         }),
         ('Calculated', {
-            'fields': ('get_difficulty',)
+            'fields': ('get_difficulty', 'start_fen', 'solution')
         }),
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(Theme)
+class ThemeAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
+
+
+@admin.register(OpeningTag)
+class OpeningTagAdmin(admin.ModelAdmin):
+    list_display = ('name',)
+    search_fields = ('name',)
+
+
+@admin.register(TrainingProfile)
+class TrainingProfileAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'rating', 'rating_deviation', 'nb_attempts', 'updated_at')
+    search_fields = ('user__username',)
+    raw_id_fields = ('user',)
+
+
+@admin.register(RatingPeriod)
+class RatingPeriodAdmin(admin.ModelAdmin):
+    list_display = ('__str__', 'attempts', 'profiles', 'puzzles', 'created_at')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class PuzzlesConfig(AppConfig):
     name = 'puzzles'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,158 @@
+"""
+Server-side board diagrams.
+
+A position is drawn as SVG by python-chess or as PNG with Pillow (pasting
+the sprites in diagram_pieces/), so pages can show a board without any
+client JS. The sprites are the older Wikipedia piece set, not the
+python-chess set the SVG diagrams and the interactive board share: Pillow
+cannot rasterise SVG and cairo is not a dependency. Templates therefore use
+SVG, and PNG is meant for clients that cannot take SVG.
+
+Every diagram is stored on disk under a hash of everything that affects the
+picture and served from there afterwards. The cache is capped at
+DIAGRAM_CACHE_MAX_BYTES by evicting the least recently used files. URLs
+built by diagram_url carry RENDER_VERSION, so browsers may cache them for
+good while a new version gets new URLs.
+"""
+import hashlib
+import os
+import random
+import tempfile
+from functools import lru_cache
+from io import BytesIO
+from pathlib import Path
+
+import chess
+import chess.svg
+from django.conf import settings
+from PIL import Image, ImageDraw
+
+# Bump to invalidate every cached diagram, on disk and in browsers, when the drawing changes
+RENDER_VERSION = 1
+
+CONTENT_TYPES = {'svg': 'image/svg+xml', 'png': 'image/png'}
+
+# PNG widths in pixels; a fixed set keeps the cache key space small
+PNG_SIZES = (240, 480, 640)
+
+# 80px sprites of the Wikipedia set; see the module docstring for how they differ from the SVG pieces
+PIECES_DIR = Path(__file__).resolve().parent / 'diagram_pieces'
+
+# Scan the cache for eviction on about one write in this many
+EVICT_EVERY = 20
+
+
+def parse_request(fen, orientation='white', lastmove='', size=None):
+    """Validate diagram parameters, size only if given (for PNG); raises ValueError with a message for the client"""
+    try:
+        board = chess.BaseBoard(fen.split(' ')[0])
+    except (ValueError, IndexError):
+        raise ValueError("fen must be a FEN or its piece placement part") from None
+    if orientation not in ('white', 'black'):
+        raise ValueError("orientation must be white or black")
+    move = None
+    if lastmove:
+        try:
+            move = chess.Move.from_uci(lastmove)
+        except ValueError:
+            move = None
+        # The null move 0000 parses but would highlight a1
+        if not move:
+            raise ValueError("lastmove must be a UCI move, e.g. e2e4")
+    if size is not None and size not in PNG_SIZES:
+        raise ValueError(f"size must be one of {', '.join(map(str, PNG_SIZES))}")
+    return board, orientation == 'white', move, size
+
+
+def render_svg(board, white, lastmove, size):
+    return chess.svg.board(board, orientation=white, lastmove=lastmove, coordinates=False).encode()
+
+
+@lru_cache(maxsize=64)
+def piece_sprite(symbol, square_size):
+    name = ('w' if symbol.isupper() else 'b') + symbol.upper()
+    with Image.open(PIECES_DIR / f'{name}.png') as sprite:
+        return sprite.convert('RGBA').resize((square_size, square_size), Image.LANCZOS)
+
+
+def render_png(board, white, lastmove, size):
+    square_size = size // 8
+    image = Image.new('RGB', (square_size * 8, square_size * 8))
+    draw = ImageDraw.Draw(image)
+    highlighted = {lastmove.from_square, lastmove.to_square} if lastmove else set()
+    for square in chess.SQUARES:
+        file, rank = chess.square_file(square), chess.square_rank(square)
+        x = (file if white else 7 - file) * square_size
+        y = (7 - rank if white else rank) * square_size
+        color = 'square light' if (file + rank) % 2 else 'square dark'
+        if square in highlighted:
+            color += ' lastmove'
+        draw.rectangle((x, y, x + square_size - 1, y + square_size - 1), fill=chess.svg.DEFAULT_COLORS[color])
+        piece = board.piece_at(square)
+        if piece:
+            sprite = piece_sprite(piece.symbol(), square_size)
+            image.paste(sprite, (x, y), sprite)
+    buffer = BytesIO()
+    image.save(buffer, 'PNG', optimize=True)
+    return buffer.getvalue()
+
+
+RENDERERS = {'svg': render_svg, 'png': render_png}
+
+
+def cache_path(fmt, board, white, lastmove, size):
+    # SVG scales, so its size is not part of the key
+    key = hashlib.sha256(
+        f"{RENDER_VERSION}|{board.board_fen()}|{white}|{lastmove or ''}|{size if fmt == 'png' else ''}".encode()
+    ).hexdigest()
+    return Path(settings.DIAGRAM_CACHE_DIR) / key[:2] / f'{key}.{fmt}'
+
+
+def get_diagram(fmt, fen, orientation='white', lastmove='', size=PNG_SIZES[-1]):
+    """Diagram bytes, from the disk cache or freshly rendered; raises ValueError for bad parameters"""
+    board, white, move, size = parse_request(fen, orientation, lastmove, size if fmt == 'png' else None)
+    path = cache_path(fmt, board, white, move, size)
+    try:
+        data = path.read_bytes()
+        # Mark as recently used; eviction goes by modification time
+        os.utime(path)
+        return data
+    except FileNotFoundError:
+        pass
+
+    data = RENDERERS[fmt](board, white, move, size)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so concurrent readers never see a partial file
+    with tempfile.NamedTemporaryFile(dir=path.parent, suffix='.tmp', delete=False) as temp:
+        temp.write(data)
+    os.replace(temp.name, path)
+
+    if random.randrange(EVICT_EVERY) == 0:
+        evict()
+    return data
+
+
+def evict(max_bytes=None):
+    """Delete least recently used diagrams until the cache is at 80% of max_bytes; returns files deleted"""
+    max_bytes = settings.DIAGRAM_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    files = []
+    for directory in Path(settings.DIAGRAM_CACHE_DIR).glob('*/'):
+        for entry in os.scandir(directory):
+            if entry.name.endswith(('.svg', '.png')):
+                stat = entry.stat()
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+
+    total = sum(size for _, size, _ in files)
+    if total <= max_bytes:
+        return 0
+    deleted = 0
+    for _, size, path in sorted(files):
+        if total <= max_bytes * 0.8:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        total -= size
+        deleted += 1
+    return deleted
@@ -0,0 +1,105 @@
+"""
+Glicko-2 rating updates (Glickman, "Example of the Glicko-2 system", 2013).
+
+A rating period is whatever the caller batches together: every result in
+one call to rate() is scored against the opponents' ratings as they were
+at the start of the period, so players and puzzles can be updated in bulk
+from the attempt log without touching each other row by row.
+"""
+import math
+from typing import NamedTuple
+
+SCALE = 173.7178
+DEFAULT_RATING = 1500.0
+DEFAULT_DEVIATION = 350.0
+DEFAULT_VOLATILITY = 0.06
+
+# System constant constraining volatility change; Glickman suggests 0.3 to 1.2
+TAU = 0.75
+EPSILON = 0.000001
+
+# Keep deviations in a range where a single result still moves the rating
+MIN_DEVIATION = 45.0
+MAX_DEVIATION = 350.0
+
+
+class Rating(NamedTuple):
+    rating: float = DEFAULT_RATING
+    deviation: float = DEFAULT_DEVIATION
+    volatility: float = DEFAULT_VOLATILITY
+
+
+def g(phi):
+    return 1 / math.sqrt(1 + 3 * phi ** 2 / math.pi ** 2)
+
+
+def expected_score(mu, mu_j, phi_j):
+    return 1 / (1 + math.exp(-g(phi_j) * (mu - mu_j)))
+
+
+def new_volatility(phi, sigma, delta, v, tau):
+    """Step 5: solve for the new volatility with the Illinois algorithm"""
+    a = math.log(sigma ** 2)
+
+    def f(x):
+        ex = math.exp(x)
+        return ex * (delta ** 2 - phi ** 2 - v - ex) / (2 * (phi ** 2 + v + ex) ** 2) - (x - a) / tau ** 2
+
+    upper = a
+    if delta ** 2 > phi ** 2 + v:
+        lower = math.log(delta ** 2 - phi ** 2 - v)
+    else:
+        k = 1
+        while f(a - k * tau) < 0:
+            k += 1
+        lower = a - k * tau
+
+    f_upper, f_lower = f(upper), f(lower)
+    while abs(lower - upper) > EPSILON:
+        c = upper + (upper - lower) * f_upper / (f_lower - f_upper)
+        f_c = f(c)
+        if f_c * f_lower <= 0:
+            upper, f_upper = lower, f_lower
+        else:
+            f_upper /= 2
+        lower, f_lower = c, f_c
+    return math.exp(upper / 2)
+
+
+def rate(player, results, tau=TAU):
+    """
+    New Rating for player after one rating period.
+
+    results is a list of (opponent Rating, score) with score 1 for a win,
+    0.5 for a draw and 0 for a loss. With no results only the deviation
+    grows, as the rating becomes less certain.
+    """
+    mu = (player.rating - DEFAULT_RATING) / SCALE
+    phi = player.deviation / SCALE
+    sigma = player.volatility
+
+    if not results:
+        deviation = math.sqrt(phi ** 2 + sigma ** 2) * SCALE
+        return Rating(player.rating, clamp_deviation(deviation), sigma)
+
+    v_inverse = 0.0
+    improvement = 0.0
+    for opponent, score in results:
+        mu_j = (opponent.rating - DEFAULT_RATING) / SCALE
+        phi_j = opponent.deviation / SCALE
+        expected = expected_score(mu, mu_j, phi_j)
+        v_inverse += g(phi_j) ** 2 * expected * (1 - expected)
+        improvement += g(phi_j) * (score - expected)
+    v = 1 / v_inverse
+    delta = v * improvement
+
+    sigma = new_volatility(phi, sigma, delta, v, tau)
+    phi_star = math.sqrt(phi ** 2 + sigma ** 2)
+    phi = 1 / math.sqrt(1 / phi_star ** 2 + 1 / v)
+    mu = mu + phi ** 2 * improvement
+
+    return Rating(mu * SCALE + DEFAULT_RATING, clamp_deviation(phi * SCALE), sigma)
+
+
+def clamp_deviation(deviation):
+    return min(max(deviation, MIN_DEVIATION), MAX_DEVIATION)
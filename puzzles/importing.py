@@ -0,0 +1,210 @@
+"""
+Input handling and row parsing for import_puzzles.
+
+Kept free of Django model imports so process-pool workers can import it
+without setting up Django.
+"""
+import bz2
+import gzip
+import hashlib
+import io
+import json
+import os
+import sys
+from contextlib import contextmanager
+
+from .utils import difficulty_for_rating, render_puzzle
+
+GZIP_MAGIC = b'\x1f\x8b'
+BZIP2_MAGIC = b'BZh'
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+
+# Bytes hashed to tell a new dump from the one a checkpoint was written for
+FINGERPRINT_BLOCK = 64 * 1024
+
+
+@contextmanager
+def open_puzzle_source(path, offset=0):
+    """
+    Open a puzzle CSV as a text stream, decompressing on the fly.
+
+    path may be a plain, gzip, bzip2 or zstd file, or '-' for stdin. The
+    format is detected from the leading magic bytes, so piped input works
+    too. Decompression is streamed, so memory stays bounded regardless of
+    the dump size.
+
+    Yields (stream, start_offset). If offset is given and the source is an
+    uncompressed file, reading starts at that byte offset and start_offset
+    equals it; otherwise start_offset is 0 and the caller must skip lines.
+    """
+    if path == '-':
+        raw = sys.stdin.buffer
+        close_raw = False
+    else:
+        raw = open(path, 'rb')
+        close_raw = True
+
+    try:
+        magic = raw.peek(4)[:4]
+        if magic.startswith(GZIP_MAGIC):
+            binary = gzip.GzipFile(fileobj=raw)
+        elif magic.startswith(BZIP2_MAGIC):
+            binary = bz2.BZ2File(raw)
+        elif magic.startswith(ZSTD_MAGIC):
+            try:
+                import zstandard
+            except ImportError:
+                raise ImportError("Reading zstd-compressed dumps requires the 'zstandard' package")
+            # Lichess dumps may use long-distance matching windows
+            binary = zstandard.ZstdDecompressor(max_window_size=2 ** 31).stream_reader(raw, closefd=False)
+        else:
+            binary = raw
+
+        start_offset = 0
+        if offset and binary is raw and raw.seekable():
+            raw.seek(offset)
+            start_offset = offset
+
+        text = io.TextIOWrapper(binary, encoding='utf-8', newline='')
+        try:
+            yield text, start_offset
+        finally:
+            # Detach so stdin is not closed along with the wrapper
+            text.detach()
+            if binary is not raw:
+                binary.close()
+    finally:
+        if close_raw:
+            raw.close()
+
+
+def source_fingerprint(path):
+    """
+    Identify the file behind a checkpoint by its size and a hash of its first block.
+
+    Returns None for stdin, which cannot be identified; the caller has to be
+    told explicitly that piped input continues an earlier import.
+    """
+    if path == '-':
+        return None
+    with open(path, 'rb') as file:
+        head = file.read(FINGERPRINT_BLOCK)
+    return {
+        'size': os.path.getsize(path),
+        'head': hashlib.blake2b(head, digest_size=16).hexdigest(),
+    }
+
+
+class ImportCheckpoint:
+    """
+    Position of the last committed batch of an import, persisted as JSON.
+
+    Records the data row number and the byte offset just past it so an
+    interrupted import can resume where it stopped, along with a fingerprint
+    of the source so a different file at the same path starts over.
+    """
+
+    def __init__(self, path, source, fingerprint=None):
+        self.path = path
+        self.source = source
+        self.fingerprint = fingerprint
+        self.row = 0
+        self.offset = 0
+        self.fieldnames = None
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        """Load a checkpoint for the same source and contents; returns True if one was found"""
+        if not self.exists():
+            return False
+        with open(self.path, encoding='utf-8') as file:
+            data = json.load(file)
+        if data.get('source') != self.source or data.get('fingerprint') != self.fingerprint:
+            return False
+        self.row = data['row']
+        self.offset = data['offset']
+        self.fieldnames = data['fieldnames']
+        return True
+
+    def save(self, row, offset):
+        self.row = row
+        self.offset = offset
+        # Write then rename so a crash never leaves a truncated checkpoint
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({
+                'source': self.source,
+                'fingerprint': self.fingerprint,
+                'row': row,
+                'offset': offset,
+                'fieldnames': self.fieldnames,
+            }, file)
+        os.replace(tmp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def content_hash(line):
+    """Hash of a raw CSV line, used to skip puzzles that did not change"""
+    return hashlib.blake2b(line.rstrip('\r\n').encode('utf-8'), digest_size=16).hexdigest()
+
+
+def parse_int(value):
+    """Parse integer from string, handling floats and empty strings"""
+    if not value:
+        return 0
+    try:
+        # Handle float values like "1107.5"
+        return int(float(value))
+    except (ValueError, TypeError):
+        return 0
+
+
+def parse_row(row):
+    """
+    Turn a CSV row into Puzzle field values.
+
+    Raises ValueError (from render_puzzle) if the puzzle is invalid and
+    KeyError if a required column is missing.
+    """
+    # Validate and pre-render once here so serving does no chess work
+    start_fen, solution = render_puzzle(row['FEN'], row['Moves'])
+    rating = parse_int(row.get('Rating', '0'))
+    return {
+        'puzzle_id': row['PuzzleId'],
+        'fen': row['FEN'],
+        'moves': row['Moves'],
+        'rating': rating,
+        'difficulty': difficulty_for_rating(rating),
+        'rating_deviation': parse_int(row.get('RatingDeviation', '0')),
+        'popularity': parse_int(row.get('Popularity', '0')),
+        'nb_plays': parse_int(row.get('NbPlays', '0')),
+        'themes': row.get('Themes', ''),
+        'game_url': row.get('GameUrl', ''),
+        'opening_tags': row.get('OpeningTags', ''),
+        'start_fen': start_fen,
+        'solution': solution,
+    }
+
+
+def parse_chunk(numbered_rows):
+    """
+    Parse a list of (row_number, row, content_hash) tuples.
+
+    Returns (parsed, errors) where errors holds (row_number, puzzle_id, message)
+    for every row that failed validation. Runs inside pool workers.
+    """
+    parsed = []
+    errors = []
+    for row_number, row, row_hash in numbered_rows:
+        try:
+            fields = parse_row(row)
+            fields['content_hash'] = row_hash
+            parsed.append(fields)
+        except (ValueError, KeyError) as e:
+            errors.append((row_number, row.get('PuzzleId', 'unknown'), str(e)))
+    return parsed, errors
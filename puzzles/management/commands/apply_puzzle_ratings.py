@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from puzzles.training import apply_rating_period
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply logged training attempts to solver and puzzle ratings in batched Glicko-2 "
+        "rating periods; run it periodically, e.g. every few minutes from cron"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Attempts applied per rating period')
+
+    def handle(self, *args, **options):
+        applied = 0
+        while (period := apply_rating_period(options['batch_size'])) is not None:
+            applied += period.attempts
+            self.stdout.write(
+                f"Attempts {period.first_attempt_id}-{period.last_attempt_id}: "
+                f"{period.profiles} solvers, {period.puzzles} puzzles"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Applied {applied} attempts"))
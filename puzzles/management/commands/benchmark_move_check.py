@@ -0,0 +1,46 @@
+import statistics
+import time
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from puzzles.models import Puzzle
+from puzzles.solving import parse_line
+from puzzles.views import puzzle_move
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the move-checking endpoint with a cold and a warm parsed-line cache (read-only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--puzzles', type=int, default=500, help='Puzzles to check one correct move of')
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        requests = [
+            (factory.get(f'/api/puzzles/{puzzle_id}/move/', {'ply': 0, 'move': moves.split()[1]}), puzzle_id)
+            for puzzle_id, moves in Puzzle.objects.rendered().values_list('puzzle_id', 'moves')[:options['puzzles']]
+        ]
+        if not requests:
+            self.stdout.write("No rendered puzzles; run prerender_puzzles first.")
+            return
+
+        parse_line.cache_clear()
+        for label in ('cold', 'warm'):
+            timings = async_to_sync(self.run)(requests)
+            timings.sort()
+            self.stdout.write(
+                f"{label}: {len(timings) / (sum(timings) / 1000):8.0f} moves/s, "
+                f"median {statistics.median(timings):.3f} ms, "
+                f"p95 {timings[int(len(timings) * 0.95) - 1]:.3f} ms"
+            )
+
+    async def run(self, requests):
+        """Check every move on one event loop; returns per-move timings in ms"""
+        timings = []
+        for request, puzzle_id in requests:
+            start = time.perf_counter()
+            response = await puzzle_move(request, puzzle_id)
+            timings.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.content
+        return timings
@@ -0,0 +1,58 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from puzzles.models import Puzzle, generate_random_key
+
+SAMPLE_FEN = 'rnbqkbnr/pppp1ppp/8/4p3/4PP2/8/PPPP2PP/RNBQKBNR b KQkq - 0 2'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark random puzzle selection latency against growing puzzle tables (uses a throwaway test database)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=str, default='5000,50000,500000,5000000',
+                            help='Comma-separated table sizes to benchmark')
+        parser.add_argument('--queries', type=int, default=1000, help='Random selections per size')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',') if size]
+        queries = options['queries']
+
+        # Never touch the real database: run everything against a test copy
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            populated = 0
+            for size in sorted(sizes):
+                self.populate(populated, size)
+                populated = size
+
+                timings = []
+                for _ in range(queries):
+                    start = time.perf_counter()
+                    Puzzle.objects.rendered().random()
+                    timings.append((time.perf_counter() - start) * 1000)
+
+                timings.sort()
+                self.stdout.write(
+                    f"{size:>9} puzzles: median {statistics.median(timings):.3f} ms, "
+                    f"p95 {timings[int(len(timings) * 0.95) - 1]:.3f} ms"
+                )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def populate(self, start, end, batch_size=10000):
+        """Insert synthetic puzzles numbered start..end-1"""
+        for offset in range(start, end, batch_size):
+            Puzzle.objects.bulk_create([
+                Puzzle(
+                    puzzle_id=f'bench{i}',
+                    fen=SAMPLE_FEN,
+                    moves='d7d5 e4d5',
+                    start_fen=SAMPLE_FEN,
+                    solution='1. d5',
+                    random_key=generate_random_key(),
+                )
+                for i in range(offset, min(offset + batch_size, end))
+            ])
@@ -1,109 +1,298 @@
 import csv
 import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from django.core.management.base import BaseCommand
-from puzzles.models import Puzzle
-from django.db import transaction
+from django.db import connection, transaction
+from django.utils import timezone
+from puzzles.importing import ImportCheckpoint, content_hash, open_puzzle_source, parse_chunk, source_fingerprint
+from puzzles.models import Puzzle, generate_random_key
+from puzzles.tags import sync_tags
+from web_page.search import index_puzzles
+
+# Only rows whose OpeningTags mention this are imported
+OPENING_FILTER = 'Kings_Gambit'
+
+# Fields written on both create and update
+PUZZLE_FIELDS = [
+    'fen', 'moves', 'rating', 'rating_deviation', 'popularity', 'nb_plays',
+    'difficulty', 'themes', 'game_url', 'opening_tags', 'start_fen', 'solution', 'content_hash',
+]
+
 
 class Command(BaseCommand):
     help = 'Import puzzles from CSV file'
-    
+
     def add_arguments(self, parser):
-        parser.add_argument('csv_file', type=str, help='Path to CSV file')
+        parser.add_argument('csv_file', type=str,
+                            help="Path to CSV file (plain, .gz, .bz2 or .zst), or '-' to read stdin")
         parser.add_argument('--limit', type=int, default=0, help='Limit number of records to import')
         parser.add_argument('--skip-existing', action='store_true', help='Skip existing puzzles')
-    
+        parser.add_argument('--batch-size', type=int, default=1000, help='Puzzles written per transaction')
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processes used to parse and validate rows (writes stay in this process)')
+        parser.add_argument('--force', action='store_true',
+                            help='Rewrite puzzles even when their content hash is unchanged')
+        parser.add_argument('--checkpoint', type=str, default='',
+                            help='Checkpoint file; an interrupted import resumes from it when re-run')
+        parser.add_argument('--resume', action='store_true',
+                            help="Continue from the checkpoint when reading stdin, which cannot be checked against it")
+
     def handle(self, *args, **options):
         csv_file = options['csv_file']
         limit = options['limit']
-        skip_existing = options['skip_existing']
-        
-        if not os.path.exists(csv_file):
+        self.skip_existing = options['skip_existing']
+        self.force = options['force']
+        batch_size = options['batch_size']
+
+        if csv_file != '-' and not os.path.exists(csv_file):
             self.stdout.write(self.style.ERROR(f"File {csv_file} not found"))
             return
-        
-        puzzles_created = 0
-        puzzles_skipped = 0
-        puzzles_updated = 0
-        
-        with open(csv_file, 'r', encoding='utf-8') as file:
-            reader = csv.DictReader(file)
-            total_rows = 0
-            
-            for i, row in enumerate(reader):
-                total_rows += 1
-                if limit and i >= limit:
-                    break
-                
-                # Filter for Kings Gambit
-                opening_tags = row.get('OpeningTags', '')
-                if not opening_tags or 'Kings_Gambit' not in opening_tags:
-                    continue
-                
-                try:
-                    # Parse numeric fields with error handling
-                    rating = self.parse_int(row.get('Rating', '0'))
-                    rating_deviation = self.parse_int(row.get('RatingDeviation', '0'))
-                    popularity = self.parse_int(row.get('Popularity', '0'))
-                    nb_plays = self.parse_int(row.get('NbPlays', '0'))
-                    
-                    # Check if puzzle already exists
-                    existing_puzzle = Puzzle.objects.filter(puzzle_id=row['PuzzleId']).first()
-                    
-                    if existing_puzzle:
-                        if skip_existing:
-                            puzzles_skipped += 1
-                            continue
-                        
-                        # Update existing puzzle
-                        existing_puzzle.fen = row['FEN']
-                        existing_puzzle.moves = row['Moves']
-                        existing_puzzle.rating = rating
-                        existing_puzzle.rating_deviation = rating_deviation
-                        existing_puzzle.popularity = popularity
-                        existing_puzzle.nb_plays = nb_plays
-                        existing_puzzle.themes = row.get('Themes', '')
-                        existing_puzzle.game_url = row.get('GameUrl', '')
-                        existing_puzzle.opening_tags = opening_tags
-                        existing_puzzle.save()
-                        puzzles_updated += 1
-                    else:
-                        # Create new puzzle
-                        Puzzle.objects.create(
-                            puzzle_id=row['PuzzleId'],
-                            fen=row['FEN'],
-                            moves=row['Moves'],
-                            rating=rating,
-                            rating_deviation=rating_deviation,
-                            popularity=popularity,
-                            nb_plays=nb_plays,
-                            themes=row.get('Themes', ''),
-                            game_url=row.get('GameUrl', ''),
-                            opening_tags=opening_tags,
-                        )
-                        puzzles_created += 1
-                    
-                    if (puzzles_created + puzzles_updated) % 100 == 0:
-                        self.stdout.write(f"Processed {i+1} rows... Created: {puzzles_created}, Updated: {puzzles_updated}")
-                        
-                except Exception as e:
+
+        self.checkpoint = None
+        if options['checkpoint']:
+            source = csv_file if csv_file == '-' else os.path.abspath(csv_file)
+            self.checkpoint = ImportCheckpoint(options['checkpoint'], source, source_fingerprint(csv_file))
+            if csv_file == '-' and not options['resume']:
+                # Nothing ties piped input to an earlier run, so only resume when asked to
+                if self.checkpoint.exists():
                     self.stdout.write(self.style.WARNING(
-                        f"Error processing row {i+1} (PuzzleId: {row.get('PuzzleId', 'unknown')}): {e}"
+                        "Ignoring the checkpoint for stdin; pass --resume to continue from it"
                     ))
-                    continue
-        
+            elif self.checkpoint.load():
+                self.stdout.write(f"Resuming from checkpoint at row {self.checkpoint.row}")
+            elif self.checkpoint.exists():
+                self.stdout.write(self.style.WARNING(
+                    f"Checkpoint does not match {csv_file}; importing it from the start"
+                ))
+
+        self.puzzles_created = 0
+        self.puzzles_skipped = 0
+        self.puzzles_updated = 0
+        self.puzzles_unchanged = 0
+        self.puzzles_invalid = 0
+        self.total_rows = 0
+        self.started = time.monotonic()
+
+        resume_offset = self.checkpoint.offset if self.checkpoint else 0
+        try:
+            with open_puzzle_source(csv_file, resume_offset) as (file, start_offset):
+                chunks = self.read_chunks(file, start_offset, limit, batch_size)
+
+                if options['workers'] > 1:
+                    self.import_parallel(chunks, options['workers'])
+                else:
+                    for chunk, position in chunks:
+                        self.handle_parsed(parse_chunk(chunk), position)
+        except ImportError as e:
+            self.stdout.write(self.style.ERROR(str(e)))
+            return
+
+        # Finished cleanly; the next run starts from the top
+        if self.checkpoint:
+            self.checkpoint.clear()
+
+        elapsed = time.monotonic() - self.started
         self.stdout.write(self.style.SUCCESS(
-            f"Import complete! Processed {total_rows} rows from CSV."
+            f"Import complete! Processed {self.total_rows} rows from CSV in {elapsed:.1f}s "
+            f"({self.total_rows / elapsed if elapsed else 0:.0f} rows/s)."
         ))
         self.stdout.write(self.style.SUCCESS(
-            f"Results: Created {puzzles_created}, Updated {puzzles_updated}, Skipped {puzzles_skipped} puzzles"
+            f"Results: Created {self.puzzles_created}, Updated {self.puzzles_updated}, "
+            f"Unchanged {self.puzzles_unchanged}, Skipped {self.puzzles_skipped}, "
+            f"Invalid {self.puzzles_invalid} puzzles"
         ))
-    
-    def parse_int(self, value):
-        """Parse integer from string, handling floats and empty strings"""
-        if not value:
-            return 0
-        try:
-            # Handle float values like "1107.5"
-            return int(float(value))
-        except (ValueError, TypeError):
-            return 0
\ No newline at end of file
+
+    def read_chunks(self, lines, start_offset, limit, batch_size):
+        """
+        Yield (rows, position) for Kings Gambit rows, batch_size at a time.
+
+        rows holds (row_number, row, content_hash) tuples; position is the
+        (row_number, byte_offset) just past the last line read, which is
+        where a resumed import continues once the chunk is committed.
+        """
+        checkpoint = self.checkpoint
+        resume_row = checkpoint.row if checkpoint else 0
+
+        if start_offset:
+            # Seeked straight past the committed rows of a plain file
+            fieldnames = checkpoint.fieldnames
+            row_number = resume_row
+            offset = start_offset
+        else:
+            header = next(lines, '')
+            fieldnames = next(csv.reader((header,)), None)
+            if not fieldnames:
+                return
+            row_number = 0
+            offset = len(header.encode('utf-8'))
+        if checkpoint:
+            checkpoint.fieldnames = fieldnames
+
+        chunk = []
+        for line in lines:
+            if limit and row_number >= limit:
+                break
+            row_number += 1
+            offset += len(line.encode('utf-8'))
+
+            # Compressed input and stdin cannot seek, so skip committed rows instead
+            if row_number <= resume_row:
+                continue
+            self.total_rows += 1
+
+            # Cheap substring pre-filter on the raw line; only candidate rows pay for CSV parsing
+            if OPENING_FILTER not in line:
+                continue
+
+            row = dict(zip(fieldnames, next(csv.reader((line,)))))
+
+            # Filter for Kings Gambit
+            opening_tags = row.get('OpeningTags', '')
+            if not opening_tags or OPENING_FILTER not in opening_tags:
+                continue
+
+            chunk.append((row_number, row, content_hash(line)))
+            if len(chunk) >= batch_size:
+                yield self.drop_unchanged(chunk), (row_number, offset)
+                chunk = []
+
+        yield self.drop_unchanged(chunk), (row_number, offset)
+
+    def drop_unchanged(self, chunk):
+        """Remove rows whose stored content hash matches, before any chess work"""
+        if self.force or not chunk:
+            return chunk
+
+        stored = dict(
+            Puzzle.objects.filter(puzzle_id__in=[row['PuzzleId'] for _, row, _ in chunk])
+            .values_list('puzzle_id', 'content_hash')
+        )
+        changed = [item for item in chunk if stored.get(item[1]['PuzzleId']) != item[2]]
+        self.puzzles_unchanged += len(chunk) - len(changed)
+        return changed
+
+    def import_parallel(self, chunks, workers):
+        """Parse chunks in a process pool and write their results here, in order"""
+        # Bound the chunks in flight so memory stays flat on multi-GB dumps
+        max_pending = workers * 2
+        pending = deque()
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for chunk, position in chunks:
+                pending.append((executor.submit(parse_chunk, chunk), position))
+                if len(pending) >= max_pending:
+                    future, position = pending.popleft()
+                    self.handle_parsed(future.result(), position)
+
+            while pending:
+                future, position = pending.popleft()
+                self.handle_parsed(future.result(), position)
+
+    def handle_parsed(self, result, position):
+        parsed, errors = result
+        for row_number, puzzle_id, message in errors:
+            self.puzzles_invalid += 1
+            self.stdout.write(self.style.WARNING(
+                f"Skipping row {row_number} (PuzzleId: {puzzle_id}): {message}"
+            ))
+
+        if parsed:
+            self.write_batch(parsed)
+        # Only record progress once the batch is committed
+        if self.checkpoint:
+            self.checkpoint.save(*position)
+        self.report_progress()
+
+    def write_batch(self, batch):
+        """Create or update one batch of parsed puzzles in a single transaction"""
+        # Later duplicates of the same PuzzleId within a batch win
+        by_id = {fields['puzzle_id']: fields for fields in batch}
+        if connection.vendor == 'postgresql':
+            self.copy_batch(by_id)
+            return
+
+        with transaction.atomic():
+            existing = Puzzle.objects.only('id', 'puzzle_id').in_bulk(list(by_id), field_name='puzzle_id')
+
+            to_create = []
+            to_update = []
+            now = timezone.now()
+            for puzzle_id, fields in by_id.items():
+                puzzle = existing.get(puzzle_id)
+                if puzzle is None:
+                    to_create.append(Puzzle(**fields))
+                elif self.skip_existing:
+                    self.puzzles_skipped += 1
+                else:
+                    for name in PUZZLE_FIELDS:
+                        setattr(puzzle, name, fields[name])
+                    # bulk_update bypasses auto_now
+                    puzzle.updated_at = now
+                    to_update.append(puzzle)
+
+            created = Puzzle.objects.bulk_create(to_create)
+            if to_create and not connection.features.can_return_rows_from_bulk_insert:
+                created = Puzzle.objects.only('id', 'themes', 'opening_tags').filter(
+                    puzzle_id__in=[puzzle.puzzle_id for puzzle in to_create]
+                )
+            Puzzle.objects.bulk_update(to_update, PUZZLE_FIELDS + ['updated_at'])
+            # Bulk writes send no signals, so mirror themes/openings into the tag tables and search index here
+            sync_tags(Puzzle, [*created, *to_update])
+            index_puzzles([*created, *to_update])
+
+        self.puzzles_created += len(to_create)
+        self.puzzles_updated += len(to_update)
+
+    def copy_batch(self, by_id):
+        """
+        PostgreSQL path: COPY the batch into a temporary staging table, then
+        merge it into the puzzle table with a single INSERT ... ON CONFLICT.
+        """
+        table = Puzzle._meta.db_table
+        columns = ', '.join(['puzzle_id', *PUZZLE_FIELDS, 'random_key'])
+        if self.skip_existing:
+            on_conflict = 'DO NOTHING'
+        else:
+            on_conflict = 'DO UPDATE SET ' + ', '.join(
+                f'{name} = EXCLUDED.{name}' for name in PUZZLE_FIELDS + ['updated_at']
+            )
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Same column types as the real table, no constraints or indexes to maintain during COPY
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE puzzle_import ON COMMIT DROP AS "
+                f"SELECT {columns} FROM {table} WITH NO DATA"
+            )
+            with cursor.copy(f"COPY puzzle_import ({columns}) FROM STDIN") as copy:
+                for puzzle_id, fields in by_id.items():
+                    copy.write_row([puzzle_id, *(fields[name] for name in PUZZLE_FIELDS), generate_random_key()])
+            # xmax = 0 only for freshly inserted rows, which tells creates from updates
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}, created_at, updated_at) "
+                f"SELECT {columns}, now(), now() FROM puzzle_import "
+                f"ON CONFLICT (puzzle_id) {on_conflict} "
+                f"RETURNING id, xmax = 0, themes, opening_tags"
+            )
+            written = cursor.fetchall()
+            # ON COMMIT DROP only fires at the outermost commit; inside an enclosing
+            # transaction the next batch would find the table still there
+            cursor.execute("DROP TABLE puzzle_import")
+            sync_tags(Puzzle, [
+                Puzzle(pk=pk, themes=themes, opening_tags=opening_tags)
+                for pk, _, themes, opening_tags in written
+            ])
+
+        created = sum(1 for _, inserted, _, _ in written if inserted)
+        self.puzzles_created += created
+        self.puzzles_updated += len(written) - created
+        self.puzzles_skipped += len(by_id) - len(written)
+
+    def report_progress(self):
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            f"Processed {self.total_rows} rows... Created: {self.puzzles_created}, "
+            f"Updated: {self.puzzles_updated}, Unchanged: {self.puzzles_unchanged} "
+            f"({self.total_rows / elapsed if elapsed else 0:.0f} rows/s)"
+        )
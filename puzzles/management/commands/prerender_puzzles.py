@@ -0,0 +1,89 @@
+from functools import reduce
+from operator import or_
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from puzzles.models import Puzzle
+from puzzles.utils import id_ranges, render_puzzle
+
+# Two parameters per range keeps each query under the 999 variables of older SQLite builds
+RANGES_PER_QUERY = 400
+
+
+def id_range(value):
+    """Parse 'first-last' (or a single id) from the command line"""
+    first, _, last = value.partition('-')
+    # A ValueError here is reported by argparse as an invalid value
+    return [int(first), int(last or first)]
+
+
+def in_ranges(queryset, ranges):
+    """Split queryset into one queryset per group of id ranges, instead of one id__in over every id"""
+    for i in range(0, len(ranges), RANGES_PER_QUERY):
+        group = ranges[i:i + RANGES_PER_QUERY]
+        yield queryset.filter(reduce(or_, (Q(id__range=(first, last)) for first, last in group)))
+
+
+class Command(BaseCommand):
+    help = 'Backfill pre-rendered start position and solution for existing puzzles, deleting invalid ones'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-render puzzles that are already pre-rendered')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows written per transaction')
+        parser.add_argument('--ids', type=int, nargs='+', help='Only process puzzles with these database ids')
+        parser.add_argument('--ranges', type=id_range, nargs='+',
+                            help='Only process puzzles with database ids in these inclusive ranges, e.g. 1-5000')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        puzzles = Puzzle.objects.only('id', 'puzzle_id', 'fen', 'moves').order_by('id')
+        if not options['all']:
+            puzzles = puzzles.filter(start_fen='')
+
+        ranges = list(options['ranges'] or [])
+        if options['ids']:
+            ranges += id_ranges(sorted(set(options['ids'])))
+        segments = in_ranges(puzzles, ranges) if ranges else [puzzles]
+
+        self.rendered = 0
+        invalid_ids = []
+        for segment in segments:
+            invalid_ids += self.render(segment, batch_size)
+
+        for invalid in in_ranges(Puzzle.objects.all(), id_ranges(sorted(invalid_ids))):
+            invalid.delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfill complete! Rendered {self.rendered}, deleted {len(invalid_ids)} invalid puzzles"
+        ))
+
+    def render(self, puzzles, batch_size):
+        """Render puzzles batch by batch; returns the ids of the invalid ones"""
+        invalid_ids = []
+        last_id = 0
+
+        # Walk the table in id order instead of holding a cursor open, since
+        # SQLite gives no isolation between reads and writes on one connection
+        while True:
+            chunk = list(puzzles.filter(id__gt=last_id)[:batch_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].id
+
+            batch = []
+            for puzzle in chunk:
+                try:
+                    puzzle.start_fen, puzzle.solution = render_puzzle(puzzle.fen, puzzle.moves)
+                except ValueError as e:
+                    self.stdout.write(self.style.WARNING(f"Invalid puzzle {puzzle.puzzle_id}: {e}"))
+                    invalid_ids.append(puzzle.id)
+                    continue
+                batch.append(puzzle)
+
+            with transaction.atomic():
+                Puzzle.objects.bulk_update(batch, ['start_fen', 'solution'])
+            self.rendered += len(batch)
+            self.stdout.write(f"Rendered {self.rendered} puzzles...")
+        return invalid_ids
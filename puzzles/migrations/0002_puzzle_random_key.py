@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:21
+
+import random
+
+import puzzles.models
+from django.db import migrations, models
+
+
+def assign_random_keys(apps, schema_editor):
+    # AddField evaluates the callable default once, so every existing row
+    # would share the same key; give each row its own.
+    Puzzle = apps.get_model('puzzles', 'Puzzle')
+    batch = []
+    for puzzle in Puzzle.objects.only('id').iterator(chunk_size=2000):
+        puzzle.random_key = random.random()
+        batch.append(puzzle)
+        if len(batch) >= 2000:
+            Puzzle.objects.bulk_update(batch, ['random_key'])
+            batch = []
+    if batch:
+        Puzzle.objects.bulk_update(batch, ['random_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('puzzles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='puzzle',
+            name='random_key',
+            field=models.FloatField(db_index=True, default=puzzles.models.generate_random_key, editable=False, help_text='Uniform random key used for O(1) random selection'),
+        ),
+        migrations.RunPython(assign_random_keys, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('puzzles', '0002_puzzle_random_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='puzzle',
+            name='solution',
+            field=models.TextField(blank=True, help_text='Numbered symbolic solution'),
+        ),
+        migrations.AddField(
+            model_name='puzzle',
+            name='start_fen',
+            field=models.TextField(blank=True, help_text='Position shown to the solver (after the first move)'),
+        ),
+    ]
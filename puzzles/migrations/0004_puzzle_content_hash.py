@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('puzzles', '0003_puzzle_prerendered_fields'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='puzzle',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, help_text='Hash of the source CSV row, used to skip unchanged rows on re-import', max_length=32),
+        ),
+    ]
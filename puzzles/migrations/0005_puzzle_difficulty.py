@@ -0,0 +1,51 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:40
+
+import django.core.validators
+from django.db import migrations, models
+
+# puzzles.utils.DIFFICULTY_BUCKETS as of this migration, copied so later changes do not alter it
+DIFFICULTY_BUCKETS = (
+    ('easy', 1200),
+    ('medium', 1800),
+    ('hard', 2400),
+    ('expert', None),
+)
+
+
+def assign_difficulty(apps, schema_editor):
+    # One UPDATE per bucket rather than a save() per row
+    Puzzle = apps.get_model('puzzles', 'Puzzle')
+    lower = None
+    for name, upper in DIFFICULTY_BUCKETS:
+        puzzles = Puzzle.objects.all()
+        if lower is not None:
+            puzzles = puzzles.filter(rating__gte=lower)
+        if upper is not None:
+            puzzles = puzzles.filter(rating__lt=upper)
+        puzzles.update(difficulty=name)
+        lower = upper
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('puzzles', '0004_puzzle_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='puzzle',
+            name='difficulty',
+            field=models.CharField(choices=[('easy', 'Easy'), ('medium', 'Medium'), ('hard', 'Hard'), ('expert', 'Expert')], default='medium', editable=False, help_text='Difficulty bucket derived from rating on save/import', max_length=10),
+        ),
+        migrations.RunPython(assign_difficulty, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='puzzle',
+            name='rating',
+            field=models.IntegerField(db_index=True, default=1500, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(3000)]),
+        ),
+        migrations.AddIndex(
+            model_name='puzzle',
+            index=models.Index(fields=['difficulty', 'random_key'], name='puzzle_difficulty_random_idx'),
+        ),
+    ]
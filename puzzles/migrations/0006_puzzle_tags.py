@@ -0,0 +1,81 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:58
+
+from django.db import migrations, models
+
+# Many-to-many field -> (tag model, text field it mirrors)
+TAG_FIELDS = {
+    'tagged_themes': ('Theme', 'themes'),
+    'tagged_openings': ('OpeningTag', 'opening_tags'),
+}
+
+
+def populate_tags(apps, schema_editor):
+    # The relations are new and empty, so each batch only adds tags and links
+    Puzzle = apps.get_model('puzzles', 'Puzzle')
+    batch = []
+    for puzzle in Puzzle.objects.only('id', 'themes', 'opening_tags').iterator(chunk_size=2000):
+        batch.append(puzzle)
+        if len(batch) >= 2000:
+            link_tags(apps, Puzzle, batch)
+            batch = []
+    link_tags(apps, Puzzle, batch)
+
+
+def link_tags(apps, Puzzle, puzzles):
+    for field_name, (model_name, text_field) in TAG_FIELDS.items():
+        Tag = apps.get_model('puzzles', model_name)
+        Through = getattr(Puzzle, field_name).through
+        wanted = {puzzle.pk: set(getattr(puzzle, text_field).split()) for puzzle in puzzles}
+        names = set().union(*wanted.values())
+
+        tag_ids = dict(Tag.objects.filter(name__in=names).values_list('name', 'pk'))
+        missing = names - tag_ids.keys()
+        Tag.objects.bulk_create([Tag(name=name) for name in missing])
+        tag_ids.update(Tag.objects.filter(name__in=missing).values_list('name', 'pk'))
+
+        Through.objects.bulk_create([
+            Through(**{'puzzle_id': pk, f'{Tag._meta.model_name}_id': tag_ids[name]})
+            for pk, tag_names in wanted.items()
+            for name in tag_names
+        ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('puzzles', '0005_puzzle_difficulty'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpeningTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=128, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Theme',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='puzzle',
+            name='tagged_openings',
+            field=models.ManyToManyField(blank=True, help_text='Normalized copy of opening_tags, kept in sync on save/import', related_name='puzzles', to='puzzles.openingtag'),
+        ),
+        migrations.AddField(
+            model_name='puzzle',
+            name='tagged_themes',
+            field=models.ManyToManyField(blank=True, help_text='Normalized copy of themes, kept in sync on save/import', related_name='puzzles', to='puzzles.theme'),
+        ),
+        migrations.RunPython(populate_tags, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 6.0.1 on 2026-10-18 19:40
+
+import django.core.validators
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('puzzles', '0006_puzzle_tags'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PuzzleAttempt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('solved', models.BooleanField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RatingPeriod',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('first_attempt_id', models.BigIntegerField(unique=True)),
+                ('last_attempt_id', models.BigIntegerField()),
+                ('attempts', models.IntegerField()),
+                ('profiles', models.IntegerField()),
+                ('puzzles', models.IntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-first_attempt_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TrainingProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('session_key', models.CharField(blank=True, max_length=40, null=True, unique=True)),
+                ('rating', models.FloatField(default=1500)),
+                ('rating_deviation', models.FloatField(default=350)),
+                ('volatility', models.FloatField(default=0.06)),
+                ('nb_attempts', models.IntegerField(default=0, help_text='Attempts applied to the rating so far')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='puzzle',
+            name='rating_volatility',
+            field=models.FloatField(default=0.06, editable=False, help_text='Glicko-2 volatility, updated with rating from training attempts'),
+        ),
+        migrations.AlterField(
+            model_name='puzzle',
+            name='rating',
+            field=models.IntegerField(default=1500, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(3000)]),
+        ),
+        migrations.AddIndex(
+            model_name='puzzle',
+            index=models.Index(fields=['rating', 'random_key'], name='puzzle_rating_random_idx'),
+        ),
+        migrations.AddField(
+            model_name='puzzleattempt',
+            name='puzzle',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='puzzles.puzzle'),
+        ),
+        migrations.AddField(
+            model_name='trainingprofile',
+            name='user',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='puzzle_training', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='puzzleattempt',
+            name='profile',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='puzzles.trainingprofile'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def mark_applied_attempts(apps, schema_editor):
+    # Periods so far covered every attempt in their id range
+    PuzzleAttempt = apps.get_model('puzzles', 'PuzzleAttempt')
+    RatingPeriod = apps.get_model('puzzles', 'RatingPeriod')
+    for period in RatingPeriod.objects.only('first_attempt_id', 'last_attempt_id'):
+        PuzzleAttempt.objects.filter(
+            pk__gte=period.first_attempt_id, pk__lte=period.last_attempt_id, period__isnull=True
+        ).update(period=period)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('puzzles', '0007_training'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='puzzleattempt',
+            name='period',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='puzzles.ratingperiod'),
+        ),
+        migrations.RunPython(mark_applied_attempts, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='puzzleattempt',
+            index=models.Index(condition=models.Q(('period__isnull', True)), fields=['id'], name='puzzle_attempt_unrated_idx'),
+        ),
+    ]
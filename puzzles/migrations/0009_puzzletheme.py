@@ -0,0 +1,68 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:50
+
+import random
+
+import django.db.models.deletion
+import puzzles.models
+from django.db import migrations, models
+
+
+def assign_random_keys(apps, schema_editor):
+    # AddField evaluates the callable default once, so give each link its own key
+    PuzzleTheme = apps.get_model('puzzles', 'PuzzleTheme')
+    batch = []
+    for link in PuzzleTheme.objects.only('id').iterator(chunk_size=2000):
+        link.random_key = random.random()
+        batch.append(link)
+        if len(batch) >= 2000:
+            PuzzleTheme.objects.bulk_update(batch, ['random_key'])
+            batch = []
+    if batch:
+        PuzzleTheme.objects.bulk_update(batch, ['random_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('puzzles', '0008_puzzleattempt_period'),
+    ]
+
+    operations = [
+        # The auto-created through table of Puzzle.tagged_themes becomes PuzzleTheme in place
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='PuzzleTheme',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('puzzle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='theme_links', to='puzzles.puzzle')),
+                        ('theme', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='puzzles.theme')),
+                    ],
+                    options={
+                        'db_table': 'puzzles_puzzle_tagged_themes',
+                        'unique_together': {('puzzle', 'theme')},
+                    },
+                ),
+                migrations.AlterField(
+                    model_name='puzzle',
+                    name='tagged_themes',
+                    field=models.ManyToManyField(blank=True, help_text='Normalized copy of themes, kept in sync on save/import', related_name='puzzles', through='puzzles.PuzzleTheme', to='puzzles.theme'),
+                ),
+            ],
+        ),
+        migrations.AddField(
+            model_name='puzzletheme',
+            name='random_key',
+            field=models.FloatField(default=puzzles.models.generate_random_key, editable=False),
+        ),
+        migrations.RunPython(assign_random_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='puzzletheme',
+            index=models.Index(fields=['theme', 'random_key'], name='puzzle_theme_random_idx'),
+        ),
+        migrations.AlterField(
+            model_name='puzzletheme',
+            name='theme',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='puzzles.theme'),
+        ),
+    ]
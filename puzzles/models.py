@@ -1,32 +1,173 @@
+import random
+
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from .tags import sync_tags
+from .utils import difficulty_for_rating
+
+
+PUZZLE_RATING_MIN = 0
+PUZZLE_RATING_MAX = 3000
+
+
+def generate_random_key():
+    """Default for Puzzle.random_key (a module-level callable so migrations can reference it)"""
+    return random.random()
+
+
+class Theme(models.Model):
+    name = models.CharField(max_length=64, unique=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class OpeningTag(models.Model):
+    name = models.CharField(max_length=128, unique=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name.replace('_', ' ')
+
+
+class PuzzleQuerySet(models.QuerySet):
+    def random_seeks(self, min_rating=None, max_rating=None, theme=None):
+        """
+        Two queries whose first row is a random puzzle: a seek from a random
+        point of an index, and a fallback for when it ran off the end.
+
+        The index is (theme, random_key) on the theme links for a theme,
+        (rating, random_key) for a rating range, with a random target rating
+        as near_rating() does, and random_key otherwise. Other filters on the
+        queryset only narrow the rows the seek walks past.
+        """
+        key = random.random()
+        if theme:
+            # One filter() call, so the theme and its key are on the same link
+            in_range = self.in_rating_range(min_rating, max_rating)
+            return (
+                in_range.filter(theme_links__theme__name=theme, theme_links__random_key__gte=key)
+                .order_by('theme_links__random_key'),
+                in_range.filter(theme_links__theme__name=theme).order_by('theme_links__random_key'),
+            )
+        if min_rating is not None or max_rating is not None:
+            in_range = self.in_rating_range(min_rating, max_rating)
+            low = PUZZLE_RATING_MIN if min_rating is None else min_rating
+            high = PUZZLE_RATING_MAX if max_rating is None else max_rating
+            target = random.randint(low, max(low, high))
+            return (
+                in_range.filter(rating__gte=target).filter(Q(rating__gt=target) | Q(random_key__gte=key))
+                .order_by('rating', 'random_key'),
+                in_range.filter(rating__lte=target).order_by('-rating', '-random_key'),
+            )
+        return self.filter(random_key__gte=key).order_by('random_key'), self.order_by('random_key')
+
+    def random(self, min_rating=None, max_rating=None, theme=None):
+        """Pick a random puzzle with a single indexed seek; see random_seeks()"""
+        for queryset in self.random_seeks(min_rating, max_rating, theme):
+            puzzle = queryset.first()
+            if puzzle is not None:
+                return puzzle
+        return None
+
+    async def arandom(self, min_rating=None, max_rating=None, theme=None):
+        """Async random(), for async views"""
+        for queryset in self.random_seeks(min_rating, max_rating, theme):
+            puzzle = await queryset.afirst()
+            if puzzle is not None:
+                return puzzle
+        return None
+
+    def near_rating(self, rating, spread=100):
+        """
+        Pick a random puzzle rated within about spread of rating.
+
+        A random target rating and key make this a single seek on the
+        (rating, random_key) index, like random() does on random_key.
+        """
+        target = round(rating + random.uniform(-spread, spread))
+        key = random.random()
+        puzzle = (self.filter(rating__gte=target)
+                  .filter(Q(rating__gt=target) | Q(random_key__gte=key))
+                  .order_by('rating', 'random_key').first())
+        if puzzle is None:
+            # Nothing rated at or above the target, so take the closest below it
+            puzzle = self.filter(rating__lt=target).order_by('-rating', '-random_key').first()
+        return puzzle
+
+    def rendered(self):
+        """Puzzles whose start position and solution have been pre-rendered"""
+        return self.exclude(start_fen='')
+
+    def in_rating_range(self, min_rating=None, max_rating=None):
+        """Puzzles rated within [min_rating, max_rating]; either bound may be omitted"""
+        queryset = self
+        if min_rating is not None:
+            queryset = queryset.filter(rating__gte=min_rating)
+        if max_rating is not None:
+            queryset = queryset.filter(rating__lte=max_rating)
+        return queryset
+
+    def with_theme(self, theme):
+        """Puzzles tagged with a theme, e.g. mateIn2"""
+        return self.filter(tagged_themes__name=theme)
+
+    def with_opening(self, opening):
+        """Puzzles tagged with an opening, e.g. Kings_Gambit_Accepted"""
+        return self.filter(tagged_openings__name=opening)
+
+
 class Puzzle(models.Model):
+    class Difficulty(models.TextChoices):
+        EASY = 'easy', 'Easy'
+        MEDIUM = 'medium', 'Medium'
+        HARD = 'hard', 'Hard'
+        EXPERT = 'expert', 'Expert'
+
     puzzle_id = models.CharField(max_length=20, unique=True)
     fen = models.TextField(help_text="Forsyth-Edwards Notation")
     moves = models.TextField(help_text="Comma-separated UCI moves")
-    rating = models.IntegerField(default=1500, validators=[MinValueValidator(0), MaxValueValidator(3000)])
+    rating = models.IntegerField(default=1500, validators=[
+        MinValueValidator(PUZZLE_RATING_MIN), MaxValueValidator(PUZZLE_RATING_MAX),
+    ])
     rating_deviation = models.IntegerField(default=100)
+    rating_volatility = models.FloatField(default=0.06, editable=False,
+                                          help_text="Glicko-2 volatility, updated with rating from training attempts")
     popularity = models.IntegerField(default=50)
     nb_plays = models.IntegerField(default=0)
+    difficulty = models.CharField(max_length=10, choices=Difficulty.choices, default=Difficulty.MEDIUM,
+                                  editable=False, help_text="Difficulty bucket derived from rating on save/import")
     themes = models.TextField(blank=True)
     game_url = models.URLField(blank=True)
     opening_tags = models.TextField(blank=True)
+    tagged_themes = models.ManyToManyField(Theme, blank=True, related_name='puzzles', through='PuzzleTheme',
+                                           help_text="Normalized copy of themes, kept in sync on save/import")
+    tagged_openings = models.ManyToManyField(OpeningTag, blank=True, related_name='puzzles',
+                                             help_text="Normalized copy of opening_tags, kept in sync on save/import")
+    start_fen = models.TextField(blank=True, help_text="Position shown to the solver (after the first move)")
+    solution = models.TextField(blank=True, help_text="Numbered symbolic solution")
+    content_hash = models.CharField(max_length=32, blank=True, editable=False,
+                                    help_text="Hash of the source CSV row, used to skip unchanged rows on re-import")
+    random_key = models.FloatField(default=generate_random_key, db_index=True, editable=False,
+                                   help_text="Uniform random key used for O(1) random selection")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PuzzleQuerySet.as_manager()
     
     @property
-    def difficulty(self):
-        """Calculate difficulty based on rating"""
-        if self.rating < 1200:
-            return 'easy'
-        elif self.rating < 1800:
-            return 'medium'
-        elif self.rating < 2400:
-            return 'hard'
-        else:
-            return 'expert'
-    
+    def first_move(self):
+        """Opponent's move that leads to the puzzle position"""
+        return self.moves.split()[0] if self.moves else ''
+
     @property
     def move_list(self):
         """Parse moves string into list"""
@@ -35,10 +176,108 @@ class Puzzle(models.Model):
     @property
     def theme_list(self):
         """Parse themes string into list"""
-        return [theme.strip() for theme in self.themes.split(',')] if self.themes else []
+        return self.themes.split()
     
+    def save(self, *args, **kwargs):
+        self.difficulty = difficulty_for_rating(self.rating)
+        super().save(*args, **kwargs)
+        sync_tags(Puzzle, [self])
+
     def __str__(self):
         return f"Puzzle {self.puzzle_id} ({self.rating})"
     
     class Meta:
-        ordering = ['-rating', 'puzzle_id']
\ No newline at end of file
+        ordering = ['-rating', 'puzzle_id']
+        indexes = [
+            # Random puzzle of a given difficulty is a single seek on this index
+            models.Index(fields=['difficulty', 'random_key'], name='puzzle_difficulty_random_idx'),
+            # Rating range filters and rating-matched training picks (near_rating)
+            models.Index(fields=['rating', 'random_key'], name='puzzle_rating_random_idx'),
+        ]
+
+
+class PuzzleTheme(models.Model):
+    """Puzzle.tagged_themes link, with its own random key so a random puzzle of a theme is one index seek"""
+    puzzle = models.ForeignKey(Puzzle, on_delete=models.CASCADE, related_name='theme_links')
+    # The (theme, random_key) index below serves lookups by theme
+    theme = models.ForeignKey(Theme, on_delete=models.CASCADE, related_name='+', db_index=False)
+    random_key = models.FloatField(default=generate_random_key, editable=False)
+
+    class Meta:
+        db_table = 'puzzles_puzzle_tagged_themes'
+        unique_together = [('puzzle', 'theme')]
+        indexes = [
+            models.Index(fields=['theme', 'random_key'], name='puzzle_theme_random_idx'),
+        ]
+
+
+class TrainingProfile(models.Model):
+    """A training-mode solver: a signed-in user or an anonymous session"""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.CASCADE,
+                                related_name='puzzle_training')
+    session_key = models.CharField(max_length=40, unique=True, null=True, blank=True)
+    rating = models.FloatField(default=1500)
+    rating_deviation = models.FloatField(default=350)
+    volatility = models.FloatField(default=0.06)
+    nb_attempts = models.IntegerField(default=0, help_text="Attempts applied to the rating so far")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        owner = self.user if self.user_id else f"session {self.session_key[:8]}"
+        return f"{owner} ({round(self.rating)})"
+
+    @classmethod
+    def for_request(cls, request):
+        """The profile of the signed-in user, or of the session (creating the session if needed)"""
+        if request.user.is_authenticated:
+            return cls.objects.get_or_create(user=request.user)[0]
+        if request.session.session_key is None:
+            request.session.save()
+        return cls.objects.get_or_create(session_key=request.session.session_key)[0]
+
+
+class PuzzleAttempt(models.Model):
+    """
+    Log of training attempts.
+
+    Rows have no foreign key constraints to maintain, and only their period
+    is written after the insert: apply_puzzle_ratings reads the attempts
+    without one in primary key order, applies them to ratings in batches
+    and then sets it. The only index is a partial one on those unrated rows,
+    so it stays small however long the log grows.
+    """
+    profile = models.ForeignKey(TrainingProfile, on_delete=models.DO_NOTHING, related_name='+',
+                                db_index=False, db_constraint=False)
+    puzzle = models.ForeignKey(Puzzle, on_delete=models.DO_NOTHING, related_name='+',
+                               db_index=False, db_constraint=False)
+    solved = models.BooleanField()
+    # Set once the attempt has been applied to ratings
+    period = models.ForeignKey('RatingPeriod', on_delete=models.DO_NOTHING, related_name='+', null=True,
+                               blank=True, editable=False, db_index=False, db_constraint=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['id'], condition=Q(period__isnull=True), name='puzzle_attempt_unrated_idx'),
+        ]
+
+    def __str__(self):
+        return f"Attempt {self.pk} ({'solved' if self.solved else 'failed'})"
+
+
+class RatingPeriod(models.Model):
+    """One batched Glicko-2 update; first_attempt_id and last_attempt_id are its lowest and highest attempts"""
+    # Unique so two overlapping runs cannot apply the same attempts twice
+    first_attempt_id = models.BigIntegerField(unique=True)
+    last_attempt_id = models.BigIntegerField()
+    attempts = models.IntegerField()
+    profiles = models.IntegerField()
+    puzzles = models.IntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-first_attempt_id']
+
+    def __str__(self):
+        return f"Rating period {self.first_attempt_id}-{self.last_attempt_id}"
\ No newline at end of file
@@ -0,0 +1,15 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from web_page.search import PUZZLE_TABLE, index_puzzles, unindex
+
+from .models import Puzzle
+
+
+@receiver(post_save, sender=Puzzle)
+def index_puzzle(sender, instance, **kwargs):
+    index_puzzles([instance])
+
+
+@receiver(post_delete, sender=Puzzle)
+def unindex_puzzle(sender, instance, **kwargs):
+    unindex(PUZZLE_TABLE, instance.pk)
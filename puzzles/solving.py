@@ -0,0 +1,83 @@
+"""
+Server-side move checking for puzzles.
+
+The browser only gets the position to solve. Each move it submits is
+checked here against Puzzle.moves and answered with the opponent's reply,
+so the solution is only revealed once the puzzle is over. Parsed lines are
+kept in an LRU cache keyed by start position and moves, so a check is a
+tuple lookup instead of replaying the puzzle on a fresh chess.Board.
+"""
+import re
+from functools import lru_cache
+from typing import NamedTuple
+
+import chess
+
+LINE_CACHE_SIZE = 4096
+
+UCI_MOVE = re.compile(r'[a-h][1-8][a-h][1-8][qrbn]?')
+
+
+class Line(NamedTuple):
+    moves: tuple      # solution moves in UCI, the solver's first
+    positions: tuple  # FEN after each move
+    boards: tuple     # board before each move; shared by every request, so never pushed to
+
+
+class MoveResult(NamedTuple):
+    correct: bool
+    solved: bool
+    fen: str = ''        # position after the solver's move
+    reply: str = ''      # opponent's answer in UCI, if the puzzle goes on
+    reply_fen: str = ''  # position after the reply
+
+    @property
+    def over(self):
+        return self.solved or not self.correct
+
+
+@lru_cache(maxsize=LINE_CACHE_SIZE)
+def parse_line(start_fen, moves):
+    """Line for a pre-rendered puzzle: moves holds the opponent's first move, then the solution"""
+    board = chess.Board(start_fen)
+    line_moves = tuple(moves.split()[1:])
+    positions = []
+    boards = []
+    for move in line_moves:
+        boards.append(board.copy(stack=False))
+        board.push_uci(move)
+        positions.append(board.fen())
+    return Line(line_moves, tuple(positions), tuple(boards))
+
+
+def check_move(line, ply, move):
+    """
+    Check the solver's move at ply, an index into line.moves.
+
+    A move without a promotion piece matches a promoting solution move, and
+    any other move that gives mate also solves the puzzle. Raises ValueError
+    for a malformed move or a ply that is not the solver's turn.
+    """
+    if not UCI_MOVE.fullmatch(move):
+        raise ValueError("Moves must be in UCI notation, e.g. e2e4")
+    if ply % 2 or not 0 <= ply < len(line.moves):
+        raise ValueError(f"Ply {ply} is not the solver's turn")
+
+    expected = line.moves[ply]
+    if move != expected and not (len(move) == 4 and expected.startswith(move)):
+        board = line.boards[ply]
+        try:
+            candidate = chess.Move.from_uci(move)
+        except ValueError:
+            # Well-formed but impossible, e.g. a1a1
+            return MoveResult(False, False)
+        if board.is_legal(candidate):
+            board = board.copy(stack=False)
+            board.push(candidate)
+            if board.is_checkmate():
+                return MoveResult(True, True, board.fen())
+        return MoveResult(False, False)
+
+    if ply + 1 == len(line.moves):
+        return MoveResult(True, True, line.positions[ply])
+    return MoveResult(True, False, line.positions[ply], line.moves[ply + 1], line.positions[ply + 1])
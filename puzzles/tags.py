@@ -0,0 +1,49 @@
+"""
+Normalized theme and opening tags.
+
+Puzzle.themes / Puzzle.opening_tags keep the space-separated text from the
+Lichess CSV; the tagged_themes / tagged_openings many-to-many relations
+mirror them so filtering by a tag is an index lookup instead of a LIKE scan.
+"""
+
+# Puzzle many-to-many field -> text field it mirrors
+TAG_FIELDS = {
+    'tagged_themes': 'themes',
+    'tagged_openings': 'opening_tags',
+}
+
+
+def sync_tags(puzzle_model, puzzles):
+    """
+    Replace the tag relations of the given puzzles with what their text fields say.
+
+    Works on bulk-created/updated rows (which send no m2m signals) and on
+    historical models in migrations; puzzles only need pk, themes and
+    opening_tags loaded. Uses a fixed number of queries per call.
+    """
+    puzzles = [puzzle for puzzle in puzzles if puzzle.pk is not None]
+    if not puzzles:
+        return
+
+    for field_name, text_field in TAG_FIELDS.items():
+        field = puzzle_model._meta.get_field(field_name)
+        tag_model = field.related_model
+        through = field.remote_field.through
+        source = f'{field.m2m_field_name()}_id'
+        target = f'{field.m2m_reverse_field_name()}_id'
+
+        wanted = {puzzle.pk: set(getattr(puzzle, text_field).split()) for puzzle in puzzles}
+        names = set().union(*wanted.values())
+
+        tag_ids = dict(tag_model.objects.filter(name__in=names).values_list('name', 'pk'))
+        missing = names - tag_ids.keys()
+        if missing:
+            tag_model.objects.bulk_create([tag_model(name=name) for name in missing], ignore_conflicts=True)
+            tag_ids.update(tag_model.objects.filter(name__in=missing).values_list('name', 'pk'))
+
+        through.objects.filter(**{f'{source}__in': list(wanted)}).delete()
+        through.objects.bulk_create([
+            through(**{source: pk, target: tag_ids[name]})
+            for pk, tag_names in wanted.items()
+            for name in tag_names
+        ])
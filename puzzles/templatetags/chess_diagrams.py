@@ -0,0 +1,34 @@
+from urllib.parse import urlencode
+
+from django import template
+from django.urls import reverse
+from django.utils.html import format_html
+
+from puzzles.diagrams import RENDER_VERSION
+
+register = template.Library()
+
+
+@register.simple_tag
+def diagram_url(fen, orientation=None, lastmove='', fmt='svg', size=None):
+    """URL of the server-rendered diagram; orientation defaults to the side to move in fen"""
+    if orientation is None:
+        orientation = 'black' if fen.split(' ')[1:2] == ['b'] else 'white'
+    params = {'fen': fen, 'orientation': orientation}
+    if lastmove:
+        params['lastmove'] = lastmove
+    if size:
+        params['size'] = size
+    # Versioned so the long-lived browser cache is bypassed once the drawing changes
+    params['v'] = RENDER_VERSION
+    return f"{reverse('diagram', args=[fmt])}?{urlencode(params)}"
+
+
+@register.simple_tag
+def diagram(fen, alt='', orientation=None, lastmove=''):
+    """<img> of a position that needs no client JS, e.g. in article content"""
+    return format_html(
+        '<img class="board-diagram" src="{}" alt="{}" loading="lazy">',
+        diagram_url(fen, orientation, lastmove),
+        alt,
+    )
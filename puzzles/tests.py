@@ -1,3 +1,469 @@
-from django.test import TestCase
+import glob
+import os
+import shutil
+import sqlite3
+import tempfile
+from io import BufferedReader, BytesIO, StringIO, TextIOWrapper
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.admin import AdminSite
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from web_page.models import Job
+
+from . import diagrams, glicko2
+from .admin import PuzzleAdmin
+from .importing import ImportCheckpoint, source_fingerprint
+from .models import Puzzle, PuzzleAttempt, PuzzleTheme, RatingPeriod, TrainingProfile
+from .solving import MoveResult, check_move, parse_line
+from .templatetags.chess_diagrams import diagram_url
+from .training import apply_rating_period
+from .utils import render_puzzle
+
+# Black's king steps into the corner and the rook mates on the back rank
+BACK_RANK_FEN = '6k1/5ppp/8/8/8/8/5PPP/R5K1 b - - 0 1'
+BACK_RANK_MOVES = 'g8h8 a1a8'
+
+
+def create_puzzle(puzzle_id='back1', fen=BACK_RANK_FEN, moves=BACK_RANK_MOVES, rating=1500):
+    start_fen, solution = render_puzzle(fen, moves)
+    return Puzzle.objects.create(
+        puzzle_id=puzzle_id, fen=fen, moves=moves, rating=rating, start_fen=start_fen, solution=solution,
+    )
+
+
+def line(fen, moves):
+    return parse_line(render_puzzle(fen, moves)[0], moves)
+
+
+class CheckMoveTests(SimpleTestCase):
+    def test_solution_move_gets_the_reply(self):
+        moves = 'e8g8 d1h5 h7h6 g5f7'
+        gambit = line('r1bqk2r/1pp1nppp/1pnp4/4p1N1/2B1PP2/8/PPPP2PP/R1BQK2R b KQkq - 1 8', moves)
+        result = check_move(gambit, 0, 'd1h5')
+        self.assertEqual((result.correct, result.solved, result.reply), (True, False, 'h7h6'))
+        self.assertFalse(result.over)
+
+    def test_promotion_without_piece_matches(self):
+        # The pawn promotes to a queen; the board UI may send the move before the piece is picked
+        promotion = line('7k/P7/8/8/8/8/8/K5r1 b - - 0 1', 'g1g2 a7a8q')
+        for move in ('a7a8q', 'a7a8'):
+            with self.subTest(move=move):
+                self.assertEqual(check_move(promotion, 0, move), MoveResult(True, True, promotion.positions[0]))
+        # An underpromotion that does not mate is wrong
+        self.assertEqual(check_move(promotion, 0, 'a7a8n'), MoveResult(False, False))
+
+    def test_alternate_mate_solves(self):
+        # Either rook mates on the back rank
+        two_rooks = line('6k1/5ppp/8/8/8/8/5PPP/RR4K1 b - - 0 1', 'g8h8 a1a8')
+        result = check_move(two_rooks, 0, 'b1b8')
+        self.assertEqual((result.correct, result.solved), (True, True))
+        self.assertNotEqual(result.fen, two_rooks.positions[0])
+        # A legal move that does not mate is wrong
+        self.assertEqual(check_move(two_rooks, 0, 'a1a7'), MoveResult(False, False))
+
+    def test_impossible_moves_are_wrong(self):
+        back_rank = line(BACK_RANK_FEN, BACK_RANK_MOVES)
+        for move in ('a1a1', 'h2h5', 'a8a1'):
+            with self.subTest(move=move):
+                self.assertEqual(check_move(back_rank, 0, move), MoveResult(False, False))
+
+    def test_bad_ply_and_malformed_moves_raise(self):
+        back_rank = line(BACK_RANK_FEN, BACK_RANK_MOVES)
+        for ply, move in [(1, 'a1a8'), (-2, 'a1a8'), (2, 'a1a8'), (0, 'A1A8'), (0, 'a1a9'), (0, 'a1a8k'), (0, '')]:
+            with self.subTest(ply=ply, move=move), self.assertRaises(ValueError):
+                check_move(back_rank, ply, move)
+
+
+class Glicko2Tests(SimpleTestCase):
+    def test_reference_example(self):
+        # Glickman, "Example of the Glicko-2 system", with tau = 0.5
+        player = glicko2.Rating(1500, 200, 0.06)
+        results = [(glicko2.Rating(1400, 30), 1), (glicko2.Rating(1550, 100), 0), (glicko2.Rating(1700, 300), 0)]
+        rating, deviation, volatility = glicko2.rate(player, results, tau=0.5)
+        self.assertAlmostEqual(rating, 1464.06, delta=0.01)
+        self.assertAlmostEqual(deviation, 151.52, delta=0.01)
+        self.assertAlmostEqual(volatility, 0.05999, delta=0.00001)
+
+    def test_period_without_results_only_widens_the_deviation(self):
+        rating, deviation, volatility = glicko2.rate(glicko2.Rating(1500, 200, 0.06), [])
+        self.assertEqual((rating, volatility), (1500, 0.06))
+        self.assertAlmostEqual(deviation, 200.27, delta=0.01)
+
+    def test_deviation_is_clamped(self):
+        self.assertEqual(glicko2.rate(glicko2.Rating(1500, 350, 0.06), []).deviation, glicko2.MAX_DEVIATION)
+        opponents = [(glicko2.Rating(1500, 50), 0.5)] * 200
+        self.assertEqual(glicko2.rate(glicko2.Rating(1500, 50, 0.06), opponents).deviation, glicko2.MIN_DEVIATION)
+
+
+class RatingPeriodTests(TestCase):
+    def setUp(self):
+        self.puzzle = create_puzzle(rating=1500)
+        self.profile = TrainingProfile.objects.create(session_key='s' * 32)
+
+    def log(self, *solved):
+        PuzzleAttempt.objects.bulk_create(
+            PuzzleAttempt(profile=self.profile, puzzle=self.puzzle, solved=s) for s in solved
+        )
+
+    def test_batch_is_one_rating_period(self):
+        self.log(True, False, True)
+        period = apply_rating_period()
+        self.assertEqual((period.attempts, period.profiles, period.puzzles), (3, 1, 1))
+
+        # Every attempt is scored against the ratings from before the period
+        puzzle = glicko2.Rating(1500, 100, 0.06)
+        expected = glicko2.rate(glicko2.Rating(), [(puzzle, 1.0), (puzzle, 0.0), (puzzle, 1.0)])
+        self.profile.refresh_from_db()
+        self.assertAlmostEqual(self.profile.rating, expected.rating)
+        self.assertEqual(self.profile.nb_attempts, 3)
+        self.puzzle.refresh_from_db()
+        self.assertLess(self.puzzle.rating, 1500)
+        self.assertEqual(self.puzzle.nb_plays, 3)
+
+    def test_attempts_are_applied_once(self):
+        self.log(True)
+        apply_rating_period()
+        self.assertIsNone(apply_rating_period())
+
+        self.log(False, False)
+        self.assertEqual(apply_rating_period(batch_size=1).attempts, 1)
+        self.assertEqual(apply_rating_period(batch_size=1).attempts, 1)
+        self.assertIsNone(apply_rating_period())
+        self.assertEqual(RatingPeriod.objects.count(), 3)
+
+    def test_attempt_committed_late_with_a_lower_id_is_applied(self):
+        # On PostgreSQL an attempt can become visible after a later id was already applied
+        PuzzleAttempt.objects.create(pk=10, profile=self.profile, puzzle=self.puzzle, solved=True)
+        apply_rating_period()
+        late = PuzzleAttempt.objects.create(pk=5, profile=self.profile, puzzle=self.puzzle, solved=False)
+
+        period = apply_rating_period()
+        self.assertEqual((period.first_attempt_id, period.attempts), (5, 1))
+        late.refresh_from_db()
+        self.assertEqual(late.period, period)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.nb_attempts, 2)
+
+    def test_attempts_on_deleted_puzzles_are_skipped(self):
+        self.log(True)
+        PuzzleAttempt.objects.create(profile=self.profile, puzzle_id=self.puzzle.pk + 1000, solved=True)
+        period = apply_rating_period()
+        self.assertEqual((period.attempts, period.puzzles), (2, 1))
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.nb_attempts, 1)
+
+
+class RandomPuzzleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i, rating in enumerate([900, 1300, 1500, 1700, 2000, 2500]):
+            puzzle = create_puzzle(f'r{i}', rating=rating)
+            puzzle.themes = 'mateIn1 short' if rating < 1600 else 'endgame'
+            puzzle.save()
+        # Evenly spread keys, so every puzzle of a theme has a fair chance within a few requests
+        links = list(PuzzleTheme.objects.order_by('pk'))
+        for i, link in enumerate(links):
+            link.random_key = (i + 0.5) / len(links)
+        PuzzleTheme.objects.bulk_update(links, ['random_key'])
+
+    def ids(self, **params):
+        """Puzzles served over repeated requests, or None if the filters match nothing"""
+        served = set()
+        for _ in range(60):
+            response = self.client.get(reverse('puzzle_random'), params)
+            if response.status_code == 404:
+                return None
+            served.add(response.json()['id'])
+        return served
+
+    def test_filters(self):
+        self.assertEqual(self.ids(min_rating=1400, max_rating=2000), {'r2', 'r3', 'r4'})
+        self.assertEqual(self.ids(min_rating=2100), {'r5'})
+        self.assertEqual(self.ids(theme='mateIn1'), {'r0', 'r1', 'r2'})
+        self.assertEqual(self.ids(theme='mateIn1', min_rating=1000), {'r1', 'r2'})
+        self.assertEqual(self.ids(difficulty='medium', max_rating=1600), {'r1', 'r2'})
+        self.assertIsNone(self.ids(difficulty='easy', min_rating=1500))
+        self.assertIsNone(self.ids(theme='fork'))
+
+    @skipUnless(connection.vendor == 'sqlite', "Checks SQLite query plans")
+    def test_picks_are_index_seeks_without_sorting(self):
+        puzzles = Puzzle.objects.rendered()
+        for params in [{'min_rating': 1000, 'max_rating': 2500}, {'theme': 'mateIn1'}, {}]:
+            for queryset in puzzles.random_seeks(**params):
+                with self.subTest(params=params):
+                    self.assertNotIn('TEMP B-TREE', queryset[:1].explain())
+
+
+class TrainingTests(TestCase):
+    def setUp(self):
+        self.puzzle = create_puzzle()
+
+    def test_training_payload_does_not_identify_the_puzzle(self):
+        response = self.client.get(reverse('training_next'))
+        served = response.json()
+        self.assertNotIn('id', served)
+        self.assertNotIn('move_url', served)
+        self.assertNotIn(self.puzzle.puzzle_id, response.content.decode())
+
+    def test_trained_puzzle_is_guarded_for_its_session(self):
+        self.client.get(reverse('training_next'))
+        response = self.client.get(reverse('puzzle_move', args=[self.puzzle.puzzle_id]), {'ply': 0, 'move': 'a1a1'})
+        self.assertEqual(response.status_code, 409)
+        self.assertNotIn('solution', response.json())
+
+    def test_cookieless_requests_cannot_reach_the_trained_puzzle(self):
+        self.client.get(reverse('training_next'))
+        cookieless = Client()
+        # Training moves need the session, whatever puzzle the request names
+        response = cookieless.post(reverse('training_move'), {'puzzle': self.puzzle.puzzle_id, 'move': 'a1a8'})
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(PuzzleAttempt.objects.exists())
+        # The trainer's own move still counts, as the session alone names the puzzle
+        self.assertTrue(self.client.post(reverse('training_move'), {'move': 'a1a8'}).json()['solved'])
+
+    def test_public_endpoint_reveals_solution_outside_training(self):
+        response = self.client.get(reverse('puzzle_move', args=[self.puzzle.puzzle_id]), {'ply': 0, 'move': 'a1a1'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()['correct'])
+        self.assertEqual(response.json()['solution'], self.puzzle.solution)
+
+    def test_abandoning_a_served_puzzle_counts_as_failure(self):
+        self.client.get(reverse('training_next'))
+        self.client.get(reverse('training_next'))
+        self.assertEqual(
+            list(PuzzleAttempt.objects.values_list('puzzle_id', 'solved')), [(self.puzzle.pk, False)]
+        )
+
+    def test_solving_logs_one_attempt(self):
+        self.client.get(reverse('training_next'))
+        result = self.client.post(reverse('training_move'), {'move': 'a1a8'}).json()
+        self.assertTrue(result['solved'])
+        self.assertEqual(result['solution'], self.puzzle.solution)
+
+        # The puzzle is finished, so fetching the next one is not a failure
+        self.client.get(reverse('training_next'))
+        self.assertEqual(list(PuzzleAttempt.objects.values_list('solved', flat=True)), [True])
+
+
+CSV_HEADER = 'PuzzleId,FEN,Moves,Rating,RatingDeviation,Popularity,NbPlays,Themes,GameUrl,OpeningTags'
+CSV_ROWS = [
+    '026vm,rnbq2kr/ppp1n3/3p3p/4P1p1/4Pp2/1QP5/PP4PP/RNB2RK1 b - - 1 11,g8h7 b3f7,843,80,100,130,'
+    'mate mateIn1 oneMove opening,https://lichess.org/ok3jv9qy/black#22,'
+    'Kings_Gambit_Accepted Kings_Gambit_Accepted_Kings_Knights_Gambit',
+    '03bV3,r1bqk2r/1pp1nppp/1pnp4/4p1N1/2B1PP2/8/PPPP2PP/R1BQK2R b KQkq - 1 8,e8g8 d1h5 h7h6 g5f7,1984,80,91,4323,'
+    'advantage opening short,https://lichess.org/1gS2tOXt/black#16,'
+    'Kings_Gambit_Declined Kings_Gambit_Declined_Classical_Variation',
+    # Not a King's Gambit, so filtered out
+    '00008,r6k/pp2r2p/4Rp1Q/3p4/8/1N1P2R1/PqP2bPP/7K b - - 0 24,f2g3 e6e7 b2b1 b3c1 b1c1 h6c1,1913,75,94,6230,'
+    'crushing hangingPiece long middlegame,https://lichess.org/787zsVup/black#48,',
+]
+
+
+class ImportRowsMixin:
+    def import_rows(self, rows, *args):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False) as csv_file:
+            csv_file.write('\n'.join([CSV_HEADER, *rows]) + '\n')
+        self.addCleanup(os.remove, csv_file.name)
+        out = StringIO()
+        call_command('import_puzzles', csv_file.name, *args, stdout=out)
+        return out.getvalue()
+
+
+class ImportPuzzlesTests(ImportRowsMixin, TestCase):
+    """Runs on the configured backend: bulk writes on SQLite, COPY and ON CONFLICT with DB_ENGINE=postgresql"""
+
+    def test_creates_then_leaves_unchanged_rows_alone(self):
+        self.assertIn('Created 2, Updated 0, Unchanged 0', self.import_rows(CSV_ROWS))
+        self.assertEqual(set(Puzzle.objects.values_list('puzzle_id', flat=True)), {'026vm', '03bV3'})
+        self.assertIn('Created 0, Updated 0, Unchanged 2', self.import_rows(CSV_ROWS))
+
+    def test_changed_rows_are_updated_in_place(self):
+        self.import_rows(CSV_ROWS)
+        before = Puzzle.objects.get(puzzle_id='026vm')
+        rows = [CSV_ROWS[0].replace(',843,', ',1250,'), *CSV_ROWS[1:]]
+        self.assertIn('Created 0, Updated 1, Unchanged 1', self.import_rows(rows))
+
+        after = Puzzle.objects.get(puzzle_id='026vm')
+        self.assertEqual((after.pk, after.rating, after.difficulty), (before.pk, 1250, 'medium'))
+        self.assertEqual(after.random_key, before.random_key)
+        self.assertEqual(after.created_at, before.created_at)
+        self.assertIn('mateIn1', after.tagged_themes.values_list('name', flat=True))
+
+    def test_skip_existing_keeps_stored_rows(self):
+        self.import_rows(CSV_ROWS)
+        rows = [CSV_ROWS[0].replace(',843,', ',1250,')]
+        self.assertIn('Skipped 1', self.import_rows(rows, '--skip-existing'))
+        self.assertEqual(Puzzle.objects.get(puzzle_id='026vm').rating, 843)
+
+    def test_unchanged_hash_skips_the_row_unless_forced(self):
+        self.import_rows(CSV_ROWS)
+        # Edited behind the importer's back; the CSV line and so its hash are the same
+        Puzzle.objects.filter(puzzle_id='026vm').update(rating=1)
+        self.assertIn('Unchanged 2', self.import_rows(CSV_ROWS))
+        self.assertEqual(Puzzle.objects.get(puzzle_id='026vm').rating, 1)
+
+        self.assertIn('Updated 2', self.import_rows(CSV_ROWS, '--force'))
+        self.assertEqual(Puzzle.objects.get(puzzle_id='026vm').rating, 843)
+
+
+class ImportCheckpointTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.csv_path = os.path.join(directory, 'puzzles.csv')
+        self.checkpoint_path = os.path.join(directory, 'checkpoint.json')
+
+    def write_csv(self, rows):
+        content = '\n'.join([CSV_HEADER, *rows]) + '\n'
+        with open(self.csv_path, 'w', encoding='utf-8', newline='') as file:
+            file.write(content)
+        return content
+
+    def interrupt_after_first_row(self, source, fingerprint, content):
+        """Leave the checkpoint a run killed after committing the first row would have"""
+        header, first = content.split('\n')[:2]
+        checkpoint = ImportCheckpoint(self.checkpoint_path, source, fingerprint)
+        checkpoint.fieldnames = CSV_HEADER.split(',')
+        checkpoint.save(1, len(f'{header}\n{first}\n'.encode('utf-8')))
+
+    def run_import(self, path, *args):
+        out = StringIO()
+        call_command('import_puzzles', path, '--checkpoint', self.checkpoint_path, *args, stdout=out)
+        return out.getvalue()
+
+    def stored_ids(self):
+        return set(Puzzle.objects.values_list('puzzle_id', flat=True))
+
+    def test_resumes_after_the_committed_rows(self):
+        content = self.write_csv(CSV_ROWS)
+        self.interrupt_after_first_row(os.path.abspath(self.csv_path), source_fingerprint(self.csv_path), content)
+
+        self.assertIn('Resuming from checkpoint at row 1', self.run_import(self.csv_path))
+        self.assertEqual(self.stored_ids(), {'03bV3'})
+        # A finished import leaves nothing to resume from
+        self.assertFalse(os.path.exists(self.checkpoint_path))
+
+    def test_new_file_at_the_same_path_starts_over(self):
+        content = self.write_csv(CSV_ROWS)
+        self.interrupt_after_first_row(os.path.abspath(self.csv_path), source_fingerprint(self.csv_path), content)
+        # A fresh dump downloaded over the old one
+        self.write_csv([CSV_ROWS[0].replace(',843,', ',1250,'), *CSV_ROWS[1:]])
+
+        self.assertIn('does not match', self.run_import(self.csv_path))
+        self.assertEqual(self.stored_ids(), {'026vm', '03bV3'})
+
+    def stdin_import(self, content, *args):
+        stdin = TextIOWrapper(BufferedReader(BytesIO(content.encode('utf-8'))))
+        with mock.patch('sys.stdin', stdin):
+            return self.run_import('-', *args)
+
+    def test_stdin_resumes_only_when_asked(self):
+        content = '\n'.join([CSV_HEADER, *CSV_ROWS]) + '\n'
+        self.interrupt_after_first_row('-', None, content)
+        self.assertIn('pass --resume', self.stdin_import(content))
+        self.assertEqual(self.stored_ids(), {'026vm', '03bV3'})
+
+        Puzzle.objects.all().delete()
+        self.interrupt_after_first_row('-', None, content)
+        self.assertIn('Resuming from checkpoint at row 1', self.stdin_import(content, '--resume'))
+        self.assertEqual(self.stored_ids(), {'03bV3'})
+
+
+@skipUnless(connection.vendor == 'postgresql', "The COPY import path needs DB_ENGINE=postgresql")
+class PostgresCopyImportTests(ImportRowsMixin, TestCase):
+    def test_staging_table_is_dropped_after_each_batch(self):
+        # Inside the test's transaction, so ON COMMIT DROP alone would leave it behind for the next batch
+        self.assertIn('Created 2', self.import_rows(CSV_ROWS, '--batch-size', '1'))
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('puzzle_import')")
+            self.assertIsNone(cursor.fetchone()[0])
+
+    def test_duplicate_ids_in_one_batch_keep_the_last_row(self):
+        rows = [CSV_ROWS[0], CSV_ROWS[0].replace(',843,', ',1250,')]
+        self.assertIn('Created 1', self.import_rows(rows))
+        self.assertEqual(Puzzle.objects.get(puzzle_id='026vm').rating, 1250)
+
+
+class PrerenderPuzzlesTests(TestCase):
+    def setUp(self):
+        self.puzzles = [create_puzzle(f'p{i}') for i in range(4)]
+        Puzzle.objects.update(start_fen='', solution='')
+
+    def rendered_ids(self):
+        return set(Puzzle.objects.exclude(start_fen='').values_list('pk', flat=True))
+
+    def test_admin_action_queues_id_ranges(self):
+        pks = [puzzle.pk for puzzle in self.puzzles]
+        queryset = Puzzle.objects.filter(pk__in=[pks[0], pks[1], pks[3]])
+        PuzzleAdmin(Puzzle, AdminSite()).revalidate_action(mock.Mock(), queryset)
+
+        job = Job.objects.get()
+        self.assertEqual(job.options, {'all': True, 'ranges': [[pks[0], pks[1]], [pks[3], pks[3]]]})
+        call_command(job.command, *job.args, stdout=StringIO(), **job.options)
+        self.assertEqual(self.rendered_ids(), {pks[0], pks[1], pks[3]})
+
+    def test_more_ids_than_sqlite_allows_in_one_query(self):
+        if connection.vendor == 'sqlite':
+            # Builds before SQLite 3.32 allow only 999 variables, most later ones 32766
+            connection.ensure_connection()
+            previous = connection.connection.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+            self.addCleanup(connection.connection.setlimit, sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, previous)
+        pks = [puzzle.pk for puzzle in self.puzzles]
+        ids = [pks[0], *range(pks[-1] + 2, pks[-1] + 80000, 2)]
+        call_command('prerender_puzzles', '--ids', *map(str, ids), stdout=StringIO())
+        self.assertEqual(self.rendered_ids(), {pks[0]})
+
+    def test_ranges_from_the_command_line(self):
+        pks = [puzzle.pk for puzzle in self.puzzles]
+        call_command('prerender_puzzles', '--ranges', f'{pks[1]}-{pks[2]}', str(pks[3]), stdout=StringIO())
+        self.assertEqual(self.rendered_ids(), set(pks[1:]))
+
+
+class DiagramTests(SimpleTestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cache_dir)
+        settings = override_settings(DIAGRAM_CACHE_DIR=self.cache_dir)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def get(self, fmt, **params):
+        return self.client.get(reverse('diagram', args=[fmt]), {'fen': BACK_RANK_FEN, **params})
+
+    def test_svg_ignores_size(self):
+        for size in ('300', 'large'):
+            with self.subTest(size=size):
+                response = self.get('svg', size=size)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], 'image/svg+xml')
+
+    def test_png_sizes(self):
+        response = self.get('png', size=240)
+        self.assertEqual((response.status_code, response['Content-Type']), (200, 'image/png'))
+        for size in ('300', 'large'):
+            with self.subTest(size=size):
+                self.assertEqual(self.get('png', size=size).status_code, 400)
+
+    def test_null_move_is_rejected(self):
+        for fmt in diagrams.RENDERERS:
+            with self.subTest(fmt=fmt):
+                self.assertEqual(self.get(fmt, lastmove='0000').status_code, 400)
+                self.assertEqual(self.get(fmt, lastmove='a1a1').status_code, 400)
+                self.assertEqual(self.get(fmt, lastmove='g1h1').status_code, 200)
+
+    def test_only_versioned_urls_are_immutable(self):
+        url = diagram_url(BACK_RANK_FEN)
+        self.assertIn(f'v={diagrams.RENDER_VERSION}', url)
+        self.assertIn('immutable', self.client.get(url)['Cache-Control'])
+        self.assertNotIn('immutable', self.get('svg')['Cache-Control'])
+        with mock.patch.object(diagrams, 'RENDER_VERSION', diagrams.RENDER_VERSION + 1):
+            self.assertNotIn('immutable', self.client.get(url)['Cache-Control'])
+
+    def test_diagrams_are_cached(self):
+        first = diagrams.get_diagram('png', BACK_RANK_FEN, size=240)
+        self.assertEqual(len(glob.glob(os.path.join(self.cache_dir, '*', '*.png'))), 1)
+        self.assertEqual(diagrams.get_diagram('png', BACK_RANK_FEN, size=240), first)
@@ -0,0 +1,108 @@
+"""
+Puzzle training mode.
+
+Solving a puzzle only appends a PuzzleAttempt row. apply_rating_period
+later folds a batch of attempts into the solvers' and puzzles' Glicko-2
+ratings: every attempt in the batch is scored against ratings as they were
+before it, and the new ratings are written with one bulk update per model,
+so training traffic never takes row locks on Puzzle.
+
+Applied attempts are marked with their RatingPeriod rather than found by
+primary key order. Ids are assigned when a row is inserted but become
+visible when its transaction commits, so on PostgreSQL an attempt may show
+up after others with higher ids; a "pk above the last one applied"
+watermark would skip it for good.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from . import glicko2
+from .models import Puzzle, PuzzleAttempt, RatingPeriod, TrainingProfile
+from .utils import difficulty_for_rating
+
+# Session key holding [pk, puzzle_id, ply] of the puzzle served to the solver and their next ply
+SESSION_PUZZLE = 'training_puzzle'
+
+
+def profile_json(profile):
+    return {
+        'rating': round(profile.rating),
+        'rating_deviation': round(profile.rating_deviation),
+        'attempts': profile.nb_attempts,
+    }
+
+
+def next_puzzle(profile):
+    """A rendered puzzle matched to the profile's rating"""
+    return Puzzle.objects.rendered().near_rating(profile.rating)
+
+
+def apply_rating_period(batch_size=5000):
+    """Apply the next batch of logged attempts as one rating period; returns the RatingPeriod or None"""
+    with transaction.atomic():
+        # Locked until the batch is marked, so an overlapping run waits and then skips these attempts
+        attempts = list(
+            PuzzleAttempt.objects.select_for_update().filter(period__isnull=True)
+            .order_by('pk').values_list('pk', 'profile_id', 'puzzle_id', 'solved')[:batch_size]
+        )
+        if not attempts:
+            return None
+
+        profiles = TrainingProfile.objects.in_bulk({profile_id for _, profile_id, _, _ in attempts})
+        puzzles = Puzzle.objects.only(
+            'rating', 'rating_deviation', 'rating_volatility', 'nb_plays', 'difficulty'
+        ).in_bulk({puzzle_id for _, _, puzzle_id, _ in attempts})
+
+        profile_ratings = {
+            pk: glicko2.Rating(p.rating, p.rating_deviation, p.volatility) for pk, p in profiles.items()
+        }
+        puzzle_ratings = {
+            pk: glicko2.Rating(p.rating, p.rating_deviation, p.rating_volatility) for pk, p in puzzles.items()
+        }
+
+        # The solver wins when the puzzle is solved and the puzzle wins otherwise
+        profile_results = defaultdict(list)
+        puzzle_results = defaultdict(list)
+        for _, profile_id, puzzle_id, solved in attempts:
+            # Attempts on deleted puzzles or profiles are skipped; the log has no constraints
+            if profile_id not in profiles or puzzle_id not in puzzles:
+                continue
+            profile_results[profile_id].append((puzzle_ratings[puzzle_id], 1.0 if solved else 0.0))
+            puzzle_results[puzzle_id].append((profile_ratings[profile_id], 0.0 if solved else 1.0))
+
+        for profile_id, results in profile_results.items():
+            profile = profiles[profile_id]
+            profile.rating, profile.rating_deviation, profile.volatility = glicko2.rate(
+                profile_ratings[profile_id], results
+            )
+            profile.nb_attempts += len(results)
+        for puzzle_id, results in puzzle_results.items():
+            puzzle = puzzles[puzzle_id]
+            rating, deviation, puzzle.rating_volatility = glicko2.rate(puzzle_ratings[puzzle_id], results)
+            puzzle.rating = min(max(round(rating), 0), 3000)
+            puzzle.rating_deviation = round(deviation)
+            puzzle.difficulty = difficulty_for_rating(puzzle.rating)
+            puzzle.nb_plays += len(results)
+
+        TrainingProfile.objects.bulk_update(
+            [profiles[pk] for pk in profile_results],
+            ['rating', 'rating_deviation', 'volatility', 'nb_attempts'], batch_size=500,
+        )
+        Puzzle.objects.bulk_update(
+            [puzzles[pk] for pk in puzzle_results],
+            ['rating', 'rating_deviation', 'rating_volatility', 'difficulty', 'nb_plays'], batch_size=500,
+        )
+        # SQLite ignores select_for_update; there this raises IntegrityError, rolling the batch
+        # back, if an overlapping run already applied it
+        period = RatingPeriod.objects.create(
+            first_attempt_id=attempts[0][0],
+            last_attempt_id=attempts[-1][0],
+            attempts=len(attempts),
+            profiles=len(profile_results),
+            puzzles=len(puzzle_results),
+        )
+        attempt_ids = [pk for pk, _, _, _ in attempts]
+        for start in range(0, len(attempt_ids), 500):
+            PuzzleAttempt.objects.filter(pk__in=attempt_ids[start:start + 500]).update(period=period)
+        return period
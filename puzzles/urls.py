@@ -0,0 +1,12 @@
+# puzzles/urls.py
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('', views.random_puzzle, name='puzzle_random'),
+    path('diagram.<str:fmt>', views.diagram, name='diagram'),
+    path('training/next/', views.training_next, name='training_next'),
+    path('training/move/', views.training_move, name='training_move'),
+    path('<str:puzzle_id>/', views.puzzle_detail, name='puzzle_detail'),
+    path('<str:puzzle_id>/move/', views.puzzle_move, name='puzzle_move'),
+]
@@ -0,0 +1,108 @@
+import chess
+
+# Piece symbols mapping
+PIECE_SYMBOLS = {
+    'K': '♔', 'Q': '♕', 'R': '♖', 'B': '♗', 'N': '♘', 'P': '♙',
+    'k': '♚', 'q': '♛', 'r': '♜', 'b': '♝', 'n': '♞', 'p': '♟'
+}
+
+# Difficulty buckets as (name, exclusive upper rating bound); the last one is open-ended
+DIFFICULTY_BUCKETS = (
+    ('easy', 1200),
+    ('medium', 1800),
+    ('hard', 2400),
+    ('expert', None),
+)
+
+
+def difficulty_rating_range(name):
+    """(lowest rating, rating above the bucket or None) of a difficulty bucket"""
+    low = 0
+    for bucket, upper in DIFFICULTY_BUCKETS:
+        if bucket == name:
+            return low, upper
+        low = upper
+    raise ValueError(f"Unknown difficulty {name}")
+
+
+def difficulty_for_rating(rating):
+    """Name of the difficulty bucket a puzzle rating falls into"""
+    for name, upper in DIFFICULTY_BUCKETS:
+        if upper is None or rating < upper:
+            return name
+
+
+def id_ranges(ids):
+    """Collapse ascending ids into [first, last] runs, which stay small when whole tables are selected"""
+    ranges = []
+    for pk in ids:
+        if ranges and pk == ranges[-1][1] + 1:
+            ranges[-1][1] = pk
+        else:
+            ranges.append([pk, pk])
+    return ranges
+
+
+def remove_consecutive_duplicates(move_str):
+    """Remove consecutive identical lowercase letters"""
+    if not move_str:
+        return move_str
+    result = move_str[0]
+    for c in move_str[1:]:
+        if not (c.islower() and c == result[-1]):
+            result += c
+    return result
+
+
+def render_puzzle(fen, moves):
+    """
+    Validate a puzzle and pre-render what the home page shows.
+
+    Returns (start_fen, solution): the position after the opponent's first
+    move and the numbered symbolic solution. Raises ValueError if the puzzle
+    has too few moves or any move is illegal.
+    """
+    moves_uci = moves.split()
+    if len(moves_uci) < 2:
+        raise ValueError("Puzzle needs at least two moves")
+
+    # Puzzle FEN after first move
+    board = chess.Board(fen)
+    board.push_uci(moves_uci[0])
+    start_fen = board.fen()
+
+    # Generate cleaned solution, continuing from the position after the first move
+    board_solution = board.copy(stack=False)
+    moves_clean = []
+
+    for move_uci in moves_uci[1:]:  # skip first move
+        move = chess.Move.from_uci(move_uci)
+        if not board_solution.is_legal(move):
+            raise ValueError(f"Illegal move {move_uci}")
+        san = board_solution.san(move)
+
+        # Replace piece letters with symbols
+        piece = board_solution.piece_at(move.from_square)
+        if piece:
+            symbol = PIECE_SYMBOLS[piece.symbol()]
+            if san and san[0] in "KQRBN":
+                san = symbol + san[1:]
+
+        # Remove x and all non-alphanumeric except piece symbols
+        san_clean = "".join(c for c in san if c != 'x' and (c.isalnum() or c in PIECE_SYMBOLS.values()))
+
+        # Remove consecutive identical lowercase letters
+        san_clean = remove_consecutive_duplicates(san_clean)
+
+        moves_clean.append(san_clean)
+        board_solution.push(move)
+
+    # Number moves: 1. move1 move2 2. move3 move4 ...
+    numbered_solution = []
+    for i in range(0, len(moves_clean), 2):
+        white_move = moves_clean[i]
+        black_move = moves_clean[i+1] if i+1 < len(moves_clean) else ""
+        numbered_solution.append(f"{i//2 + 1}. {white_move} {black_move}".strip())
+
+    return start_fen, "  ".join(numbered_solution)
+
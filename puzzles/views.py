@@ -0,0 +1,175 @@
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_POST
+
+from . import diagrams
+from .models import Puzzle, PuzzleAttempt, TrainingProfile
+from .solving import check_move, parse_line
+from .training import SESSION_PUZZLE, next_puzzle, profile_json
+from .utils import difficulty_rating_range
+
+
+def puzzle_json(puzzle):
+    """
+    Pre-rendered fields the front end needs to show a puzzle.
+
+    Leaves out the moves, solution and source game: moves are checked
+    through puzzle_move, which reveals the solution once the puzzle is over.
+    """
+    return {
+        'id': puzzle.puzzle_id,
+        'rating': puzzle.rating,
+        'difficulty': puzzle.difficulty,
+        'themes': puzzle.theme_list,
+        'fen': puzzle.start_fen,
+        'first_move': puzzle.first_move,
+        'move_url': reverse('puzzle_move', args=[puzzle.puzzle_id]),
+    }
+
+
+def parse_rating(value):
+    return int(value) if value not in (None, '') else None
+
+
+async def random_puzzle(request):
+    """A random puzzle, optionally filtered by ?difficulty=, ?min_rating=/?max_rating= and ?theme="""
+    puzzles = Puzzle.objects.rendered()
+
+    difficulty = request.GET.get('difficulty')
+    if difficulty:
+        if difficulty not in Puzzle.Difficulty.values:
+            return JsonResponse({'error': f"Unknown difficulty {difficulty}"}, status=400)
+        puzzles = puzzles.filter(difficulty=difficulty)
+
+    try:
+        min_rating = parse_rating(request.GET.get('min_rating'))
+        max_rating = parse_rating(request.GET.get('max_rating'))
+    except ValueError:
+        return JsonResponse({'error': "Ratings must be integers"}, status=400)
+    if difficulty and (min_rating is not None or max_rating is not None):
+        # Seek only within the part of the range the difficulty covers
+        low, high = difficulty_rating_range(difficulty)
+        min_rating = low if min_rating is None else max(min_rating, low)
+        if high is not None:
+            max_rating = high - 1 if max_rating is None else min(max_rating, high - 1)
+
+    # Each filter is a seek on its own index; see PuzzleQuerySet.random_seeks
+    puzzle = await puzzles.arandom(min_rating, max_rating, request.GET.get('theme'))
+    if puzzle is None:
+        return JsonResponse({'error': "No puzzle matches"}, status=404)
+    return JsonResponse(puzzle_json(puzzle))
+
+
+async def puzzle_detail(request, puzzle_id):
+    puzzle = await Puzzle.objects.rendered().filter(puzzle_id=puzzle_id).afirst()
+    if puzzle is None:
+        return JsonResponse({'error': "Puzzle not found"}, status=404)
+    return JsonResponse(puzzle_json(puzzle))
+
+
+def move_json(result, puzzle):
+    """MoveResult as JSON, adding the solution once the puzzle is over"""
+    data = result._asdict()
+    if result.over:
+        data['solution'] = puzzle.solution
+    return data
+
+
+async def puzzle_move(request, puzzle_id):
+    """Check the solver's ?move= at ?ply= and answer with the opponent's reply"""
+    try:
+        ply = int(request.GET.get('ply', 0))
+    except ValueError:
+        return JsonResponse({'error': "Ply must be an integer"}, status=400)
+    in_progress = await request.session.aget(SESSION_PUZZLE)
+    if in_progress and in_progress[1] == puzzle_id:
+        # Checking moves here would reveal the solution of the puzzle being rated
+        return JsonResponse({'error': "This puzzle is being trained; play it through the training API"}, status=409)
+    puzzle = await Puzzle.objects.rendered().only('start_fen', 'moves', 'solution').filter(
+        puzzle_id=puzzle_id
+    ).afirst()
+    if puzzle is None:
+        return JsonResponse({'error': "Puzzle not found"}, status=404)
+    try:
+        result = check_move(parse_line(puzzle.start_fen, puzzle.moves), ply, request.GET.get('move', ''))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse(move_json(result, puzzle))
+
+
+@gzip_page
+def diagram(request, fmt):
+    """Board diagram of ?fen= as SVG or PNG; also ?orientation=, ?lastmove=, ?v= and, for PNG, ?size="""
+    if fmt not in diagrams.RENDERERS:
+        return JsonResponse({'error': "Diagrams are svg or png"}, status=404)
+    size = None
+    if fmt == 'png':
+        try:
+            size = int(request.GET.get('size', diagrams.PNG_SIZES[-1]))
+        except ValueError:
+            return JsonResponse({'error': "Size must be an integer"}, status=400)
+    try:
+        data = diagrams.get_diagram(
+            fmt,
+            request.GET.get('fen', ''),
+            request.GET.get('orientation', 'white'),
+            request.GET.get('lastmove', ''),
+            size,
+        )
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    response = HttpResponse(data, content_type=diagrams.CONTENT_TYPES[fmt])
+    if request.GET.get('v') == str(diagrams.RENDER_VERSION):
+        # The same parameters always draw the same picture, and a new drawing gets a new ?v=
+        patch_cache_control(response, public=True, max_age=365 * 24 * 60 * 60, immutable=True)
+    else:
+        # Unversioned URLs would keep an outdated picture after RENDER_VERSION is bumped
+        patch_cache_control(response, public=True, max_age=60 * 60)
+    return response
+
+
+def training_next(request):
+    """Next training puzzle for this visitor, matched to their rating"""
+    profile = TrainingProfile.for_request(request)
+    if request.session.get(SESSION_PUZZLE):
+        # Leaving a served puzzle counts as failing it, so puzzles cannot be skipped after a look
+        PuzzleAttempt.objects.create(profile=profile, puzzle_id=request.session[SESSION_PUZZLE][0], solved=False)
+        del request.session[SESSION_PUZZLE]
+
+    puzzle = next_puzzle(profile)
+    if puzzle is None:
+        return JsonResponse({'error': "No puzzle available"}, status=404)
+    request.session[SESSION_PUZZLE] = [puzzle.pk, puzzle.puzzle_id, 0]
+    data = puzzle_json(puzzle)
+    # Without the id the public endpoints cannot be asked about the puzzle being rated;
+    # its moves are checked through training_move, which knows it from the session
+    del data['id'], data['move_url']
+    return JsonResponse({**data, 'player': profile_json(profile)})
+
+
+@require_POST
+def training_move(request):
+    """Check a move of the puzzle training_next served; the result is logged once the puzzle is over"""
+    puzzle_pk, puzzle_id, ply = request.session.get(SESSION_PUZZLE, (None, None, 0))
+    if puzzle_id is None:
+        return JsonResponse({'error': "No puzzle is being trained"}, status=409)
+    puzzle = Puzzle.objects.only('start_fen', 'moves', 'solution').filter(pk=puzzle_pk).first()
+    if puzzle is None:
+        del request.session[SESSION_PUZZLE]
+        return JsonResponse({'error': "Puzzle not found"}, status=404)
+    try:
+        result = check_move(parse_line(puzzle.start_fen, puzzle.moves), ply, request.POST.get('move', ''))
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    data = move_json(result, puzzle)
+    if result.over:
+        del request.session[SESSION_PUZZLE]
+        profile = TrainingProfile.for_request(request)
+        PuzzleAttempt.objects.create(profile=profile, puzzle_id=puzzle_pk, solved=result.solved)
+        data['player'] = profile_json(profile)
+    else:
+        request.session[SESSION_PUZZLE] = [puzzle_pk, puzzle_id, ply + 2]
+    return JsonResponse(data)
@@ -1,20 +1,104 @@
 # web_page/admin.py
-from django.contrib import admin
-from django.core.management import call_command
-from .models import ClubMember, ClubTournament, LeagueStatisticsField, Article, ArticleImage
+from django import forms
+from django.contrib import admin, messages
+from .models import (
+    ClubMember, ClubTournament, LeagueStatisticsField, Article, ArticleImage, Job, RatingHistory,
+    TournamentGame, TournamentPlayer, TournamentRound,
+)
+from .tournaments import pair_next_round, recompute
 
 @admin.register(ClubMember)
 class ClubMemberAdmin(admin.ModelAdmin):
     list_display = ("first_name", "last_name", "rating")
+    search_fields = ("first_name", "last_name")
     actions = ["update_ratings_action"]
 
     def update_ratings_action(self, request, queryset):
-        call_command("update_fide_ratings")
-        self.message_user(request, "Ratings updated successfully.")
+        # Runs in the run_jobs worker so the admin request returns immediately
+        Job.enqueue(Job.Command.UPDATE_FIDE_RATINGS, member_ids=list(queryset.values_list('pk', flat=True)))
+        self.message_user(request, "Rating update queued; track it under Jobs.")
 
     update_ratings_action.short_description = "Апдејтуј ФИДЕ рејтинг према тренутним подацима."
 
-admin.site.register(ClubTournament)
+@admin.register(RatingHistory)
+class RatingHistoryAdmin(admin.ModelAdmin):
+    list_display = ("member", "rating", "recorded_at")
+    list_filter = ("member",)
+    list_select_related = ("member",)
+
+class TournamentPlayerInline(admin.TabularInline):
+    model = TournamentPlayer
+    fields = ("member", "name", "rating", "withdrawn", "score", "buchholz", "sonneborn_berger", "colors")
+    readonly_fields = ("score", "buchholz", "sonneborn_berger", "colors")
+    autocomplete_fields = ("member",)
+    extra = 0
+
+@admin.register(ClubTournament)
+class ClubTournamentAdmin(admin.ModelAdmin):
+    inlines = [TournamentPlayerInline]
+    list_display = ("name", "start_date", "system", "rounds", "status")
+    list_filter = ("status", "system")
+    actions = ["pair_next_round_action", "recompute_standings_action"]
+
+    def pair_next_round_action(self, request, queryset):
+        for tournament in queryset:
+            try:
+                pairing_round = pair_next_round(tournament)
+            except ValueError as e:
+                self.message_user(request, f"{tournament}: {e}", messages.ERROR)
+            else:
+                self.message_user(request, f"Упарено: {pairing_round}. Резултати се уносе под „Партије“.")
+
+    pair_next_round_action.short_description = "Упари следеће коло"
+
+    def recompute_standings_action(self, request, queryset):
+        # Standings are kept incrementally; this rebuilds them from the games if they ever drift
+        for tournament in queryset:
+            recompute(tournament)
+        self.message_user(request, "Пласман је поново израчунат.")
+
+    recompute_standings_action.short_description = "Поново израчунај пласман"
+
+@admin.register(TournamentRound)
+class TournamentRoundAdmin(admin.ModelAdmin):
+    list_display = ("tournament", "number", "created_at")
+    list_filter = ("tournament",)
+
+class TournamentGameForm(forms.ModelForm):
+    class Meta:
+        model = TournamentGame
+        fields = "__all__"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk and 'result' in self.fields:
+            # A bye row only offers the bye, a game every result but the bye
+            is_bye = self.instance.black_id is None
+            self.fields['result'].choices = [
+                (value, label) for value, label in self.fields['result'].choices
+                if (value == TournamentGame.Result.BYE) is is_bye
+            ]
+
+@admin.register(TournamentGame)
+class TournamentGameAdmin(admin.ModelAdmin):
+    # Saving a result updates the standings (TournamentGame.save)
+    form = TournamentGameForm
+    list_display = ("round", "board", "white", "black", "result")
+    list_editable = ("result",)
+    list_filter = ("round__tournament", "round__number")
+    list_select_related = ("round__tournament", "white", "black")
+    raw_id_fields = ("white", "black")
+    list_per_page = 300
+
+    def get_changelist_form(self, request, **kwargs):
+        kwargs.setdefault('form', TournamentGameForm)
+        return super().get_changelist_form(request, **kwargs)
+
+    def get_readonly_fields(self, request, obj=None):
+        # Pairings are made by pair_next_round; only results are entered afterwards
+        if obj:
+            return ("round", "white", "black")
+        return ()
 admin.site.register(LeagueStatisticsField)
 
 class ArticleImageInline(admin.TabularInline):
@@ -26,4 +110,17 @@ class ArticleAdmin(admin.ModelAdmin):
     inlines = [ArticleImageInline]
     list_display = ("title", "published_at", "is_published")
     list_filter = ("is_published",)
-    search_fields = ("title",)
\ No newline at end of file
+    search_fields = ("title",)
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("command", "status", "progress", "created_at", "started_at", "finished_at")
+    list_filter = ("status", "command")
+    fields = ("command", "args", "options", "status", "progress", "output", "created_at", "started_at", "finished_at")
+    readonly_fields = ("status", "progress", "output", "created_at", "started_at", "finished_at")
+
+    def get_readonly_fields(self, request, obj=None):
+        # Only new jobs can be edited; queued/finished ones are a record
+        if obj:
+            return ("command", "args", "options") + self.readonly_fields
+        return self.readonly_fields
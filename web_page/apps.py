@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class WebPageConfig(AppConfig):
     name = 'web_page'
+
+    def ready(self):
+        from . import signals  # noqa: F401
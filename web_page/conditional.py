@@ -0,0 +1,90 @@
+"""
+Conditional GET (ETag / Last-Modified, 304 Not Modified) for public pages.
+
+Each view declares a version function that computes the page's freshness
+from a cheap aggregate query over timestamps, so a revalidation costs one
+indexed query and no rendering.
+"""
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.db.models import Max
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from .models import Article
+
+
+def conditional(version_func):
+    """
+    Like django.views.decorators.http.condition, but one callable computes
+    both validators and it may query the database from async views.
+
+    version_func takes the view's arguments and returns (etag, last_modified),
+    or None to skip conditional handling (e.g. the view is about to 404).
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def inner(request, *args, **kwargs):
+                version = await sync_to_async(version_func)(request, *args, **kwargs)
+                response = not_modified(request, version)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return add_validators(request, response, version)
+        else:
+            @wraps(view)
+            def inner(request, *args, **kwargs):
+                version = version_func(request, *args, **kwargs)
+                response = not_modified(request, version)
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                return add_validators(request, response, version)
+        return inner
+    return decorator
+
+
+def not_modified(request, version):
+    """A 304 (or 412) response if the client's copy is current, else None"""
+    if version is None:
+        return None
+    etag, last_modified = version
+    return get_conditional_response(
+        request,
+        etag=quote_etag(etag),
+        last_modified=int(last_modified.timestamp()) if last_modified else None,
+    )
+
+
+def add_validators(request, response, version):
+    if version is None or request.method not in ('GET', 'HEAD') or response.status_code != 200:
+        return response
+    etag, last_modified = version
+    response.headers.setdefault('ETag', quote_etag(etag))
+    if last_modified and not response.has_header('Last-Modified'):
+        response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def articles_version(request, *args, **kwargs):
+    """
+    Version of pages listing published articles (news list, gallery).
+
+    The latest updated_at over all articles moves whenever an article or one
+    of its images is edited, published or unpublished; the published count
+    catches deletions.
+    """
+    # Both are index-only: MAX() seeks the updated_at index, the count reads the published partial index
+    last_modified = Article.objects.aggregate(last_modified=Max('updated_at'))['last_modified']
+    if last_modified is None:
+        return None
+    published = Article.objects.filter(is_published=True).count()
+    return f'W/"articles-{last_modified.timestamp():.6f}-{published}"', last_modified
+
+
+def article_version(request, pk):
+    updated_at = Article.objects.filter(pk=pk, is_published=True).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return None
+    return f'W/"article-{pk}-{updated_at.timestamp():.6f}"', updated_at
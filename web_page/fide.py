@@ -0,0 +1,133 @@
+"""
+Concurrent client for the FIDE rating API used by update_fide_ratings.
+"""
+import hashlib
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = "https://fide-api.vercel.app/player_info/"
+
+# Validators remembered from the previous fetch of a player
+CachedResponse = namedtuple('CachedResponse', 'etag last_modified content_hash')
+
+# Outcome of one fetch; not_modified means the player's data is unchanged since the cached response
+RatingResult = namedtuple('RatingResult', 'rating error not_modified etag last_modified content_hash')
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting how many requests start per second"""
+
+    def __init__(self, rate, capacity=None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity or max(1, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def make_session(pool_size, retries):
+    """Keep-alive session that retries transient failures with exponential backoff"""
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=('GET',),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def fetch_rating(session, bucket, fide_id, cached=None, api_url=API_URL, timeout=10):
+    """
+    Fetch the classical rating of one player as a RatingResult.
+
+    With cached validators the request is conditional: a 304, or a body
+    whose hash matches the cached one, comes back as not_modified without
+    being parsed.
+    """
+    cached = cached or CachedResponse('', '', '')
+    headers = {}
+    if cached.etag:
+        headers['If-None-Match'] = cached.etag
+    if cached.last_modified:
+        headers['If-Modified-Since'] = cached.last_modified
+
+    bucket.acquire()
+    try:
+        response = session.get(
+            api_url,
+            params={
+                "fide_id": fide_id,
+                "history": "false"
+            },
+            headers=headers,
+            timeout=timeout
+        )
+    except requests.exceptions.Timeout:
+        return RatingResult(None, "Timeout", False, *cached)
+    except requests.exceptions.RequestException as e:
+        return RatingResult(None, f"Request error: {e}", False, *cached)
+
+    if response.status_code == 304:
+        return RatingResult(None, None, True, *cached)
+
+    if response.status_code != 200:
+        return RatingResult(None, f"HTTP {response.status_code}", False, *cached)
+
+    etag = response.headers.get('ETag', '')
+    last_modified = response.headers.get('Last-Modified', '')
+    content_hash = hashlib.blake2b(response.content, digest_size=16).hexdigest()
+    if content_hash == cached.content_hash:
+        return RatingResult(None, None, True, etag, last_modified, content_hash)
+
+    try:
+        new_rating = response.json().get("classical_rating")
+        if not new_rating:
+            return RatingResult(None, "No rating returned", False, *cached)
+        return RatingResult(int(new_rating), None, False, etag, last_modified, content_hash)
+    except (ValueError, AttributeError) as e:
+        return RatingResult(None, f"Unexpected response: {e}", False, *cached)
+
+
+def fetch_ratings(players, api_url=API_URL, concurrency=8, rate=5, timeout=10, retries=3):
+    """
+    Fetch ratings for many players concurrently over one shared session.
+
+    players maps FIDE id to its CachedResponse (or None). Yields
+    (fide_id, RatingResult) in submission order.
+    """
+    bucket = TokenBucket(rate)
+    with make_session(concurrency, retries) as session:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = {
+                fide_id: executor.submit(fetch_rating, session, bucket, fide_id, cached, api_url, timeout)
+                for fide_id, cached in players.items()
+            }
+            for fide_id, future in futures.items():
+                yield fide_id, future.result()
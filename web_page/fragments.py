@@ -0,0 +1,34 @@
+"""
+Cached home page sections and their invalidation.
+
+Each section is rendered inside a {% cache %} block in home.html and dropped
+from the cache whenever one of the models it shows changes.
+"""
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+
+# Fragment name (as used in home.html) -> models whose changes invalidate it
+HOME_SECTIONS = {
+    'home_players': ['ClubMember'],
+    'home_articles': ['Article'],
+    'home_tournaments': ['ClubTournament'],
+    'home_league': ['LeagueStatisticsField'],
+}
+
+
+def invalidate_section(fragment_name):
+    cache.delete(make_template_fragment_key(fragment_name))
+
+
+def invalidate_for_model(model_name):
+    """Drop every home page section that renders the given model"""
+    for fragment_name, model_names in HOME_SECTIONS.items():
+        if model_name in model_names:
+            invalidate_section(fragment_name)
+
+
+async def cached_sections():
+    """Names of the home page sections currently held in the fragment cache"""
+    keys = {make_template_fragment_key(name): name for name in HOME_SECTIONS}
+    found = await cache.aget_many(keys)
+    return {keys[key] for key in found}
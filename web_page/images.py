@@ -0,0 +1,133 @@
+"""
+Resized, re-encoded derivatives of uploaded images.
+
+Every uploaded image gets a set of widths in modern formats next to the
+original (under derivatives/), so templates can serve a srcset instead of
+the full-size upload. Only the standard widths narrower than the original
+are made, plus one at the original's own width, so nothing is upscaled or
+stored twice at the same size.
+"""
+import os
+import re
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import ExifTags, Image, ImageOps, features
+
+# Standard widths offered in srcset; each image also gets one at its own width
+WIDTHS = (320, 640, 1280)
+
+# Formats in order of preference for <picture> sources; AVIF only if this Pillow build supports it
+FORMATS = tuple(fmt for fmt, available in (
+    ('avif', features.check('avif')),
+    ('webp', features.check('webp')),
+) if available)
+
+QUALITY = {'avif': 55, 'webp': 75}
+
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+
+
+def derivative_name(name, width, fmt):
+    stem, _ = os.path.splitext(name)
+    return f"derivatives/{stem}-{width}w.{fmt}"
+
+
+def derivative_widths(width):
+    """Widths made for an image this wide: the standard widths below it, then its own"""
+    return [*(standard for standard in WIDTHS if standard < width), width]
+
+
+def image_width(field_file):
+    """Width of the upload as displayed, i.e. after EXIF rotation, read from its header; None if unreadable"""
+    try:
+        with field_file.open('rb') as source, Image.open(source) as image:
+            width, height = image.size
+            # Orientations 5-8 turn the picture by a quarter, so the stored height is shown as the width
+            return height if image.getexif().get(ExifTags.Base.Orientation, 1) > 4 else width
+    except (OSError, ValueError):
+        return None
+
+
+def generate_derivatives(field_file, overwrite=False):
+    """Write every width/format derivative of an image; returns how many were written"""
+    if not field_file or not FORMATS:
+        return 0
+    width = image_width(field_file)
+    if not overwrite and width and all(
+        default_storage.exists(derivative_name(field_file.name, size, fmt))
+        for size in derivative_widths(width) for fmt in FORMATS
+    ):
+        return 0
+
+    with field_file.open('rb') as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image.load()
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    if overwrite:
+        # Also drops widths an earlier scheme made that this image no longer gets
+        delete_derivatives(field_file.name)
+
+    written = 0
+    for width in derivative_widths(image.width):
+        resized = image
+        if width < image.width:
+            resized = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        for fmt in FORMATS:
+            name = derivative_name(field_file.name, width, fmt)
+            if default_storage.exists(name):
+                continue
+            buffer = BytesIO()
+            resized.save(buffer, fmt.upper(), quality=QUALITY[fmt])
+            default_storage.save(name, ContentFile(buffer.getvalue()))
+            written += 1
+    return written
+
+
+def delete_derivatives(name):
+    """Delete every derivative of the file called name, whatever widths it was given"""
+    stem, _ = os.path.splitext(name)
+    directory, base = os.path.split(f"derivatives/{stem}")
+    pattern = re.compile(re.escape(base) + r'-\d+w\.(?:' + '|'.join(MIME_TYPES) + ')')
+    try:
+        _, files = default_storage.listdir(directory)
+    except FileNotFoundError:
+        return
+    for file in files:
+        if pattern.fullmatch(file):
+            default_storage.delete(f"{directory}/{file}")
+
+
+def has_derivatives(field_file, width):
+    """Cheap check (one stat) that derivatives were generated for this file"""
+    return bool(FORMATS) and default_storage.exists(derivative_name(field_file.name, width, FORMATS[-1]))
+
+
+def srcset(field_file, fmt, width):
+    return ", ".join(
+        f"{default_storage.url(derivative_name(field_file.name, size, fmt))} {size}w"
+        for size in derivative_widths(width)
+    )
+
+
+def largest_url(field_file):
+    """URL of the full-width derivative in the most widely supported format, for lightbox targets"""
+    return picture_data(field_file)['full']
+
+
+def picture_data(field_file, sizes='100vw'):
+    """Everything a <picture> needs, as plain data for templates and JSON responses"""
+    width = image_width(field_file)
+    if not width or not has_derivatives(field_file, width):
+        return {'src': field_file.url, 'sources': [], 'full': field_file.url}
+    return {
+        # Browsers that take no <source> get the original upload, which every browser can decode
+        'src': field_file.url,
+        'sources': [
+            {'type': MIME_TYPES[fmt], 'srcset': srcset(field_file, fmt, width), 'sizes': sizes}
+            for fmt in FORMATS
+        ],
+        'full': default_storage.url(derivative_name(field_file.name, width, FORMATS[-1])),
+    }
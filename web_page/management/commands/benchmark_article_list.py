@@ -0,0 +1,72 @@
+import statistics
+import time
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.utils import timezone
+from web_page.models import Article
+from web_page.pagination import KeysetPaginator
+from web_page.views import ARTICLES_PER_PAGE, article_list
+
+
+class Command(BaseCommand):
+    help = "Benchmark /vesti/ page latency at increasing depths (uses a throwaway test database)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=100000, help='Published articles to create')
+        parser.add_argument('--depths', type=str, default='0,10,100,1000,5000',
+                            help='Comma-separated page numbers to time')
+        parser.add_argument('--repeat', type=int, default=50, help='Requests timed per depth')
+
+    def handle(self, *args, **options):
+        depths = [int(depth) for depth in options['depths'].split(',') if depth]
+
+        # Never touch the real database: run everything against a test copy
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            self.populate(options['articles'])
+            factory = RequestFactory()
+
+            for depth in depths:
+                cursor = self.cursor_at(depth * ARTICLES_PER_PAGE)
+                if cursor is None:
+                    self.stdout.write(f"page {depth:>6}: beyond the last article, skipped")
+                    continue
+                request = factory.get('/vesti/', {'posle': cursor} if cursor else {})
+
+                view = async_to_sync(article_list)
+                timings = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    view(request)
+                    timings.append((time.perf_counter() - start) * 1000)
+
+                self.stdout.write(f"page {depth:>6}: median {statistics.median(timings):.3f} ms")
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def populate(self, count, batch_size=5000):
+        now = timezone.now()
+        for offset in range(0, count, batch_size):
+            Article.objects.bulk_create([
+                Article(
+                    title=f"Вест {i}",
+                    content="Текст вести. " * 40,
+                    is_published=True,
+                    published_at=now - timedelta(minutes=i),
+                )
+                for i in range(offset, min(offset + batch_size, count))
+            ])
+
+    def cursor_at(self, position):
+        """Cursor that starts a page at the given position ('' for the first page)"""
+        if position == 0:
+            return ''
+        queryset = Article.objects.filter(is_published=True).order_by('-published_at', '-id')
+        last = queryset[position - 1:position].first()
+        if last is None:
+            return None
+        return KeysetPaginator(queryset, 'published_at', ARTICLES_PER_PAGE).encode(last)
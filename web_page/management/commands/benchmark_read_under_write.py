@@ -0,0 +1,161 @@
+import os
+import statistics
+import tempfile
+import threading
+import time
+from datetime import timedelta
+
+from asgiref.sync import async_to_sync
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, connections, transaction
+from django.test import RequestFactory
+from django.utils import timezone
+from puzzles.models import Puzzle, generate_random_key
+from puzzles.views import random_puzzle
+from web_page.models import Article
+from web_page.views import article_list
+
+SAMPLE_FEN = 'rnbqkbnr/pppp1ppp/8/4p3/4PP2/8/PPPP2PP/RNBQKBNR b KQkq - 0 2'
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark page and API latency while a bulk puzzle import holds the write lock, "
+        "with Django's default SQLite options versus the tuned settings (uses a throwaway "
+        "file-backed test database)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=10, help='Seconds to run each profile')
+        parser.add_argument('--readers', type=int, default=4, help='Concurrent reader threads')
+        parser.add_argument('--batch-size', type=int, default=10000, help='Puzzles written per import transaction')
+        parser.add_argument('--profiles', type=str, default='default,tuned',
+                            help="Comma-separated profiles to compare: 'default' (no pragmas, rollback journal) "
+                                 "and/or 'tuned' (settings.DATABASES options)")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            self.stdout.write("This benchmark only applies to SQLite.")
+            return
+
+        test_settings = connection.settings_dict['TEST']
+        tuned_options = connection.settings_dict['OPTIONS']
+        old_test_name = test_settings.get('NAME')
+
+        with tempfile.TemporaryDirectory() as directory:
+            # Readers and the writer need separate connections to one file, so no in-memory test database
+            test_settings['NAME'] = os.path.join(directory, 'benchmark.sqlite3')
+            old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+            try:
+                self.populate()
+                for profile in options['profiles'].split(','):
+                    profile = profile.strip()
+                    # journal_mode persists in the file and is normally set once by a migration,
+                    # so each profile switches it explicitly
+                    if profile == 'tuned':
+                        init_command = f"PRAGMA journal_mode=WAL;{tuned_options.get('init_command', '')}"
+                        self.use_options({**tuned_options, 'init_command': init_command})
+                    else:
+                        self.use_options({'init_command': 'PRAGMA journal_mode=DELETE'})
+                    self.run(profile, options)
+            finally:
+                self.use_options(tuned_options)
+                connections.close_all()
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+                test_settings['NAME'] = old_test_name
+
+    def use_options(self, database_options):
+        """Reconnect every thread's future connections with these DATABASES OPTIONS"""
+        connections.close_all()
+        connection.settings_dict['OPTIONS'] = database_options
+        connection.ensure_connection()
+        connection.close()
+
+    def populate(self, articles=1000, puzzles=20000):
+        now = timezone.now()
+        Article.objects.bulk_create([
+            Article(title=f"Вест {i}", content="Текст вести. " * 40, is_published=True,
+                    published_at=now - timedelta(minutes=i))
+            for i in range(articles)
+        ])
+        self.write_puzzles('seed', 0, puzzles)
+
+    def write_puzzles(self, prefix, start, count):
+        Puzzle.objects.bulk_create([
+            Puzzle(
+                puzzle_id=f'{prefix}{i}',
+                fen=SAMPLE_FEN,
+                moves='d7d5 e4d5',
+                rating=800 + i % 2000,
+                start_fen=SAMPLE_FEN,
+                solution='1. d5',
+                random_key=generate_random_key(),
+            )
+            for i in range(start, start + count)
+        ])
+
+    def run(self, profile, options):
+        stop = threading.Event()
+        timings = []
+        errors = []
+        written = [0]
+        lock = threading.Lock()
+        factory = RequestFactory()
+        requests = [
+            (async_to_sync(article_list), factory.get('/vesti/')),
+            (async_to_sync(random_puzzle), factory.get('/api/puzzles/', {'difficulty': 'medium'})),
+        ]
+
+        def writer():
+            batch = 0
+            try:
+                while not stop.is_set():
+                    # One import batch: the write lock is held for the whole transaction
+                    with transaction.atomic():
+                        self.write_puzzles(f'{profile}-', batch * options['batch_size'], options['batch_size'])
+                    batch += 1
+                    written[0] += options['batch_size']
+            finally:
+                connections.close_all()
+
+        def reader():
+            local_timings = []
+            local_errors = 0
+            try:
+                while not stop.is_set():
+                    for view, request in requests:
+                        start = time.perf_counter()
+                        try:
+                            view(request)
+                        except OperationalError:
+                            local_errors += 1
+                            continue
+                        local_timings.append((time.perf_counter() - start) * 1000)
+            finally:
+                connections.close_all()
+            with lock:
+                timings.extend(local_timings)
+                errors.append(local_errors)
+
+        threads = [threading.Thread(target=writer)]
+        threads += [threading.Thread(target=reader) for _ in range(options['readers'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(options['duration'])
+        stop.set()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        timings.sort()
+        if not timings:
+            self.stdout.write(f"{profile:>7}: no reads completed, {sum(errors)} errors")
+            return
+        self.stdout.write(
+            f"{profile:>7}: {len(timings) / elapsed:8.1f} reads/s, "
+            f"median {statistics.median(timings):.2f} ms, "
+            f"p95 {timings[int(len(timings) * 0.95) - 1]:.2f} ms, "
+            f"max {timings[-1]:.2f} ms, "
+            f"{sum(errors)} errors; writer {written[0] / elapsed:.0f} puzzles/s"
+        )
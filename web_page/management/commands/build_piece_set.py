@@ -0,0 +1,36 @@
+import json
+from pathlib import Path
+from urllib.parse import quote
+
+import chess
+import chess.svg
+from django.core.management.base import BaseCommand
+
+OUTPUT = Path(__file__).resolve().parents[2] / 'static' / 'js' / 'pieces.js'
+
+
+class Command(BaseCommand):
+    help = (
+        "Write js/pieces.js, the chess piece set inlined as SVG data URIs, so boards "
+        "need no piece image requests (run after upgrading python-chess, then collectstatic)"
+    )
+
+    def handle(self, *args, **options):
+        images = {}
+        for color in (chess.WHITE, chess.BLACK):
+            for piece_type in chess.PIECE_TYPES:
+                piece = chess.Piece(piece_type, color)
+                # chessboard.js piece codes: wK, bN, ...
+                code = ('w' if color else 'b') + piece.symbol().upper()
+                images[code] = 'data:image/svg+xml,' + quote(chess.svg.piece(piece), safe=' =:/')
+
+        OUTPUT.write_text(
+            "// Generated by `python manage.py build_piece_set` from python-chess's piece set; do not edit.\n"
+            f"const PIECE_IMAGES = {json.dumps(images, indent=4)};\n"
+            "\n"
+            "// chessboard.js pieceTheme\n"
+            "function pieceImage(piece) {\n"
+            "    return PIECE_IMAGES[piece];\n"
+            "}\n"
+        )
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(images)} pieces to {OUTPUT}"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from web_page.images import generate_derivatives
+from web_page.models import Article, ArticleImage, ClubMember
+
+
+class Command(BaseCommand):
+    help = "Generate thumbnails and WebP/AVIF derivatives for uploaded images"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--overwrite', action='store_true', help='Regenerate derivatives that already exist')
+
+    def handle(self, *args, **options):
+        sources = [
+            (ArticleImage.objects.exclude(image=''), 'image'),
+            (Article.objects.exclude(featured_image='').exclude(featured_image__isnull=True), 'featured_image'),
+            (ClubMember.objects.exclude(image='').exclude(image__isnull=True), 'image'),
+        ]
+
+        written = 0
+        for queryset, field_name in sources:
+            for obj in queryset.only('pk', field_name).iterator():
+                try:
+                    written += generate_derivatives(getattr(obj, field_name), overwrite=options['overwrite'])
+                except (OSError, ValueError) as e:
+                    self.stdout.write(self.style.WARNING(f"{obj}: {e}"))
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {written} derivative images."))
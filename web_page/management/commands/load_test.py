@@ -0,0 +1,94 @@
+import statistics
+import threading
+import time
+from collections import defaultdict
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test running servers and compare requests/second, e.g. ASGI vs WSGI:\n"
+        "  uvicorn gambit.asgi:application --port 8001 --workers 2\n"
+        "  gunicorn gambit.wsgi --bind 127.0.0.1:8000 --workers 2 --threads 4\n"
+        "  python manage.py load_test --target asgi=http://127.0.0.1:8001 --target wsgi=http://127.0.0.1:8000"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', action='append', required=True,
+                            help='NAME=BASE_URL of a running server; repeat to compare several')
+        parser.add_argument('--paths', type=str, default='/,/vesti/,/api/puzzles/',
+                            help='Comma-separated paths requested round-robin by every client')
+        parser.add_argument('--concurrency', type=int, default=16, help='Concurrent keep-alive clients')
+        parser.add_argument('--duration', type=float, default=10, help='Seconds to load each target')
+        parser.add_argument('--warmup', type=float, default=2, help='Seconds of unmeasured load first')
+
+    def handle(self, *args, **options):
+        targets = []
+        for target in options['target']:
+            name, sep, url = target.partition('=')
+            if not sep or not url:
+                raise CommandError(f"--target must look like NAME=URL, got {target!r}")
+            targets.append((name, url.rstrip('/')))
+        paths = [path for path in options['paths'].split(',') if path]
+
+        for name, base_url in targets:
+            self.stdout.write(f"\n{name} ({base_url}), {options['concurrency']} clients:")
+            self.load(base_url, paths, options['concurrency'], options['warmup'])
+            timings, errors, elapsed = self.load(base_url, paths, options['concurrency'], options['duration'])
+
+            total = sum(len(values) for values in timings.values())
+            for path in paths:
+                values = sorted(timings[path])
+                if not values:
+                    self.stdout.write(f"  {path:<20} no successful requests, {errors[path]} errors")
+                    continue
+                self.stdout.write(
+                    f"  {path:<20} {len(values) / elapsed:8.1f} req/s, "
+                    f"median {statistics.median(values):7.2f} ms, "
+                    f"p95 {values[max(int(len(values) * 0.95) - 1, 0)]:7.2f} ms, "
+                    f"{errors[path]} errors"
+                )
+            self.stdout.write(self.style.SUCCESS(f"  total {total / elapsed:8.1f} req/s"))
+
+    def load(self, base_url, paths, concurrency, duration):
+        """Run clients for duration seconds; returns (timings per path in ms, errors per path, elapsed)"""
+        stop = threading.Event()
+        timings = defaultdict(list)
+        errors = defaultdict(int)
+        lock = threading.Lock()
+
+        def client(offset):
+            local_timings = defaultdict(list)
+            local_errors = defaultdict(int)
+            with requests.Session() as session:
+                i = offset
+                while not stop.is_set():
+                    path = paths[i % len(paths)]
+                    i += 1
+                    start = time.perf_counter()
+                    try:
+                        response = session.get(base_url + path, timeout=30)
+                        ok = response.status_code < 400
+                    except requests.RequestException:
+                        ok = False
+                    if ok:
+                        local_timings[path].append((time.perf_counter() - start) * 1000)
+                    else:
+                        local_errors[path] += 1
+            with lock:
+                for path, values in local_timings.items():
+                    timings[path].extend(values)
+                for path, count in local_errors.items():
+                    errors[path] += count
+
+        threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(duration)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        return timings, errors, time.perf_counter() - started
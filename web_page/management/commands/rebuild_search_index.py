@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from puzzles.models import Puzzle
+from web_page import search
+from web_page.models import Article
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of articles and puzzles"
+
+    def handle(self, *args, **options):
+        if not search.available():
+            raise CommandError("Full-text search needs SQLite; other databases use icontains fallbacks")
+
+        with transaction.atomic():
+            search.rebuild(Article, Puzzle)
+
+        self.stdout.write(self.style.SUCCESS("Search index rebuilt."))
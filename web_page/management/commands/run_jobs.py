@@ -0,0 +1,100 @@
+import io
+import time
+import traceback
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from django.utils import timezone
+from web_page.models import Job
+
+# Keep only the tail of very chatty commands (e.g. a multi-hour import)
+MAX_OUTPUT_CHARS = 20000
+
+
+class JobOutput(io.TextIOBase):
+    """Stream a command's stdout into its Job row, throttling database writes"""
+
+    def __init__(self, job, interval=1.0):
+        self.job = job
+        self.interval = interval
+        self.buffer = ''
+        self.last_line = ''
+        self.last_saved = 0.0
+
+    def write(self, text):
+        self.buffer = (self.buffer + text)[-MAX_OUTPUT_CHARS:]
+        lines = [line for line in text.splitlines() if line.strip()]
+        if lines:
+            self.last_line = lines[-1][:255]
+        if time.monotonic() - self.last_saved >= self.interval:
+            self.save()
+        return len(text)
+
+    def save(self):
+        self.last_saved = time.monotonic()
+        Job.objects.filter(pk=self.job.pk).update(progress=self.last_line, output=self.buffer)
+
+
+class Command(BaseCommand):
+    help = "Run queued background jobs (rating updates, puzzle imports)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--poll', type=float, default=5, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--stale-after', type=float, default=12,
+                            help='Hours after which a job still marked running is assumed dead and queued again')
+
+    def handle(self, *args, **options):
+        stale_after = timedelta(hours=options['stale_after'])
+        self.stdout.write("Waiting for jobs...")
+        while True:
+            self.requeue_stale(stale_after)
+            job = self.claim_next()
+            if job:
+                self.run(job)
+                continue
+            if options['once']:
+                break
+            time.sleep(options['poll'])
+            close_old_connections()
+
+    def requeue_stale(self, max_age):
+        """Queue running jobs started longer than max_age ago again; their worker was killed mid-run"""
+        requeued = Job.objects.filter(
+            status=Job.Status.RUNNING, started_at__lt=timezone.now() - max_age
+        ).update(status=Job.Status.QUEUED, started_at=None, progress="Requeued after its worker stopped")
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"Requeued {requeued} stale job(s)"))
+        return requeued
+
+    def claim_next(self):
+        """Atomically move the oldest queued job to running; None if the queue is empty"""
+        while True:
+            job = Job.objects.filter(status=Job.Status.QUEUED).order_by('created_at').first()
+            if job is None:
+                return None
+            # Conditional update so two workers never run the same job
+            claimed = Job.objects.filter(pk=job.pk, status=Job.Status.QUEUED).update(
+                status=Job.Status.RUNNING,
+                started_at=timezone.now(),
+            )
+            if claimed:
+                return job
+
+    def run(self, job):
+        self.stdout.write(f"Running {job}...")
+        output = JobOutput(job)
+        try:
+            if job.command not in Job.Command.values:
+                raise ValueError(f"Unknown command {job.command}")
+            call_command(job.command, *job.args, stdout=output, stderr=output, **job.options)
+            status = Job.Status.DONE
+        except Exception:
+            output.write(traceback.format_exc())
+            status = Job.Status.FAILED
+
+        output.save()
+        Job.objects.filter(pk=job.pk).update(status=status, finished_at=timezone.now())
+        self.stdout.write(f"Job {job.pk} finished: {Job.Status(status).label}")
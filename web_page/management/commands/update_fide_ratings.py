@@ -1,62 +1,96 @@
-import requests
-from django.core.management.base import BaseCommand
-from django.utils import timezone
-from web_page.models import ClubMember
+from collections import defaultdict
 
-API_URL = "https://fide-api.vercel.app/player_info/"
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from web_page.fide import API_URL, CachedResponse, fetch_ratings
+from web_page.fragments import invalidate_for_model
+from web_page.models import ClubMember, RatingHistory
 
 
 class Command(BaseCommand):
     help = "Update FIDE classical ratings and track rating changes"
 
-    def handle(self, *args, **kwargs):
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at once')
+        parser.add_argument('--rate', type=float, default=5, help='Maximum requests started per second')
+        parser.add_argument('--timeout', type=float, default=10, help='Per-request timeout in seconds')
+        parser.add_argument('--retries', type=int, default=3, help='Retries per request with exponential backoff')
+        parser.add_argument('--api-url', type=str, default=API_URL, help='FIDE rating API endpoint')
+        parser.add_argument('--member-ids', type=int, nargs='+', help='Only update these club members')
+        parser.add_argument('--force', action='store_true', help='Ignore cached responses and refetch everyone')
+
+    def handle(self, *args, **options):
+        if options['rate'] <= 0:
+            raise CommandError("--rate must be positive")
 
         members = ClubMember.objects.filter(
             is_active=True
         ).exclude(fide_id__isnull=True).exclude(fide_id="")
+        if options['member_ids']:
+            members = members.filter(pk__in=options['member_ids'])
 
-        self.stdout.write(f"\nUpdating {members.count()} members...\n")
-
+        members_by_fide_id = defaultdict(list)
         for member in members:
-            try:
-                response = requests.get(
-                    API_URL,
-                    params={
-                        "fide_id": member.fide_id,
-                        "history": "false"
-                    },
-                    timeout=10
-                )
-
-                if response.status_code != 200:
+            members_by_fide_id[member.fide_id].append(member)
+
+        self.stdout.write(f"\nUpdating {sum(map(len, members_by_fide_id.values()))} members...\n")
+
+        # Conditional requests let the API (or our body hash) report unchanged players cheaply
+        players = {
+            fide_id: None if options['force'] else CachedResponse(
+                group[0].fide_etag, group[0].fide_last_modified, group[0].fide_content_hash
+            )
+            for fide_id, group in members_by_fide_id.items()
+        }
+
+        changed = []
+        history = []
+        now = timezone.now()
+
+        results = fetch_ratings(
+            players,
+            api_url=options['api_url'],
+            concurrency=options['concurrency'],
+            rate=options['rate'],
+            timeout=options['timeout'],
+            retries=options['retries'],
+        )
+
+        for fide_id, result in results:
+            for member in members_by_fide_id[fide_id]:
+                if result.error:
                     self.stdout.write(
-                        self.style.WARNING(
-                            f"HTTP {response.status_code} → {member.full_name}"
-                        )
+                        self.style.WARNING(f"{result.error} → {member.full_name}")
                     )
                     continue
 
-                data = response.json()
-                new_rating = data.get("classical_rating")
+                metadata_changed = (
+                    (member.fide_etag, member.fide_last_modified, member.fide_content_hash)
+                    != (result.etag, result.last_modified, result.content_hash)
+                )
+                member.fide_etag = result.etag
+                member.fide_last_modified = result.last_modified
+                member.fide_content_hash = result.content_hash
 
-                if not new_rating:
+                if result.not_modified:
+                    if metadata_changed:
+                        changed.append(member)
                     self.stdout.write(
-                        self.style.WARNING(
-                            f"No rating returned → {member.full_name}"
-                        )
+                        f"{member.full_name}: not modified ({member.rating})"
                     )
                     continue
 
-                # Convert to int safely
-                new_rating = int(new_rating)
+                new_rating = result.rating
 
                 # If first time setting rating
                 if member.rating is None:
                     member.rating = new_rating
                     member.previous_rating = None
                     member.rating_change = None
-                    member.rating_updated_at = timezone.now()
-                    member.save()
+                    member.rating_updated_at = now
+                    changed.append(member)
+                    history.append(RatingHistory(member=member, rating=new_rating, recorded_at=now))
 
                     self.stdout.write(
                         self.style.SUCCESS(
@@ -73,8 +107,9 @@ class Command(BaseCommand):
                     member.previous_rating = old_rating
                     member.rating = new_rating
                     member.rating_change = change
-                    member.rating_updated_at = timezone.now()
-                    member.save()
+                    member.rating_updated_at = now
+                    changed.append(member)
+                    history.append(RatingHistory(member=member, rating=new_rating, recorded_at=now))
 
                     sign = "+" if change > 0 else ""
                     self.stdout.write(
@@ -83,23 +118,29 @@ class Command(BaseCommand):
                         )
                     )
                 else:
+                    if metadata_changed:
+                        changed.append(member)
                     self.stdout.write(
                         f"{member.full_name}: unchanged ({member.rating})"
                     )
 
-            except requests.exceptions.Timeout:
-                self.stdout.write(
-                    self.style.ERROR(f"Timeout → {member.full_name}")
-                )
-
-            except requests.exceptions.RequestException as e:
-                self.stdout.write(
-                    self.style.ERROR(f"Request error → {member.full_name}: {str(e)}")
-                )
-
-            except Exception as e:
-                self.stdout.write(
-                    self.style.ERROR(f"Unexpected error → {member.full_name}: {str(e)}")
-                )
-
-        self.stdout.write(self.style.SUCCESS("\nRating update finished.\n"))
+        # Write every change in one transaction once all fetches are done
+        for member in changed:
+            member.updated_at = now
+        with transaction.atomic():
+            ClubMember.objects.bulk_update(
+                changed,
+                [
+                    'rating', 'previous_rating', 'rating_change', 'rating_updated_at', 'updated_at',
+                    'fide_etag', 'fide_last_modified', 'fide_content_hash',
+                ]
+            )
+            RatingHistory.objects.bulk_create(history)
+
+        # bulk_update sends no post_save, so drop the cached players section here
+        if changed:
+            invalidate_for_model('ClubMember')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"\nRating update finished ({len(history)} ratings changed).\n"
+        ))
@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web_page', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clubmember',
+            name='previous_rating',
+            field=models.PositiveIntegerField(blank=True, null=True, verbose_name='Претходни рејтинг'),
+        ),
+        migrations.AddField(
+            model_name='clubmember',
+            name='rating_change',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Промена рејтинга'),
+        ),
+        migrations.AddField(
+            model_name='clubmember',
+            name='rating_updated_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Рејтинг ажуриран'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web_page', '0002_clubmember_rating_tracking'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('command', models.CharField(choices=[('update_fide_ratings', 'Ажурирање ФИДЕ рејтинга'), ('import_puzzles', 'Увоз проблема'), ('prerender_puzzles', 'Провера проблема')], max_length=100, verbose_name='Команда')),
+                ('args', models.JSONField(blank=True, default=list, help_text='Позициони аргументи команде, нпр. ["lichess_db_puzzle.csv.zst"]', verbose_name='Аргументи')),
+                ('options', models.JSONField(blank=True, default=dict, help_text='Опције команде, нпр. {"workers": 4}', verbose_name='Опције')),
+                ('status', models.IntegerField(choices=[(0, 'На чекању'), (1, 'У току'), (2, 'Завршен'), (3, 'Неуспешан')], default=0, verbose_name='Статус')),
+                ('progress', models.CharField(blank=True, max_length=255, verbose_name='Напредак')),
+                ('output', models.TextField(blank=True, verbose_name='Излаз')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Креирано')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Почетак')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Крај')),
+            ],
+            options={
+                'verbose_name': 'Посао',
+                'verbose_name_plural': 'Послови',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='web_page_jo_status_d9ed61_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web_page', '0003_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clubmember',
+            name='fide_content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='clubmember',
+            name='fide_etag',
+            field=models.CharField(blank=True, editable=False, max_length=255),
+        ),
+        migrations.AddField(
+            model_name='clubmember',
+            name='fide_last_modified',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.CreateModel(
+            name='RatingHistory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.PositiveIntegerField(verbose_name='Рејтинг')),
+                ('recorded_at', models.DateTimeField(verbose_name='Забележено')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_history', to='web_page.clubmember', verbose_name='Члан тима')),
+            ],
+            options={
+                'verbose_name': 'Историја рејтинга',
+                'verbose_name_plural': 'Историја рејтинга',
+                'ordering': ['member', 'recorded_at'],
+                'indexes': [models.Index(fields=['member', 'recorded_at'], name='web_page_ra_member__746f80_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-18 16:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web_page', '0004_rating_history'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-published_at', '-id'], name='article_published_idx'),
+        ),
+    ]
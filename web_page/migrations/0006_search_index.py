@@ -0,0 +1,84 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:20
+
+import re
+import unicodedata
+
+from django.db import migrations
+from django.utils.html import strip_tags
+
+# The index as web_page.search defined it at this migration, copied so later changes there do not alter it.
+# rebuild_search_index recreates the tables with the current definitions.
+TABLE_COLUMNS = {
+    'search_article': ('title', 'body'),
+    'search_puzzle': ('themes', 'openings'),
+}
+
+TRANSLITERATION = str.maketrans({
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'ђ': 'dj', 'е': 'e', 'ж': 'z',
+    'з': 'z', 'и': 'i', 'ј': 'j', 'к': 'k', 'л': 'l', 'љ': 'lj', 'м': 'm', 'н': 'n',
+    'њ': 'nj', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'ћ': 'c', 'у': 'u',
+    'ф': 'f', 'х': 'h', 'ц': 'c', 'ч': 'c', 'џ': 'dz', 'ш': 's',
+    'đ': 'dj',
+})
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text.lower().translate(TRANSLITERATION))
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def split_camel_case(text):
+    return ' '.join(
+        f"{word} {re.sub(r'(?<=[a-z])(?=[A-Z0-9])', ' ', word)}" for word in text.split()
+    )
+
+
+def insert_rows(cursor, table, rows):
+    if rows:
+        columns = TABLE_COLUMNS[table]
+        cursor.executemany(
+            f"INSERT INTO {table} (rowid, {', '.join(columns)}) VALUES (%s{', %s' * len(columns)})",
+            rows,
+        )
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    Article = apps.get_model('web_page', 'Article')
+    Puzzle = apps.get_model('puzzles', 'Puzzle')
+    with schema_editor.connection.cursor() as cursor:
+        for table, columns in TABLE_COLUMNS.items():
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+            cursor.execute(f"CREATE VIRTUAL TABLE {table} USING fts5({', '.join(columns)})")
+        insert_rows(cursor, 'search_article', [
+            (article.pk, normalize(article.title), normalize(strip_tags(article.content)))
+            for article in Article.objects.filter(is_published=True).only('title', 'content')
+        ])
+        batch = []
+        for puzzle in Puzzle.objects.only('themes', 'opening_tags').iterator(chunk_size=2000):
+            batch.append((puzzle.pk, normalize(split_camel_case(puzzle.themes)), normalize(puzzle.opening_tags)))
+            if len(batch) >= 2000:
+                insert_rows(cursor, 'search_puzzle', batch)
+                batch = []
+        insert_rows(cursor, 'search_puzzle', batch)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in TABLE_COLUMNS:
+            cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('puzzles', '0006_puzzle_tags'),
+        ('web_page', '0005_article_published_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-18 17:52
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def backfill_updated_at(apps, schema_editor):
+    # Existing rows would otherwise all look modified at migration time
+    Article = apps.get_model('web_page', 'Article')
+    Article.objects.update(updated_at=Coalesce('published_at', 'created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web_page', '0006_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='Ажурирано'),
+        ),
+        migrations.RunPython(backfill_updated_at, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,86 @@
+# Generated by Django 6.0.1 on 2026-10-18 20:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('web_page', '0007_article_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='clubtournament',
+            name='system',
+            field=models.CharField(choices=[('swiss', 'Швајцарски систем'), ('round_robin', 'Бергер (свако са сваким)')], default='swiss', help_text='Систем паровања; код Бергеровог система 0 кола значи пун круг', max_length=20, verbose_name='Систем'),
+        ),
+        migrations.CreateModel(
+            name='TournamentPlayer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(blank=True, help_text='Попуњава се из члана тима ако је празно', max_length=100, verbose_name='Име и презиме')),
+                ('rating', models.PositiveIntegerField(default=0, help_text='Рејтинг на почетку турнира; попуњава се из члана тима ако је 0', verbose_name='Рејтинг')),
+                ('withdrawn', models.BooleanField(default=False, help_text='Играч се више не упарује', verbose_name='Одустао')),
+                ('score', models.FloatField(default=0, editable=False, verbose_name='Бодови')),
+                ('buchholz', models.FloatField(default=0, editable=False, verbose_name='Бухолц')),
+                ('sonneborn_berger', models.FloatField(default=0, editable=False, verbose_name='Зонеборн-Бергер')),
+                ('colors', models.CharField(blank=True, editable=False, max_length=100, verbose_name='Боје')),
+                ('seed', models.PositiveIntegerField(blank=True, editable=False, null=True, verbose_name='Носилац')),
+                ('member', models.ForeignKey(blank=True, help_text='Празно за играче ван клуба', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tournament_entries', to='web_page.clubmember', verbose_name='Члан тима')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='players', to='web_page.clubtournament', verbose_name='Турнир')),
+            ],
+            options={
+                'verbose_name': 'Играч на турниру',
+                'verbose_name_plural': 'Играчи на турниру',
+                'ordering': ['tournament', '-score', '-buchholz', '-sonneborn_berger', '-rating'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TournamentRound',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField(verbose_name='Коло')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Упарено')),
+                ('tournament', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pairing_rounds', to='web_page.clubtournament', verbose_name='Турнир')),
+            ],
+            options={
+                'verbose_name': 'Коло',
+                'verbose_name_plural': 'Кола',
+                'ordering': ['tournament', 'number'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TournamentGame',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.PositiveIntegerField(verbose_name='Табла')),
+                ('result', models.CharField(blank=True, choices=[('', 'Није одиграна'), ('1-0', '1-0'), ('0-1', '0-1'), ('1/2-1/2', '½-½'), ('bye', 'Слободан')], default='', max_length=10, verbose_name='Резултат')),
+                ('black', models.ForeignKey(blank=True, help_text='Празно за слободног играча', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='games_as_black', to='web_page.tournamentplayer', verbose_name='Црни')),
+                ('white', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='games_as_white', to='web_page.tournamentplayer', verbose_name='Бели')),
+                ('round', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='games', to='web_page.tournamentround', verbose_name='Коло')),
+            ],
+            options={
+                'verbose_name': 'Партија',
+                'verbose_name_plural': 'Партије',
+                'ordering': ['round', 'board'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='tournamentplayer',
+            index=models.Index(fields=['tournament', '-score', '-buchholz', '-sonneborn_berger'], name='tournament_standings_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='tournamentplayer',
+            constraint=models.UniqueConstraint(condition=models.Q(('member__isnull', False)), fields=('tournament', 'member'), name='unique_tournament_member'),
+        ),
+        migrations.AddConstraint(
+            model_name='tournamentround',
+            constraint=models.UniqueConstraint(fields=('tournament', 'number'), name='unique_tournament_round'),
+        ),
+        migrations.AddConstraint(
+            model_name='tournamentgame',
+            constraint=models.UniqueConstraint(fields=('round', 'board'), name='unique_round_board'),
+        ),
+    ]
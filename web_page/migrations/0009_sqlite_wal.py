@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-18 21:00
+
+from django.db import migrations
+
+
+def set_journal_mode(mode):
+    def run(apps, schema_editor):
+        # Stored in the database file, so it is set once here rather than on every connection
+        if schema_editor.connection.vendor == 'sqlite':
+            schema_editor.execute(f'PRAGMA journal_mode={mode}')
+    return run
+
+
+class Migration(migrations.Migration):
+    # SQLite cannot switch into WAL inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('web_page', '0008_tournament_pairing'),
+    ]
+
+    operations = [
+        migrations.RunPython(set_journal_mode('WAL'), set_journal_mode('DELETE')),
+    ]
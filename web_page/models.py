@@ -1,4 +1,5 @@
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.conf import settings
 
 # Create your models here.
@@ -27,6 +28,29 @@ class ClubMember(models.Model):
         blank=True,
         null=True
     )
+
+    previous_rating = models.PositiveIntegerField(
+        'Претходни рејтинг',
+        blank=True,
+        null=True
+    )
+
+    rating_change = models.IntegerField(
+        'Промена рејтинга',
+        blank=True,
+        null=True
+    )
+
+    rating_updated_at = models.DateTimeField(
+        'Рејтинг ажуриран',
+        blank=True,
+        null=True
+    )
+
+    # Validators of the last FIDE API response, so unchanged players are skipped cheaply
+    fide_etag = models.CharField(max_length=255, blank=True, editable=False)
+    fide_last_modified = models.CharField(max_length=64, blank=True, editable=False)
+    fide_content_hash = models.CharField(max_length=32, blank=True, editable=False)
     
     description = models.TextField(
         'Опис',
@@ -82,6 +106,41 @@ class ClubMember(models.Model):
     def has_image(self):
         """Check if team member has an image"""
         return bool(self.image)
+
+
+class RatingHistoryQuerySet(models.QuerySet):
+    def for_member(self, member, since=None):
+        """(recorded_at, rating) points for one member's chart, served by the (member, recorded_at) index"""
+        history = self.filter(member=member)
+        if since:
+            history = history.filter(recorded_at__gte=since)
+        return history.order_by('recorded_at').values_list('recorded_at', 'rating')
+
+
+class RatingHistory(models.Model):
+    member = models.ForeignKey(
+        ClubMember,
+        on_delete=models.CASCADE,
+        related_name='rating_history',
+        verbose_name='Члан тима'
+    )
+
+    rating = models.PositiveIntegerField('Рејтинг')
+
+    recorded_at = models.DateTimeField('Забележено')
+
+    objects = RatingHistoryQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['member', 'recorded_at']
+        indexes = [
+            models.Index(fields=['member', 'recorded_at']),
+        ]
+        verbose_name = 'Историја рејтинга'
+        verbose_name_plural = 'Историја рејтинга'
+
+    def __str__(self):
+        return f"{self.member.full_name}: {self.rating} ({self.recorded_at:%d.%m.%Y})"
     
 class ClubTournament(models.Model):
 
@@ -91,6 +150,10 @@ class ClubTournament(models.Model):
         ONGOING = 2, 'У току'
         COMPLETED = 3, 'Завршен'
 
+    class System(models.TextChoices):
+        SWISS = 'swiss', 'Швајцарски систем'
+        ROUND_ROBIN = 'round_robin', 'Бергер (свако са сваким)'
+
     name = models.CharField(
         'Назив',
         max_length=100,
@@ -114,6 +177,14 @@ class ClubTournament(models.Model):
         default=Status.UPCOMING
     )
 
+    system = models.CharField(
+        'Систем',
+        max_length=20,
+        choices=System.choices,
+        default=System.SWISS,
+        help_text='Систем паровања; код Бергеровог система 0 кола значи пун круг'
+    )
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -128,6 +199,202 @@ class ClubTournament(models.Model):
     def __str__(self):
         return self.name
 
+
+class TournamentPlayer(models.Model):
+    tournament = models.ForeignKey(
+        ClubTournament,
+        on_delete=models.CASCADE,
+        related_name='players',
+        verbose_name='Турнир'
+    )
+
+    member = models.ForeignKey(
+        ClubMember,
+        on_delete=models.SET_NULL,
+        related_name='tournament_entries',
+        blank=True,
+        null=True,
+        verbose_name='Члан тима',
+        help_text='Празно за играче ван клуба'
+    )
+
+    name = models.CharField(
+        'Име и презиме',
+        max_length=100,
+        blank=True,
+        help_text='Попуњава се из члана тима ако је празно'
+    )
+
+    rating = models.PositiveIntegerField(
+        'Рејтинг',
+        default=0,
+        help_text='Рејтинг на почетку турнира; попуњава се из члана тима ако је 0'
+    )
+
+    withdrawn = models.BooleanField(
+        'Одустао',
+        default=False,
+        help_text='Играч се више не упарује'
+    )
+
+    # Standings, kept up to date by tournaments.apply_result as results come in
+    score = models.FloatField('Бодови', default=0, editable=False)
+    buchholz = models.FloatField('Бухолц', default=0, editable=False)
+    sonneborn_berger = models.FloatField('Зонеборн-Бергер', default=0, editable=False)
+
+    # One character per round: W/B for the colour played, + for a bye, - for not paired
+    colors = models.CharField('Боје', max_length=100, blank=True, editable=False)
+
+    seed = models.PositiveIntegerField('Носилац', blank=True, null=True, editable=False)
+
+    class Meta:
+        ordering = ['tournament', '-score', '-buchholz', '-sonneborn_berger', '-rating']
+        indexes = [
+            models.Index(
+                fields=['tournament', '-score', '-buchholz', '-sonneborn_berger'],
+                name='tournament_standings_idx',
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['tournament', 'member'],
+                condition=models.Q(member__isnull=False),
+                name='unique_tournament_member',
+            ),
+        ]
+        verbose_name = 'Играч на турниру'
+        verbose_name_plural = 'Играчи на турниру'
+
+    def save(self, *args, **kwargs):
+        if self.member_id and (not self.name or not self.rating):
+            self.name = self.name or self.member.full_name
+            self.rating = self.rating or self.member.rating
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.name
+
+
+class TournamentRound(models.Model):
+    tournament = models.ForeignKey(
+        ClubTournament,
+        on_delete=models.CASCADE,
+        # ClubTournament.rounds is the planned number of rounds
+        related_name='pairing_rounds',
+        verbose_name='Турнир'
+    )
+
+    number = models.PositiveIntegerField('Коло')
+
+    created_at = models.DateTimeField('Упарено', auto_now_add=True)
+
+    class Meta:
+        ordering = ['tournament', 'number']
+        constraints = [
+            models.UniqueConstraint(fields=['tournament', 'number'], name='unique_tournament_round'),
+        ]
+        verbose_name = 'Коло'
+        verbose_name_plural = 'Кола'
+
+    def __str__(self):
+        return f"{self.tournament}, {self.number}. коло"
+
+
+class TournamentGame(models.Model):
+
+    class Result(models.TextChoices):
+        PENDING = '', 'Није одиграна'
+        WHITE_WINS = '1-0', '1-0'
+        BLACK_WINS = '0-1', '0-1'
+        DRAW = '1/2-1/2', '½-½'
+        BYE = 'bye', 'Слободан'
+
+    # (white, black) points per result
+    POINTS = {
+        Result.WHITE_WINS: (1.0, 0.0),
+        Result.BLACK_WINS: (0.0, 1.0),
+        Result.DRAW: (0.5, 0.5),
+        Result.BYE: (1.0, None),
+    }
+
+    round = models.ForeignKey(
+        TournamentRound,
+        on_delete=models.CASCADE,
+        related_name='games',
+        verbose_name='Коло'
+    )
+
+    board = models.PositiveIntegerField('Табла')
+
+    white = models.ForeignKey(
+        TournamentPlayer,
+        on_delete=models.CASCADE,
+        related_name='games_as_white',
+        verbose_name='Бели'
+    )
+
+    black = models.ForeignKey(
+        TournamentPlayer,
+        on_delete=models.CASCADE,
+        related_name='games_as_black',
+        blank=True,
+        null=True,
+        verbose_name='Црни',
+        help_text='Празно за слободног играча'
+    )
+
+    result = models.CharField(
+        'Резултат',
+        max_length=10,
+        choices=Result.choices,
+        default=Result.PENDING,
+        blank=True
+    )
+
+    class Meta:
+        ordering = ['round', 'board']
+        constraints = [
+            models.UniqueConstraint(fields=['round', 'board'], name='unique_round_board'),
+        ]
+        verbose_name = 'Партија'
+        verbose_name_plural = 'Партије'
+
+    def clean(self):
+        if self.black_id is not None and self.result == self.Result.BYE:
+            raise ValidationError({'result': 'Партија са црним не може бити слободна.'})
+        if self.black_id is None and self.result not in (self.Result.PENDING, self.Result.BYE):
+            raise ValidationError({'result': 'Слободан играч може имати само резултат „Слободан“.'})
+
+    def save(self, *args, **kwargs):
+        from .tournaments import apply_result, game_colors, set_colors
+
+        # Standings move with the game, so both change in one transaction
+        with transaction.atomic():
+            old = None
+            if self.pk:
+                old = TournamentGame.objects.filter(pk=self.pk).values('white_id', 'black_id', 'result').first()
+            super().save(*args, **kwargs)
+            if old is None:
+                old = {'white_id': self.white_id, 'black_id': self.black_id, 'result': self.Result.PENDING}
+
+            if (old['white_id'], old['black_id']) != (self.white_id, self.black_id):
+                # Players changed: take the old result off the old pair, then count it for the new one
+                if old['result'] != self.Result.PENDING:
+                    previous = TournamentGame(
+                        pk=self.pk, white_id=old['white_id'], black_id=old['black_id'], result=self.Result.PENDING,
+                    )
+                    apply_result(previous, old['result'])
+                if self.result != self.Result.PENDING:
+                    apply_result(self, self.Result.PENDING)
+                set_colors(self.round_id, {old['white_id']: '-', old['black_id']: '-'} | game_colors(self))
+            elif old['result'] != self.result:
+                apply_result(self, old['result'])
+
+    def __str__(self):
+        if self.black_id is None:
+            return f"{self.white} (слободан)"
+        return f"{self.white} – {self.black} {self.result}".rstrip()
+
 class Article(models.Model):
     title = models.CharField(
         max_length=200,
@@ -161,8 +428,23 @@ class Article(models.Model):
         verbose_name="Објављено"
     )
 
+    # Also touched when one of the article's images changes (see signals.py)
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        db_index=True,
+        verbose_name="Ажурирано"
+    )
+
     class Meta:
         ordering = ['-published_at', '-created_at']
+        indexes = [
+            # Serves filter(is_published=True).order_by('-published_at', '-id') and its keyset cursor.
+            # Partial rather than leading on is_published: Django compiles the filter to a bare
+            # WHERE "is_published", which SQLite matches against an index condition but not an
+            # equality column.
+            models.Index(fields=['-published_at', '-id'], name='article_published_idx',
+                         condition=models.Q(is_published=True)),
+        ]
         verbose_name = "Чланак"
         verbose_name_plural = "Чланци"
 
@@ -244,4 +526,74 @@ class LeagueStatisticsField(models.Model):
         verbose_name_plural = 'Статистички подаци о лиги'
     
     def __str__(self):
-        return f"{self.title}: {self.value}"
\ No newline at end of file
+        return f"{self.title}: {self.value}"
+
+class Job(models.Model):
+
+    class Status(models.IntegerChoices):
+        QUEUED = 0, 'На чекању'
+        RUNNING = 1, 'У току'
+        DONE = 2, 'Завршен'
+        FAILED = 3, 'Неуспешан'
+
+    class Command(models.TextChoices):
+        UPDATE_FIDE_RATINGS = 'update_fide_ratings', 'Ажурирање ФИДЕ рејтинга'
+        IMPORT_PUZZLES = 'import_puzzles', 'Увоз проблема'
+        PRERENDER_PUZZLES = 'prerender_puzzles', 'Провера проблема'
+
+    command = models.CharField(
+        'Команда',
+        max_length=100,
+        choices=Command.choices
+    )
+
+    args = models.JSONField(
+        'Аргументи',
+        default=list,
+        blank=True,
+        help_text='Позициони аргументи команде, нпр. ["lichess_db_puzzle.csv.zst"]'
+    )
+
+    options = models.JSONField(
+        'Опције',
+        default=dict,
+        blank=True,
+        help_text='Опције команде, нпр. {"workers": 4}'
+    )
+
+    status = models.IntegerField(
+        'Статус',
+        choices=Status.choices,
+        default=Status.QUEUED
+    )
+
+    progress = models.CharField(
+        'Напредак',
+        max_length=255,
+        blank=True
+    )
+
+    output = models.TextField(
+        'Излаз',
+        blank=True
+    )
+
+    created_at = models.DateTimeField('Креирано', auto_now_add=True)
+    started_at = models.DateTimeField('Почетак', blank=True, null=True)
+    finished_at = models.DateTimeField('Крај', blank=True, null=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+        verbose_name = 'Посао'
+        verbose_name_plural = 'Послови'
+
+    def __str__(self):
+        return f"{self.get_command_display()} ({self.get_status_display()})"
+
+    @classmethod
+    def enqueue(cls, command, *args, **options):
+        """Queue a management command for the run_jobs worker"""
+        return cls.objects.create(command=command, args=list(args), options=options)
@@ -0,0 +1,90 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are fetched with a WHERE on the last seen (field, pk) pair instead of
+OFFSET, so every page costs the same index range scan no matter how deep
+the reader goes.
+"""
+import base64
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+@dataclass
+class KeysetPage:
+    items: list
+    # Cursor for the next page of older items, None on the last page
+    next_cursor: str | None
+    # Cursor for the previous page of newer items, None on the first page
+    previous_cursor: str | None
+
+
+class KeysetPaginator:
+    """Paginate a queryset newest-first by (field, pk)"""
+
+    def __init__(self, queryset, field, per_page):
+        self.queryset = queryset
+        self.field = field
+        self.per_page = per_page
+        self.model_field = queryset.model._meta.get_field(field)
+
+    def encode(self, obj):
+        value = self.model_field.value_to_string(obj)
+        return base64.urlsafe_b64encode(f"{value}|{obj.pk}".encode()).decode().rstrip('=')
+
+    def decode(self, cursor):
+        """Return (value, pk) for a cursor, or None if it is malformed"""
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            value, pk = base64.urlsafe_b64decode(padded).decode().rsplit('|', 1)
+            value = self.model_field.to_python(value)
+            return (value, int(pk)) if value is not None else None
+        except (ValueError, TypeError, UnicodeDecodeError, ValidationError):
+            return None
+
+    def page(self, after=None, before=None):
+        """
+        Fetch one page.
+
+        after is a next_cursor (load older items), before a previous_cursor
+        (load newer items); with neither, the first page is returned.
+        """
+        field = self.field
+        position = self.decode(before) if before else None
+
+        if position:
+            value, pk = position
+            rows = list(
+                self.queryset
+                .filter(**{f'{field}__gte': value})
+                .filter(Q(**{f'{field}__gt': value}) | Q(pk__gt=pk))
+                .order_by(field, 'pk')[:self.per_page + 1]
+            )
+            has_newer = len(rows) > self.per_page
+            items = rows[:self.per_page][::-1]
+            return KeysetPage(
+                items=items,
+                next_cursor=self.encode(items[-1]) if items else None,
+                previous_cursor=self.encode(items[0]) if has_newer and items else None,
+            )
+
+        position = self.decode(after) if after else None
+        queryset = self.queryset.order_by(f'-{field}', '-pk')
+        if position:
+            value, pk = position
+            # The plain range bound lets the database seek the index; the OR only breaks ties
+            queryset = (
+                queryset
+                .filter(**{f'{field}__lte': value})
+                .filter(Q(**{f'{field}__lt': value}) | Q(pk__lt=pk))
+            )
+
+        rows = list(queryset[:self.per_page + 1])
+        items = rows[:self.per_page]
+        return KeysetPage(
+            items=items,
+            next_cursor=self.encode(items[-1]) if len(rows) > self.per_page else None,
+            previous_cursor=self.encode(items[0]) if position and items else None,
+        )
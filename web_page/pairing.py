@@ -0,0 +1,290 @@
+"""
+Pairing engines for club tournaments.
+
+Both work on plain Entrant tuples rather than models, so a round for
+hundreds of players is computed in memory from a couple of queries' worth
+of data (see tournaments.pair_next_round).
+
+swiss() follows the Dutch system in simplified form: players are ranked
+by score and rating, each score bracket is split into a top half S1 and a
+bottom half S2 paired in order, and S2 transpositions (then S1/S2
+exchanges) are tried when players have met before or both have the same
+absolute colour preference. Players a bracket cannot pair float down to
+the next one; if the lowest bracket is left with players it cannot pair,
+it is re-paired together with the bracket above. Only if that still fails
+are the colour rule and then the no-rematch rule relaxed.
+"""
+from itertools import groupby
+from typing import NamedTuple
+
+WHITE = 'W'
+BLACK = 'B'
+BYE = '+'
+
+# Colour preference strengths, after FIDE C.04.1
+ABSOLUTE = 3
+STRONG = 2
+MILD = 1
+
+# Relaxation levels for pair_bracket
+STRICT = 0
+IGNORE_COLORS = 1
+ALLOW_REMATCHES = 2
+
+# Candidate checks allowed per bracket before falling back to greedy pairing
+SEARCH_BUDGET = 20000
+
+
+class Entrant(NamedTuple):
+    id: int
+    rating: int
+    score: float = 0.0
+    colors: str = ''                 # one character per round: W, B, + for a bye, - for not paired
+    opponents: frozenset = frozenset()
+
+    @property
+    def had_bye(self):
+        return BYE in self.colors
+
+
+def round_robin(ids, round_number):
+    """
+    Pairings (white, black) for round_number (from 1) of a round robin, by Berger tables.
+
+    ids are in seeding order; with an odd count one player sits out each
+    round and is returned as the bye. Rounds past the first cycle repeat it
+    with colours reversed, for double round robins. Returns (pairs, bye).
+    """
+    ids = list(ids)
+    if len(ids) % 2:
+        ids.append(None)
+    last = len(ids) - 1
+    cycle, r = divmod(round_number - 1, last)
+
+    # The fixed last seed alternates colours; the rest rotate around it
+    table = [(r, last) if r % 2 == 0 else (last, r)]
+    for i in range(1, len(ids) // 2):
+        a, b = (r + i) % last, (r - i) % last
+        table.append((a, b) if i % 2 == 0 else (b, a))
+    if cycle % 2:
+        table = [(b, a) for a, b in table]
+
+    pairs = []
+    bye = None
+    for a, b in table:
+        white, black = ids[a], ids[b]
+        if white is None or black is None:
+            bye = black if white is None else white
+        else:
+            pairs.append((white, black))
+    return pairs, bye
+
+
+def color_preference(entrant):
+    """(colour, strength) the entrant should get next, or (None, 0) before their first game"""
+    played = entrant.colors.replace(BYE, '').replace('-', '')
+    if not played:
+        return None, 0
+    difference = played.count(WHITE) - played.count(BLACK)
+    if difference > 1 or played[-2:] == WHITE * 2:
+        return BLACK, ABSOLUTE
+    if difference < -1 or played[-2:] == BLACK * 2:
+        return WHITE, ABSOLUTE
+    if difference:
+        return (BLACK if difference > 0 else WHITE), STRONG
+    return (BLACK if played[-1] == WHITE else WHITE), MILD
+
+
+def can_meet(a, b, level=STRICT):
+    if level < ALLOW_REMATCHES and b.id in a.opponents:
+        return False
+    if level < IGNORE_COLORS:
+        color_a, strength_a = color_preference(a)
+        color_b, strength_b = color_preference(b)
+        if strength_a == strength_b == ABSOLUTE and color_a == color_b:
+            return False
+    return True
+
+
+def allocate_colors(higher, lower, board):
+    """(white, black) for two paired entrants; higher is the better ranked one"""
+    color_h, strength_h = color_preference(higher)
+    color_l, strength_l = color_preference(lower)
+    if color_h is None and color_l is None:
+        # First games: the better ranked player is White on odd boards
+        white = higher if board % 2 else lower
+    elif color_h != color_l:
+        # Both preferences can be met, or only one player has one
+        if color_h is not None:
+            white = higher if color_h == WHITE else lower
+        else:
+            white = lower if color_l == WHITE else higher
+    else:
+        # Same colour wanted: the stronger preference wins, then the better ranked player
+        winner, loser = (lower, higher) if strength_l > strength_h else (higher, lower)
+        white = winner if color_h == WHITE else loser
+    return (white, lower) if white is higher else (white, higher)
+
+
+def pair_bracket(players, level=STRICT):
+    """
+    Pair one score bracket of ranked players; returns (pairs, floaters).
+
+    The best ranked unpaired player meets the first possible S2 player,
+    then the first possible S1 player, with backtracking. If the bracket
+    cannot be paired completely, its lowest ranked players float down.
+    One step budget covers all attempts, bounding the time per bracket;
+    when it runs out the bracket is paired greedily in the same order.
+    """
+    budget = [SEARCH_BUDGET]
+    for floating in range(len(players) % 2, len(players) + 1, 2):
+        kept = len(players) - floating
+        if not may_match(players[:kept], level):
+            continue
+        pairs = match(players[:kept], level, budget)
+        if pairs is not None:
+            return pairs, players[kept:]
+        if budget[0] <= 0:
+            break
+    return greedy_match(players, level)
+
+
+def may_match(group, level):
+    """Quick necessary conditions for match(), so hopeless groups are not searched"""
+    if level < IGNORE_COLORS:
+        # Players who must have the same colour cannot meet each other
+        absolute = [color for color, strength in map(color_preference, group) if strength == ABSOLUTE]
+        if max(absolute.count(WHITE), absolute.count(BLACK)) > len(group) // 2:
+            return False
+    return all(any(can_meet(a, b, level) for b in group if b is not a) for a in group)
+
+
+def greedy_match(players, level):
+    """Pair in Dutch order without backtracking; whoever finds no partner floats"""
+    pairs = []
+    floaters = []
+    unpaired = list(players)
+    while unpaired:
+        player = unpaired.pop(0)
+        half = len(unpaired) // 2
+        partner = next((other for other in unpaired[half:] + unpaired[:half] if can_meet(player, other, level)), None)
+        if partner is None:
+            floaters.append(player)
+        else:
+            unpaired.remove(partner)
+            pairs.append((player, partner))
+    return pairs, floaters
+
+
+def match(group, level, budget):
+    """Dutch-order matching of all of group, or None if there is none (or budget[0] steps run out)"""
+    half = len(group) // 2
+    paired = [False] * len(group)
+
+    # Unpaired players who must get WHITE or BLACK; each needs a partner who
+    # does not, which prunes dead ends long before the bottom of the search
+    absolute = [
+        color if strength == ABSOLUTE and level < IGNORE_COLORS else None
+        for color, strength in map(color_preference, group)
+    ]
+    needing = {WHITE: absolute.count(WHITE), BLACK: absolute.count(BLACK), None: 0}
+    unpaired = [len(group)]
+
+    def take(i, j, step):
+        needing[absolute[i]] -= step
+        needing[absolute[j]] -= step
+        unpaired[0] -= 2 * step
+
+    def leaves_partners(i, j):
+        take(i, j, 1)
+        ok = 2 * max(needing[WHITE], needing[BLACK]) <= unpaired[0]
+        take(i, j, -1)
+        return ok
+
+    def candidates(i):
+        # S1 players look in S2 first (transpositions), then in S1 (exchanges)
+        if i < half:
+            return [j for j in range(half, len(group)) if not paired[j]] + \
+                   [j for j in range(i + 1, half) if not paired[j]]
+        return [j for j in range(i + 1, len(group)) if not paired[j]]
+
+    # Iterative depth-first search; each frame is [player, candidates, next candidate, partner]
+    stack = []
+    while True:
+        i = next((k for k in range(len(group)) if not paired[k]), None)
+        if i is None:
+            return [(group[i], group[j]) for i, _, _, j in stack]
+        paired[i] = True
+        stack.append([i, candidates(i), 0, None])
+        while stack:
+            frame = stack[-1]
+            i, options, start, partner = frame
+            if partner is not None:
+                # Backtracked into this frame: try the next partner
+                paired[partner] = False
+                take(i, partner, -1)
+            for k in range(start, len(options)):
+                budget[0] -= 1
+                if budget[0] < 0:
+                    return None
+                j = options[k]
+                if can_meet(group[i], group[j], level) and leaves_partners(i, j):
+                    frame[2:] = [k + 1, j]
+                    paired[j] = True
+                    take(i, j, 1)
+                    break
+            else:
+                paired[i] = False
+                stack.pop()
+                continue
+            break
+        else:
+            return None
+
+
+def rank(entrants):
+    return sorted(entrants, key=lambda e: (-e.score, -e.rating, e.id))
+
+
+def swiss(entrants):
+    """
+    Pairings (white_id, black_id) for the next Swiss round, top boards first, and the bye.
+
+    With an odd number of entrants the lowest ranked one without a bye yet
+    gets it.
+    """
+    ranked = rank(entrants)
+    bye = None
+    if len(ranked) % 2:
+        bye = next((e for e in reversed(ranked) if not e.had_bye), ranked[-1])
+        ranked.remove(bye)
+
+    bracket_pairs = []
+    floaters = []
+    for _, bracket in groupby(ranked, key=lambda e: e.score):
+        pairs, floaters = pair_bracket(rank(floaters + list(bracket)))
+        bracket_pairs.append(pairs)
+    # Players left at the bottom are re-paired together with the brackets above them
+    while floaters and len(bracket_pairs) > 1:
+        merged = floaters + [entrant for _ in range(2) for pair in bracket_pairs.pop() for entrant in pair]
+        pairs, floaters = pair_bracket(rank(merged))
+        bracket_pairs.append(pairs)
+    pairs = [pair for bracket in bracket_pairs for pair in bracket]
+    for level in (IGNORE_COLORS, ALLOW_REMATCHES):
+        if not floaters:
+            break
+        leftover_pairs, floaters = pair_bracket(floaters, level)
+        pairs += leftover_pairs
+
+    position = {entrant.id: i for i, entrant in enumerate(ranked)}
+    pairs.sort(key=lambda pair: (
+        -max(pair[0].score, pair[1].score),
+        -(pair[0].score + pair[1].score),
+        min(position[pair[0].id], position[pair[1].id]),
+    ))
+    result = []
+    for board, (a, b) in enumerate(pairs, start=1):
+        higher, lower = rank((a, b))
+        white, black = allocate_colors(higher, lower, board)
+        result.append((white.id, black.id))
+    return result, bye.id if bye else None
@@ -0,0 +1,189 @@
+"""
+Full-text search over articles and puzzles using SQLite FTS5.
+
+Documents and queries are both folded to lowercase ASCII Latin (Serbian
+Cyrillic is transliterated, diacritics dropped), so "шах", "šah" and "sah"
+find the same articles. The FTS tables hold only this folded text, keyed by
+the object's pk; they are kept in sync by signals and by import_puzzles,
+and rebuild_search_index recreates them from scratch.
+
+On other databases search falls back to icontains filters.
+"""
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.html import strip_tags
+
+ARTICLE_TABLE = 'search_article'
+PUZZLE_TABLE = 'search_puzzle'
+
+# Indexed columns of each FTS table; the rowid is the object's pk
+TABLE_COLUMNS = {
+    ARTICLE_TABLE: ('title', 'body'),
+    PUZZLE_TABLE: ('themes', 'openings'),
+}
+
+# bm25 column weights: a hit in an article title counts ten times a hit in the body
+ARTICLE_WEIGHTS = (10.0, 1.0)
+PUZZLE_WEIGHTS = (1.0, 1.0)
+
+CYRILLIC_TO_LATIN = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'ђ': 'dj', 'е': 'e', 'ж': 'z',
+    'з': 'z', 'и': 'i', 'ј': 'j', 'к': 'k', 'л': 'l', 'љ': 'lj', 'м': 'm', 'н': 'n',
+    'њ': 'nj', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'ћ': 'c', 'у': 'u',
+    'ф': 'f', 'х': 'h', 'ц': 'c', 'ч': 'c', 'џ': 'dz', 'ш': 's',
+    # Latin letters without a Unicode decomposition
+    'đ': 'dj',
+}
+TRANSLITERATION = str.maketrans(CYRILLIC_TO_LATIN)
+
+
+def available():
+    return connection.vendor == 'sqlite'
+
+
+def normalize(text):
+    """Fold text to lowercase ASCII Latin words, the form both documents and queries are indexed in"""
+    text = unicodedata.normalize('NFKD', text.lower().translate(TRANSLITERATION))
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def split_camel_case(text):
+    """'mateIn2 backRankMate' -> 'mateIn2 mate In 2 backRankMate back Rank Mate'"""
+    return ' '.join(
+        f"{word} {re.sub(r'(?<=[a-z])(?=[A-Z0-9])', ' ', word)}" for word in text.split()
+    )
+
+
+def match_query(query):
+    """FTS5 MATCH expression requiring every word of the query as a prefix, or '' if there are no words"""
+    words = re.findall(r'[^\W_]+', normalize(query))
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def article_document(article):
+    return normalize(article.title), normalize(strip_tags(article.content))
+
+
+def puzzle_document(puzzle):
+    return normalize(split_camel_case(puzzle.themes)), normalize(puzzle.opening_tags)
+
+
+def create_tables(cursor):
+    for table, columns in TABLE_COLUMNS.items():
+        cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({', '.join(columns)})")
+
+
+def drop_tables(cursor):
+    for table in TABLE_COLUMNS:
+        cursor.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def insert_rows(cursor, table, rows):
+    """Insert documents given as (pk, *columns)"""
+    columns = TABLE_COLUMNS[table]
+    if rows:
+        cursor.executemany(
+            f"INSERT INTO {table} (rowid, {', '.join(columns)}) VALUES (%s{', %s' * len(columns)})",
+            rows,
+        )
+
+
+def write_rows(cursor, table, pks, rows):
+    """Replace the indexed documents of pks with rows of (pk, *columns)"""
+    pks = list(pks)
+    for start in range(0, len(pks), 500):
+        batch = pks[start:start + 500]
+        cursor.execute(f"DELETE FROM {table} WHERE rowid IN ({', '.join(['%s'] * len(batch))})", batch)
+    insert_rows(cursor, table, rows)
+
+
+def index_articles(articles):
+    """Index published articles and drop unpublished ones from the index"""
+    if not available():
+        return
+    articles = list(articles)
+    rows = [(article.pk, *article_document(article)) for article in articles if article.is_published]
+    with connection.cursor() as cursor:
+        write_rows(cursor, ARTICLE_TABLE, [article.pk for article in articles], rows)
+
+
+def index_puzzles(puzzles):
+    """Index puzzles; only pk, themes and opening_tags need to be loaded"""
+    if not available():
+        return
+    puzzles = [puzzle for puzzle in puzzles if puzzle.pk is not None]
+    rows = [(puzzle.pk, *puzzle_document(puzzle)) for puzzle in puzzles]
+    with connection.cursor() as cursor:
+        write_rows(cursor, PUZZLE_TABLE, [puzzle.pk for puzzle in puzzles], rows)
+
+
+def unindex(table, pk):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE rowid = %s", [pk])
+
+
+def rebuild(article_model, puzzle_model, batch_size=2000):
+    """Recreate both indexes from the database; takes the models so migrations can pass historical ones"""
+    with connection.cursor() as cursor:
+        drop_tables(cursor)
+        create_tables(cursor)
+        insert_rows(cursor, ARTICLE_TABLE, [
+            (article.pk, *article_document(article))
+            for article in article_model.objects.filter(is_published=True).only('title', 'content')
+        ])
+        batch = []
+        for puzzle in puzzle_model.objects.only('themes', 'opening_tags').iterator(chunk_size=batch_size):
+            batch.append((puzzle.pk, *puzzle_document(puzzle)))
+            if len(batch) >= batch_size:
+                insert_rows(cursor, PUZZLE_TABLE, batch)
+                batch = []
+        insert_rows(cursor, PUZZLE_TABLE, batch)
+
+
+def ranked_ids(table, weights, query, limit):
+    expression = match_query(query)
+    if not expression:
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {table} WHERE {table} MATCH %s "
+            f"ORDER BY bm25({table}, {', '.join(map(str, weights))}) LIMIT %s",
+            [expression, limit],
+        )
+        return [pk for pk, in cursor.fetchall()]
+
+
+def in_order(queryset, pks):
+    by_pk = queryset.in_bulk(pks)
+    return [by_pk[pk] for pk in pks if pk in by_pk]
+
+
+def search_articles(query, limit=20):
+    """Published articles matching query, best match first"""
+    from .models import Article
+
+    articles = Article.objects.filter(is_published=True)
+    if not available():
+        words = query.split()
+        for word in words:
+            articles = articles.filter(Q(title__icontains=word) | Q(content__icontains=word))
+        return list(articles.order_by('-published_at', '-id')[:limit]) if words else []
+    return in_order(articles, ranked_ids(ARTICLE_TABLE, ARTICLE_WEIGHTS, query, limit))
+
+
+def search_puzzles(query, limit=20):
+    """Rendered puzzles whose themes or openings match query, best match first"""
+    from puzzles.models import Puzzle
+
+    puzzles = Puzzle.objects.rendered()
+    if not available():
+        words = query.split()
+        for word in words:
+            puzzles = puzzles.filter(Q(themes__icontains=word) | Q(opening_tags__icontains=word))
+        return list(puzzles[:limit]) if words else []
+    return in_order(puzzles, ranked_ids(PUZZLE_TABLE, PUZZLE_WEIGHTS, query, limit))
@@ -0,0 +1,99 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .fragments import invalidate_for_model
+from .images import delete_derivatives, generate_derivatives
+from .search import ARTICLE_TABLE, index_articles, unindex
+from .models import (
+    Article, ArticleImage, ClubMember, ClubTournament, LeagueStatisticsField, TournamentGame, TournamentRound,
+)
+from .tournaments import recompute, remove_game
+
+# Image field per model that gets resized derivatives at upload time
+IMAGE_FIELDS = {
+    ArticleImage: 'image',
+    Article: 'featured_image',
+    ClubMember: 'image',
+}
+
+
+@receiver([post_save, post_delete], sender=ClubMember)
+@receiver([post_save, post_delete], sender=Article)
+@receiver([post_save, post_delete], sender=ClubTournament)
+@receiver([post_save, post_delete], sender=LeagueStatisticsField)
+def invalidate_home_sections(sender, **kwargs):
+    invalidate_for_model(sender.__name__)
+
+
+@receiver(pre_save, sender=ArticleImage)
+@receiver(pre_save, sender=Article)
+@receiver(pre_save, sender=ClubMember)
+def remember_replaced_image(sender, instance, update_fields=None, **kwargs):
+    # The old file's derivatives are removed once the new image is saved
+    field = IMAGE_FIELDS[sender]
+    if instance.pk is None or (update_fields is not None and field not in update_fields):
+        return
+    old_name = sender.objects.filter(pk=instance.pk).values_list(field, flat=True).first()
+    if old_name and old_name != getattr(instance, field).name:
+        instance._replaced_image = old_name
+
+
+@receiver(post_save, sender=ArticleImage)
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=ClubMember)
+def create_image_derivatives(sender, instance, **kwargs):
+    # Before generating, as a new file with the same stem maps to the same derivative names
+    replaced = instance.__dict__.pop('_replaced_image', None)
+    if replaced:
+        delete_derivatives(replaced)
+    try:
+        generate_derivatives(getattr(instance, IMAGE_FIELDS[sender]))
+    except (OSError, ValueError):
+        # Unreadable upload; templates keep serving the original
+        pass
+
+
+@receiver(post_delete, sender=ArticleImage)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=ClubMember)
+def remove_image_derivatives(sender, instance, **kwargs):
+    field_file = getattr(instance, IMAGE_FIELDS[sender])
+    if field_file:
+        delete_derivatives(field_file.name)
+
+
+@receiver(post_save, sender=Article)
+def index_article(sender, instance, **kwargs):
+    index_articles([instance])
+
+
+@receiver(post_delete, sender=Article)
+def unindex_article(sender, instance, **kwargs):
+    unindex(ARTICLE_TABLE, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=ArticleImage)
+def touch_article(sender, instance, **kwargs):
+    # Image changes alter the article page and the gallery, so move the article's validators too
+    Article.objects.filter(pk=instance.article_id).update(updated_at=timezone.now())
+
+
+def deleting_tournament(origin):
+    # Standings of a tournament that is going away need no upkeep
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is ClubTournament
+
+
+@receiver(post_delete, sender=TournamentGame)
+def remove_game_result(sender, instance, origin=None, **kwargs):
+    if not deleting_tournament(origin):
+        remove_game(instance)
+
+
+@receiver(post_delete, sender=TournamentRound)
+def recompute_after_round(sender, instance, origin=None, **kwargs):
+    # The round's games are already off the standings; this drops its column from the colours
+    if not deleting_tournament(origin):
+        recompute(instance.tournament)
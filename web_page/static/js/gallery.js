@@ -0,0 +1,89 @@
+// static/js/gallery.js
+// Infinite scroll for the gallery: appends article groups from the JSON endpoint
+document.addEventListener('DOMContentLoaded', function() {
+    const groups = document.getElementById('galleryGroups');
+    const more = document.getElementById('galleryMore');
+    if (!groups || !more) return;
+
+    let cursor = more.dataset.cursor;
+    let loading = false;
+
+    function buildImage(image) {
+        const item = document.createElement('div');
+        item.className = 'gallery-item';
+
+        const link = document.createElement('a');
+        link.href = image.full;
+        link.dataset.lightbox = 'gallery';
+        link.dataset.title = image.caption;
+
+        const picture = document.createElement('picture');
+        image.sources.forEach(source => {
+            const el = document.createElement('source');
+            el.type = source.type;
+            el.srcset = source.srcset;
+            el.sizes = source.sizes;
+            picture.appendChild(el);
+        });
+
+        const img = document.createElement('img');
+        img.src = image.src;
+        img.alt = image.caption;
+        img.loading = 'lazy';
+        img.decoding = 'async';
+        picture.appendChild(img);
+
+        link.appendChild(picture);
+        item.appendChild(link);
+        return item;
+    }
+
+    function buildGroup(article) {
+        const group = document.createElement('div');
+        group.className = 'gallery-group';
+
+        const title = document.createElement('h3');
+        title.className = 'gallery-group-title';
+        const link = document.createElement('a');
+        link.href = article.url;
+        link.textContent = article.title;
+        title.appendChild(link);
+        group.appendChild(title);
+
+        const grid = document.createElement('div');
+        grid.className = 'gallery-grid';
+        article.images.forEach(image => grid.appendChild(buildImage(image)));
+        group.appendChild(grid);
+        return group;
+    }
+
+    function loadMore() {
+        if (loading || !cursor) return;
+        loading = true;
+
+        fetch(groups.dataset.api + '?posle=' + encodeURIComponent(cursor))
+            .then(response => response.json())
+            .then(data => {
+                data.articles.forEach(article => groups.appendChild(buildGroup(article)));
+                cursor = data.next;
+                if (cursor) {
+                    more.href = '?posle=' + cursor;
+                } else {
+                    observer.disconnect();
+                    more.parentNode.remove();
+                }
+            })
+            .finally(() => { loading = false; });
+    }
+
+    // The link still works without JavaScript; with it, loading starts before the reader reaches the end
+    more.addEventListener('click', function(e) {
+        e.preventDefault();
+        loadMore();
+    });
+
+    const observer = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) loadMore();
+    }, { rootMargin: '600px' });
+    observer.observe(more);
+});
@@ -0,0 +1,20 @@
+// Generated by `python manage.py build_piece_set` from python-chess's piece set; do not edit.
+const PIECE_IMAGES = {
+    "wP": "data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22 xmlns:xlink=%22http://www.w3.org/1999/xlink%22 viewBox=%220 0 45 45%22%3E%3Cg id=%22white-pawn%22 class=%22white pawn%22%3E%3Cpath d=%22M22.5 9c-2.21 0-4 1.79-4 4 0 .89.29 1.71.78 2.38C17.33 16.5 16 18.59 16 21c0 2.03.94 3.84 2.41 5.03-3 1.06-7.41 5.55-7.41 13.47h23c0-7.92-4.41-12.41-7.41-13.47 1.47-1.19 2.41-3 2.41-5.03 0-2.41-1.33-4.5-3.28-5.62.49-.67.78-1.49.78-2.38 0-2.21-1.79-4-4-4z%22 fill=%22%23fff%22 stroke=%22%23000%22 stroke-width=%221.5%22 stroke-linecap=%22round%22 /%3E%3C/g%3E%3C/svg%3E",
+    "wN": "data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22 xmlns:xlink=%22http://www.w3.org/1999/xlink%22 viewBox=%220 0 45 45%22%3E%3Cg id=%22white-knight%22 class=%22white knight%22 fill=%22none%22 fill-rule=%22evenodd%22 stroke=%22%23000%22 stroke-width=%221.5%22 stroke-linecap=%22round%22 stroke-linejoin=%22round%22%3E%3Cpath d=%22M 22%2C10 C 32.5%2C11 38.5%2C18 38%2C39 L 15%2C39 C 15%2C30 25%2C32.5 23%2C18%22 style=%22fill:%23ffffff%3B stroke:%23000000%3B%22 /%3E%3Cpath d=%22M 24%2C18 C 24.38%2C20.91 18.45%2C25.37 16%2C27 C 13%2C29 13.18%2C31.34 11%2C31 C 9.958%2C30.06 12.41%2C27.96 11%2C28 C 10%2C28 11.19%2C29.23 10%2C30 C 9%2C30 5.997%2C31 6%2C26 C 6%2C24 12%2C14 12%2C14 C 12%2C14 13.89%2C12.1 14%2C10.5 C 13.27%2C9.506 13.5%2C8.5 13.5%2C7.5 C 14.5%2C6.5 16.5%2C10 16.5%2C10 L 18.5%2C10 C 18.5%2C10 19.28%2C8.008 21%2C7 C 22%2C7 22%2C10 22%2C10%22 style=%22fill:%23ffffff%3B stroke:%23000000%3B%22 /%3E%3Cpath d=%22M 9.5 25.5 A 0.5 0.5 0 1 1 8.5%2C25.5 A 0.5 0.5 0 1 1 9.5 25.5 z%22 style=%22fill:%23000000%3B stroke:%23000000%3B%22 /%3E%3Cpath d=%22M 15 15.5 A 0.5 1.5 0 1 1 14%2C15.5 A 0.5 1.5 0 1 1 15 15.5 z%22 transform=%22matrix%280.866%2C0.5%2C-0.5%2C0.866%2C9.693%2C-5.173%29%22 style=%22fill:%23000000%3B stroke:%23000000%3B%22 /%3E%3C/g%3E%3C/svg%3E",
+    "wB": "data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22 xmlns:xlink=%22http://www.w3.org/1999/xlink%22 viewBox=%220 0 45 45%22%3E%3Cg id=%22white-bishop%22 class=%22white bishop%22 fill=%22none%22 fill-rule=%22evenodd%22 stroke=%22%23000%22 stroke-width=%221.5%22 stroke-linecap=%22round%22 stroke-linejoin=%22round%22%3E%3Cg fill=%22%23fff%22 stroke-linecap=%22butt%22%3E%3Cpath d=%22M9 36c3.39-.97 10.11.43 13.5-2 3.39 2.43 10.11 1.03 13.5 2 0 0 1.65.54 3 2-.68.97-1.65.99-3 .5-3.39-.97-10.11.46-13.5-1-3.39 1.46-10.11.03-13.5 1-1.354.49-2.323.47-3-.5 1.354-1.94 3-2 3-2zM15 32c2.5 2.5 12.5 2.5 15 0 .5-1.5 0-2 0-2 0-2.5-2.5-4-2.5-4 5.5-1.5 6-11.5-5-15.5-11 4-10.5 14-5 15.5 0 0-2.5 1.5-2.5 4 0 0-.5.5 0 2zM25 8a2.5 2.5 0 1 1-5 0 2.5 2.5 0 1 1 5 0z%22 /%3E%3C/g%3E%3Cpath d=%22M17.5 26h10M15 30h15m-7.5-14.5v5M20 18h5%22 stroke-linejoin=%22miter%22 /%3E%3C/g%3E%3C/svg%3E",
+    "wR": "data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22 xmlns:xlink=%22http://www.w3.org/1999/xlink%22 viewBox=%220 0 45 45%22%3E%3Cg id=%22white-rook%22 class=%22white rook%22 fill=%22%23fff%22 fill-rule=%22evenodd%22 stroke=%22%23000%22 stroke-width=%221.5%22 stroke-linecap=%22round%22 stroke-linejoin=%22round%22%3E%3Cpath d=%22M9 39h27v-3H9v3zM12 36v-4h21v4H12zM11 14V9h4v2h5V9h5v2h5V9h4v5%22 stroke-linecap=%22butt%22 /%3E%3Cpath d=%22M34 14l-3 3H14l-3-3%22 /%3E%3Cpath d=%22M31 17v12.5H14V17%22 stroke-linecap=%22butt%22 stroke-linejoin=%22miter%22 /%3E%3Cpath d=%22M31 29.5l1.5 2.5h-20l1.5-2.5%22 /%3E%3Cpath d=%22M11 14h23%22 fill=%22none%22 stroke-linejoin=%22miter%22 /%3E%3C/g%3E%3C/svg%3E",
+    "wQ": "data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22 xmlns:xlink=%22http://www.w3.org/1999/xlink%22 viewBox=%220 0 45 45%22%3E%3Cg id=%22white-queen%22 class=%22white queen%22 fill=%22%23fff%22 fill-rule=%22evenodd%22 stroke=%22%23000%22 stroke-width=%221.5%22 stroke-linecap=%22round%22 stroke-linejoin=%22round%22%3E%3Cpath d=%22M8 12a2 2 0 1 1-4 0 2 2 0 1 1 4 0zM24.5 7.5a2 2 0 1 1-4 0 2 2 0 1 1 4 0zM41 12a2 2 0 1 1-4 0 2 2 0 1 1 4 0zM16 8.5a2 2 0 1 1-4 0 2 2 0 1 1 4 0zM33 9a2 2 0 1 1-4 0 2 2 0 1 1 4 0z%22 /%3E%3Cpath d=%22M9 26c8.5-1.5 21-1.5 27 0l2-12-7 11V11l-5.5 13.5-3-15-3 15-5.5-14V25L7 14l2 12zM9 26c0 2 1.5 2 2.5 4 1 1.5 1 1 .5 3.5-1.5 1-1.5 2.5-1.5 2.5-1.5 1.5.5 2.5.5 2.5 6.5 1 16.5 1 23 0 0 0 1.5-1 0-2.5 0 0 .5-1.5-1-2.5-.5-2.5-.5-2 .5-3.5 1-2 2.5-2 2.5-4-8.5-1.5-18.5-1.5-27 0z%22 stroke-linecap=%22butt%22 /%3E%3Cpath d=%22M11.5 30c3.5-1 18.5-1 22 0M12 33.5c6-1 15-1 21 0%22 fill=%22none%22 /%3E%3C/g%3E%3C/svg%3E",
+    "wK": "data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22 xmlns:xlink=%22http://www.w3.org/1999/xlink%22 viewBox=%220 0 45 45%22%3E%3Cg id=%22white-king%22 class=%22white king%22 fill=%22none%22 fill-rule=%22evenodd%22 stroke=%22%23000%22 stroke-width=%221.5%22 stroke-linecap=%22round%22 stroke-linejoin=%22round%22%3E%3Cpath d=%22M22.5 11.63V6M20 8h5%22 stroke-linejoin=%22miter%22 /%3E%3Cpath d=%22M22.5 25s4.5-7.5 3-10.5c0 0-1-2.5-3-2.5s-3 2.5-3 2.5c-1.5 3 3 10.5 3 10.5%22 fill=%22%23fff%22 stroke-linecap=%22butt%22 stroke-linejoin=%22miter%22 /%3E%3Cpath d=%22M11.5 37c5.5 3.5 15.5 3.5 21 0v-7s9-4.5 6-10.5c-4-6.5-13.5-3.5-16 4V27v-3.5c-3.5-7.5-13-10.5-16-4-3 6 5 10 5 10V37z%22 fill=%22%23fff%22 /%3E%3Cpath d=%22M11.5 30c5.5-3 15.5-3 21 0m-21 3.5c5.5-3 15.5-3 21 0m-21 3.5c5.5-3 15.5-3 21 0%22 /%3E%3C/g%3E%3C/svg%3E",
+    "bP": "data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22 xmlns:xlink=%22http://www.w3.org/1999/xlink%22 viewBox=%220 0 45 45%22%3E%3Cg id=%22black-pawn%22 class=%22black pawn%22%3E%3Cpath d=%22M22.5 9c-2.21 0-4 1.79-4 4 0 .89.29 1.71.78 2.38C17.33 16.5 16 18.59 16 21c0 2.03.94 3.84 2.41 5.03-3 1.06-7.41 5.55-7.41 13.47h23c0-7.92-4.41-12.41-7.41-13.47 1.47-1.19 2.41-3 2.41-5.03 0-2.41-1.33-4.5-3.28-5.62.49-.67.78-1.49.78-2.38 0-2.21-1.79-4-4-4z%22 fill=%22%23000%22 stroke=%22%23000%22 stroke-width=%221.5%22 stroke-linecap=%22round%22 /%3E%3C/g%3E%3C/svg%3E",
+    "bN": "data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22 xmlns:xlink=%22http://www.w3.org/1999/xlink%22 viewBox=%220 0 45 45%22%3E%3Cg id=%22black-knight%22 class=%22black knight%22 fill=%22none%22 fill-rule=%22evenodd%22 stroke=%22%23000%22 stroke-width=%221.5%22 stroke-linecap=%22round%22 stroke-linejoin=%22round%22%3E%3Cpath d=%22M 22%2C10 C 32.5%2C11 38.5%2C18 38%2C39 L 15%2C39 C 15%2C30 25%2C32.5 23%2C18%22 style=%22fill:%23000000%3B stroke:%23000000%3B%22 /%3E%3Cpath d=%22M 24%2C18 C 24.38%2C20.91 18.45%2C25.37 16%2C27 C 13%2C29 13.18%2C31.34 11%2C31 C 9.958%2C30.06 12.41%2C27.96 11%2C28 C 10%2C28 11.19%2C29.23 10%2C30 C 9%2C30 5.997%2C31 6%2C26 C 6%2C24 12%2C14 12%2C14 C 12%2C14 13.89%2C12.1 14%2C10.5 C 13.27%2C9.506 13.5%2C8.5 13.5%2C7.5 C 14.5%2C6.5 16.5%2C10 16.5%2C10 L 18.5%2C10 C 18.5%2C10 19.28%2C8.008 21%2C7 C 22%2C7 22%2C10 22%2C10%22 style=%22fill:%23000000%3B stroke:%23000000%3B%22 /%3E%3Cpath d=%22M 9.5 25.5 A 0.5 0.5 0 1 1 8.5%2C25.5 A 0.5 0.5 0 1 1 9.5 25.5 z%22 style=%22fill:%23ececec%3B stroke:%23ececec%3B%22 /%3E%3Cpath d=%22M 15 15.5 A 0.5 1.5 0 1 1 14%2C15.5 A 0.5 1.5 0 1 1 15 15.5 z%22 transform=%22matrix%280.866%2C0.5%2C-0.5%2C0.866%2C9.693%2C-5.173%29%22 style=%22fill:%23ececec%3B stroke:%23ececec%3B%22 /%3E%3Cpath d=%22M 24.55%2C10.4 L 24.1%2C11.85 L 24.6%2C12 C 27.75%2C13 30.25%2C14.49 32.5%2C18.75 C 34.75%2C23.01 35.75%2C29.06 35.25%2C39 L 35.2%2C39.5 L 37.45%2C39.5 L 37.5%2C39 C 38%2C28.94 36.62%2C22.15 34.25%2C17.66 C 31.88%2C13.17 28.46%2C11.02 25.06%2C10.5 L 24.55%2C10.4 z %22 style=%22fill:%23ececec%3B stroke:none%3B%22 /%3E%3C/g%3E%3C/svg%3E",
+    "bB": "data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22 xmlns:xlink=%22http://www.w3.org/1999/xlink%22 viewBox=%220 0 45 45%22%3E%3Cg id=%22black-bishop%22 class=%22black bishop%22 fill=%22none%22 fill-rule=%22evenodd%22 stroke=%22%23000%22 stroke-width=%221.5%22 stroke-linecap=%22round%22 stroke-linejoin=%22round%22%3E%3Cpath d=%22M9 36c3.39-.97 10.11.43 13.5-2 3.39 2.43 10.11 1.03 13.5 2 0 0 1.65.54 3 2-.68.97-1.65.99-3 .5-3.39-.97-10.11.46-13.5-1-3.39 1.46-10.11.03-13.5 1-1.354.49-2.323.47-3-.5 1.354-1.94 3-2 3-2zm6-4c2.5 2.5 12.5 2.5 15 0 .5-1.5 0-2 0-2 0-2.5-2.5-4-2.5-4 5.5-1.5 6-11.5-5-15.5-11 4-10.5 14-5 15.5 0 0-2.5 1.5-2.5 4 0 0-.5.5 0 2zM25 8a2.5 2.5 0 1 1-5 0 2.5 2.5 0 1 1 5 0z%22 fill=%22%23000%22 stroke-linecap=%22butt%22 /%3E%3Cpath d=%22M17.5 26h10M15 30h15m-7.5-14.5v5M20 18h5%22 stroke=%22%23fff%22 stroke-linejoin=%22miter%22 /%3E%3C/g%3E%3C/svg%3E",
+    "bR": "data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22 xmlns:xlink=%22http://www.w3.org/1999/xlink%22 viewBox=%220 0 45 45%22%3E%3Cg id=%22black-rook%22 class=%22black rook%22 fill=%22%23000%22 fill-rule=%22evenodd%22 stroke=%22%23000%22 stroke-width=%221.5%22 stroke-linecap=%22round%22 stroke-linejoin=%22round%22%3E%3Cpath d=%22M9 39h27v-3H9v3zM12.5 32l1.5-2.5h17l1.5 2.5h-20zM12 36v-4h21v4H12z%22 stroke-linecap=%22butt%22 /%3E%3Cpath d=%22M14 29.5v-13h17v13H14z%22 stroke-linecap=%22butt%22 stroke-linejoin=%22miter%22 /%3E%3Cpath d=%22M14 16.5L11 14h23l-3 2.5H14zM11 14V9h4v2h5V9h5v2h5V9h4v5H11z%22 stroke-linecap=%22butt%22 /%3E%3Cpath d=%22M12 35.5h21M13 31.5h19M14 29.5h17M14 16.5h17M11 14h23%22 fill=%22none%22 stroke=%22%23fff%22 stroke-width=%221%22 stroke-linejoin=%22miter%22 /%3E%3C/g%3E%3C/svg%3E",
+    "bQ": "data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22 xmlns:xlink=%22http://www.w3.org/1999/xlink%22 viewBox=%220 0 45 45%22%3E%3Cg id=%22black-queen%22 class=%22black queen%22 fill=%22%23000%22 fill-rule=%22evenodd%22 stroke=%22%23000%22 stroke-width=%221.5%22 stroke-linecap=%22round%22 stroke-linejoin=%22round%22%3E%3Cg fill=%22%23000%22 stroke=%22none%22%3E%3Ccircle cx=%226%22 cy=%2212%22 r=%222.75%22 /%3E%3Ccircle cx=%2214%22 cy=%229%22 r=%222.75%22 /%3E%3Ccircle cx=%2222.5%22 cy=%228%22 r=%222.75%22 /%3E%3Ccircle cx=%2231%22 cy=%229%22 r=%222.75%22 /%3E%3Ccircle cx=%2239%22 cy=%2212%22 r=%222.75%22 /%3E%3C/g%3E%3Cpath d=%22M9 26c8.5-1.5 21-1.5 27 0l2.5-12.5L31 25l-.3-14.1-5.2 13.6-3-14.5-3 14.5-5.2-13.6L14 25 6.5 13.5 9 26zM9 26c0 2 1.5 2 2.5 4 1 1.5 1 1 .5 3.5-1.5 1-1.5 2.5-1.5 2.5-1.5 1.5.5 2.5.5 2.5 6.5 1 16.5 1 23 0 0 0 1.5-1 0-2.5 0 0 .5-1.5-1-2.5-.5-2.5-.5-2 .5-3.5 1-2 2.5-2 2.5-4-8.5-1.5-18.5-1.5-27 0z%22 stroke-linecap=%22butt%22 /%3E%3Cpath d=%22M11 38.5a35 35 1 0 0 23 0%22 fill=%22none%22 stroke-linecap=%22butt%22 /%3E%3Cpath d=%22M11 29a35 35 1 0 1 23 0M12.5 31.5h20M11.5 34.5a35 35 1 0 0 22 0M10.5 37.5a35 35 1 0 0 24 0%22 fill=%22none%22 stroke=%22%23fff%22 /%3E%3C/g%3E%3C/svg%3E",
+    "bK": "data:image/svg+xml,%3Csvg xmlns=%22http://www.w3.org/2000/svg%22 xmlns:xlink=%22http://www.w3.org/1999/xlink%22 viewBox=%220 0 45 45%22%3E%3Cg id=%22black-king%22 class=%22black king%22 fill=%22none%22 fill-rule=%22evenodd%22 stroke=%22%23000%22 stroke-width=%221.5%22 stroke-linecap=%22round%22 stroke-linejoin=%22round%22%3E%3Cpath d=%22M22.5 11.63V6%22 stroke-linejoin=%22miter%22 /%3E%3Cpath d=%22M22.5 25s4.5-7.5 3-10.5c0 0-1-2.5-3-2.5s-3 2.5-3 2.5c-1.5 3 3 10.5 3 10.5%22 fill=%22%23000%22 stroke-linecap=%22butt%22 stroke-linejoin=%22miter%22 /%3E%3Cpath d=%22M11.5 37c5.5 3.5 15.5 3.5 21 0v-7s9-4.5 6-10.5c-4-6.5-13.5-3.5-16 4V27v-3.5c-3.5-7.5-13-10.5-16-4-3 6 5 10 5 10V37z%22 fill=%22%23000%22 /%3E%3Cpath d=%22M20 8h5%22 stroke-linejoin=%22miter%22 /%3E%3Cpath d=%22M32 29.5s8.5-4 6.03-9.65C34.15 14 25 18 22.5 24.5l.01 2.1-.01-2.1C20 18 9.906 14 6.997 19.85c-2.497 5.65 4.853 9 4.853 9M11.5 30c5.5-3 15.5-3 21 0m-21 3.5c5.5-3 15.5-3 21 0m-21 3.5c5.5-3 15.5-3 21 0%22 stroke=%22%23fff%22 /%3E%3C/g%3E%3C/svg%3E"
+};
+
+// chessboard.js pieceTheme
+function pieceImage(piece) {
+    return PIECE_IMAGES[piece];
+}
@@ -1,20 +1,45 @@
 $(document).ready(function() {
     try {
         const boardElement = document.getElementById("chessBoard");
-        const fen = boardElement.dataset.fen;
+        let moveUrl = boardElement.dataset.moveUrl;
 
-        var board = ChessBoard('chessBoard', {
-            position: fen,
-            draggable: false,
-            pieceTheme: '/static/img/chesspieces/wikipedia/{piece}.png'
+        const solver = PuzzleSolver('chessBoard', {
+            check: function (move, ply) {
+                return $.getJSON(moveUrl, {move: move, ply: ply});
+            },
+            onStatus: function (text) {
+                $('.puzzle-subtitle').text(text);
+            },
+            onFinish: function (result) {
+                $('.puzzle-solution .spoiler').text(result.solution);
+                $('.puzzle-solution').prop('hidden', false);
+            }
         });
+        solver.load(boardElement.dataset.fen);
 
-        $(window).on('resize', function () {
-            board.resize();
+        // Load another pre-rendered puzzle from the API without reloading the page
+        $('#nextPuzzle').on('click', function () {
+            const button = $(this);
+            button.prop('disabled', true);
+            $.getJSON(button.data('api'))
+                .done(function (puzzle) {
+                    boardElement.dataset.fen = puzzle.fen;
+                    moveUrl = puzzle.move_url;
+                    $('.puzzle-solution').prop('hidden', true);
+                    $('.puzzle-solution .spoiler').text('').removeClass('revealed');
+                    solver.load(puzzle.fen);
+                })
+                .always(function () {
+                    button.prop('disabled', false);
+                });
         });
 
     } catch (err) {
         console.error(err);
-        $('.puzzle').html('<p style="text-align:center;">Chessboard failed to load</p>');
+        // Show the server-rendered diagram instead of the interactive board
+        const boardElement = document.getElementById("chessBoard");
+        if (boardElement.dataset.diagram) {
+            boardElement.innerHTML = '<img class="board-diagram" src="' + boardElement.dataset.diagram + '" alt="Проблем">';
+        }
     }
 });
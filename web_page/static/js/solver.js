@@ -0,0 +1,82 @@
+// Interactive puzzle board: moves are checked by the server, which answers
+// with the opponent's reply and reveals the solution once the puzzle is over.
+//
+// options.check(move, ply) must return a jQuery promise of the move JSON;
+// options.onStatus(text) and options.onFinish(result) report progress.
+function PuzzleSolver(elementId, options) {
+    let fen = null;         // position the solver is looking at
+    let ply = 0;            // index of the solver's next move in the solution
+    let active = false;     // a puzzle is loaded and not over
+    let waiting = false;    // a move is being checked
+
+    const board = ChessBoard(elementId, {
+        draggable: true,
+        pieceTheme: pieceImage,
+        onDragStart: function (source, piece) {
+            // Only the solver's own pieces, and only when it is their turn
+            return active && !waiting && piece.charAt(0) === board.orientation().charAt(0);
+        },
+        onDrop: function (source, target) {
+            if (source === target) {
+                return 'snapback';
+            }
+            waiting = true;
+            options.check(source + target, ply)
+                .done(function (result) {
+                    if (!result.correct) {
+                        board.position(fen);
+                        finish(result);
+                        return;
+                    }
+                    // Redraw from the server's position to show castling, en passant and promotion
+                    fen = result.fen;
+                    board.position(fen, false);
+                    if (result.solved) {
+                        finish(result);
+                        return;
+                    }
+                    options.onStatus('Тачно, наставите.');
+                    setTimeout(function () {
+                        fen = result.reply_fen;
+                        ply += 2;
+                        board.position(fen);
+                        waiting = false;
+                    }, 400);
+                })
+                .fail(function () {
+                    board.position(fen);
+                    options.onStatus('Потез није могуће проверити.');
+                    waiting = false;
+                });
+        }
+    });
+
+    function finish(result) {
+        active = false;
+        waiting = false;
+        options.onStatus(result.solved ? 'Решено!' : 'Нетачно.');
+        options.onFinish(result);
+    }
+
+    function sideToMove(position) {
+        return position.split(' ')[1] === 'w' ? 'white' : 'black';
+    }
+
+    $(window).on('resize', function () {
+        board.resize();
+    });
+
+    return {
+        load: function (position) {
+            fen = position;
+            ply = 0;
+            active = true;
+            waiting = false;
+            board.orientation(sideToMove(position));
+            board.position(position, false);
+            options.onStatus(sideToMove(position) === 'white'
+                ? 'Нађи најбољи потез за белог'
+                : 'Нађи најбољи потез за црног');
+        }
+    };
+}
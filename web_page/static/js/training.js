@@ -0,0 +1,45 @@
+$(document).ready(function() {
+    const card = $('#training');
+    const nextButton = $('#trainingNext');
+
+    function showPlayer(player) {
+        card.find('.training-rating').text(player.rating);
+    }
+
+    const solver = PuzzleSolver('chessBoard', {
+        check: function (move) {
+            // The server tracks the training puzzle and its ply in the session
+            return $.post(card.data('move'), {
+                move: move,
+                csrfmiddlewaretoken: card.data('csrf')
+            });
+        },
+        onStatus: function (text) {
+            card.find('.training-status').text(text);
+        },
+        onFinish: function (result) {
+            card.find('.training-solution-text').text(result.solution);
+            card.find('.training-solution').prop('hidden', false);
+            showPlayer(result.player);
+            nextButton.prop('disabled', false);
+        }
+    });
+
+    function load() {
+        nextButton.prop('disabled', true);
+        card.find('.training-status').text('Учитавање…');
+        $.getJSON(card.data('next'))
+            .done(function (data) {
+                card.find('.training-solution').prop('hidden', true);
+                showPlayer(data.player);
+                solver.load(data.fen);
+            })
+            .fail(function () {
+                card.find('.training-status').text('Проблем није могуће учитати.');
+                nextButton.prop('disabled', false);
+            });
+    }
+
+    nextButton.on('click', load);
+    load();
+});
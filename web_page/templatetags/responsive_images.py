@@ -0,0 +1,34 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from web_page import images
+
+register = template.Library()
+
+
+@register.simple_tag
+def picture(field_file, alt='', sizes='100vw'):
+    """<picture> with AVIF/WebP srcsets and the original upload as its <img>; just the <img> until derivatives exist"""
+    if not field_file:
+        return ''
+    data = images.picture_data(field_file, sizes)
+    if not data['sources']:
+        return format_html('<img src="{}" alt="{}" loading="lazy">', data['src'], alt)
+
+    sources = format_html_join(
+        '',
+        '<source type="{}" srcset="{}" sizes="{}">',
+        ((source['type'], source['srcset'], source['sizes']) for source in data['sources']),
+    )
+    return format_html(
+        '<picture>{}<img src="{}" alt="{}" loading="lazy" decoding="async"></picture>',
+        sources,
+        data['src'],
+        alt,
+    )
+
+
+@register.simple_tag
+def full_image_url(field_file):
+    """Lightbox target: the largest derivative rather than the raw upload"""
+    return images.largest_url(field_file) if field_file else ''
@@ -1,3 +1,701 @@
-from django.test import TestCase
+import asyncio
+import base64
+import json
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO, StringIO
+from unittest import skipUnless
+from urllib.parse import parse_qs, urlparse
 
-# Create your tests here.
+from django.contrib.admin import AdminSite
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.exceptions import ValidationError
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from . import search
+from .admin import TournamentGameAdmin, TournamentGameForm
+from .concurrency import QUERY_THREADS, gather_queries
+from .fragments import HOME_SECTIONS
+from .images import FORMATS, derivative_name, generate_derivatives, picture_data
+from .fide import CachedResponse, TokenBucket, fetch_rating, fetch_ratings, make_session
+from .management.commands.run_jobs import Command as RunJobsCommand
+from .models import (
+    Article, ArticleImage, ClubMember, ClubTournament, Job, LeagueStatisticsField, RatingHistory, TournamentGame,
+    TournamentPlayer,
+)
+from .pagination import KeysetPaginator
+from .pairing import ABSOLUTE, BLACK, BYE, STRICT, WHITE, Entrant, can_meet, color_preference, round_robin, swiss
+from .tournaments import pair_next_round, recompute
+
+
+# Templates without a collectstatic manifest
+plain_static = override_settings(STORAGES={
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+})
+
+
+def cursor(text):
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip('=')
+
+
+@plain_static
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        for i in range(12):
+            Article.objects.create(
+                title=f"Вест {i}", content="...", is_published=True, published_at=now - timedelta(days=i),
+            )
+
+    def paginator(self):
+        return KeysetPaginator(Article.objects.filter(is_published=True), 'published_at', 5)
+
+    def test_cursors_walk_the_pages(self):
+        paginator = self.paginator()
+        first = paginator.page()
+        second = paginator.page(after=first.next_cursor)
+        self.assertEqual([a.title for a in second.items], [f"Вест {i}" for i in range(5, 10)])
+        back = paginator.page(before=second.previous_cursor)
+        self.assertEqual(back.items, first.items)
+
+    def test_malformed_cursor_is_the_first_page(self):
+        paginator = self.paginator()
+        first = paginator.page()
+        for bad in ['', '!!!', cursor('garbage|1'), cursor('2024-01-01 10:00|x'), cursor('|1'), cursor('no-pipe')]:
+            with self.subTest(cursor=bad):
+                self.assertIsNone(paginator.decode(bad))
+                self.assertEqual(paginator.page(after=bad).items, first.items)
+                self.assertEqual(paginator.page(before=bad).items, first.items)
+
+    def test_views_ignore_malformed_cursors(self):
+        bad = cursor('garbage|1')
+        for url, params in [
+            (reverse('article_list'), {'posle': bad}),
+            (reverse('article_list'), {'pre': bad}),
+            (reverse('gallery_api'), {'posle': bad}),
+        ]:
+            with self.subTest(url=url, params=params):
+                self.assertEqual(self.client.get(url, params).status_code, 200)
+
+
+class GatherQueriesTests(SimpleTestCase):
+    async def test_queries_run_on_a_bounded_pool(self):
+        def query():
+            time.sleep(0.01)
+            return threading.current_thread().name
+
+        pages = await asyncio.gather(*(gather_queries(**{str(i): query for i in range(4)}) for _ in range(10)))
+        threads = {name for page in pages for name in page.values()}
+        # Every request's queries share the same few threads, and with them the same few connections
+        self.assertLessEqual(len(threads), QUERY_THREADS)
+        self.assertTrue(all(name.startswith('gather-queries') for name in threads))
+        self.assertEqual(list(pages[0]), ['0', '1', '2', '3'])
+
+
+def upload(name, color, size=(800, 600)):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ImageDerivativeTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = self.settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        article = Article.objects.create(title="Вест", content="...")
+        self.image = ArticleImage.objects.create(article=article, image=upload('board.png', 'white'))
+
+    def derivatives(self, name, widths=(320, 640, 800)):
+        return [derivative_name(name, width, fmt) for width in widths for fmt in FORMATS]
+
+    def test_img_fallback_is_the_original_upload(self):
+        data = picture_data(self.image.image)
+        self.assertEqual(len(data['sources']), len(FORMATS))
+        self.assertEqual(data['src'], self.image.image.url)
+
+    def test_srcset_stops_at_the_original_width(self):
+        data = picture_data(self.image.image)
+        for source in data['sources']:
+            self.assertEqual([entry.split()[-1] for entry in source['srcset'].split(', ')], ['320w', '640w', '800w'])
+        self.assertTrue(data['full'].endswith(f'-800w.{FORMATS[-1]}'))
+        # No copy at a width the original does not reach
+        self.assertFalse(default_storage.exists(derivative_name(self.image.image.name, 1280, FORMATS[-1])))
+
+    def test_small_images_get_only_their_own_width(self):
+        image = ArticleImage.objects.create(article=self.image.article, image=upload('icon.png', 'red', (200, 100)))
+        self.assertEqual(picture_data(image.image)['sources'][0]['srcset'].split()[-1], '200w')
+        self.assertEqual(generate_derivatives(image.image, overwrite=True), len(FORMATS))
+
+    def test_replacing_the_image_removes_old_derivatives(self):
+        old_name = self.image.image.name
+        self.assertTrue(all(map(default_storage.exists, self.derivatives(old_name))))
+
+        self.image.image = upload('opening.png', 'black')
+        self.image.save()
+        self.assertFalse(any(map(default_storage.exists, self.derivatives(old_name))))
+        self.assertTrue(all(map(default_storage.exists, self.derivatives(self.image.image.name))))
+
+        # Saving other fields leaves the derivatives alone
+        self.image.caption = "Отварање"
+        self.image.save()
+        self.assertTrue(all(map(default_storage.exists, self.derivatives(self.image.image.name))))
+
+
+class HomeSectionInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def cache_sections(self):
+        cache.set_many({make_template_fragment_key(name): '<section>' for name in HOME_SECTIONS})
+
+    def cached(self):
+        return {name for name in HOME_SECTIONS if cache.get(make_template_fragment_key(name)) is not None}
+
+    def test_uses_the_test_cache(self):
+        self.assertIsInstance(caches['default'], LocMemCache)
+
+    def test_saving_or_deleting_drops_only_its_section(self):
+        today = timezone.localdate()
+        factories = {
+            'home_players': lambda: ClubMember.objects.create(first_name="Марко", last_name="Марковић"),
+            'home_articles': lambda: Article.objects.create(title="Вест", content="..."),
+            'home_tournaments': lambda: ClubTournament.objects.create(
+                name="Турнир", description="...", start_date=today, end_date=today,
+            ),
+            'home_league': lambda: LeagueStatisticsField.objects.create(title="Бодови", value=1),
+        }
+        for section, create in factories.items():
+            with self.subTest(section=section):
+                self.cache_sections()
+                obj = create()
+                self.assertEqual(self.cached(), set(HOME_SECTIONS) - {section})
+
+                self.cache_sections()
+                obj.save()
+                self.assertEqual(self.cached(), set(HOME_SECTIONS) - {section})
+
+                self.cache_sections()
+                obj.delete()
+                self.assertEqual(self.cached(), set(HOME_SECTIONS) - {section})
+
+    @plain_static
+    def test_home_page_fills_the_sections(self):
+        self.assertEqual(self.client.get(reverse('home')).status_code, 200)
+        self.assertEqual(self.cached(), set(HOME_SECTIONS))
+
+
+@skipUnless(search.available(), "Full-text search needs SQLite FTS5")
+class SearchTests(TestCase):
+    def setUp(self):
+        self.gambit = Article.objects.create(
+            title="Краљев гамбит", content="<p>Кратак текст о отварању.</p>", is_published=True,
+        )
+        self.report = Article.objects.create(
+            title="Извештај са турнира", content="Гамбит, гамбит и опет гамбит у сваком колу.", is_published=True,
+        )
+
+    def titles(self, query):
+        return [article.title for article in search.search_articles(query)]
+
+    def test_cyrillic_and_latin_queries_find_the_same_articles(self):
+        for query in ("отварању", "otvaranju", "OTVAR", "краљ", "kraljev"):
+            with self.subTest(query=query):
+                self.assertEqual(self.titles(query), ["Краљев гамбит"])
+        self.assertEqual(self.titles("izvestaj turnira"), ["Извештај са турнира"])
+        self.assertEqual(self.titles("<p>"), [])
+
+    def test_title_hits_outweigh_body_hits(self):
+        self.assertEqual(self.titles("gambit"), ["Краљев гамбит", "Извештај са турнира"])
+        # Weighted evenly, the body that repeats the word would come first
+        even = search.ranked_ids(search.ARTICLE_TABLE, (1.0, 1.0), "gambit", 10)
+        self.assertEqual(even, [self.report.pk, self.gambit.pk])
+
+    def test_saving_and_deleting_keep_the_index_in_sync(self):
+        self.gambit.title = "Дански гамбит"
+        self.gambit.save()
+        self.assertEqual(self.titles("danski"), ["Дански гамбит"])
+        self.assertEqual(self.titles("kraljev"), [])
+
+        self.report.is_published = False
+        self.report.save()
+        self.assertEqual(self.titles("turnira"), [])
+
+        pk = self.gambit.pk
+        self.gambit.delete()
+        self.assertEqual(self.titles("gambit"), [])
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {search.ARTICLE_TABLE} WHERE rowid = %s", [pk])
+            self.assertEqual(cursor.fetchone()[0], 0)
+
+    @plain_static
+    def test_search_page(self):
+        response = self.client.get(reverse('search'), {'q': 'Gambit'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.context['articles']), [self.gambit, self.report])
+
+
+@plain_static
+class ConditionalGetTests(TransactionTestCase):
+    """Not a TestCase: article_detail queries from gather_queries' threads, which an open transaction would lock out"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings = self.settings(MEDIA_ROOT=media_root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.article = Article.objects.create(title="Вест", content="...", is_published=True)
+        self.urls = [
+            reverse('article_detail', args=[self.article.pk]), reverse('article_list'), reverse('gallery'),
+        ]
+
+    def test_matching_validators_get_304(self):
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                etag, last_modified = response['ETag'], response['Last-Modified']
+                self.assertEqual(self.client.get(url, headers={'If-None-Match': etag}).status_code, 304)
+                self.assertEqual(self.client.get(url, headers={'If-Modified-Since': last_modified}).status_code, 304)
+
+    def assert_changed(self, old_etags):
+        for url, old_etag in zip(self.urls, old_etags):
+            with self.subTest(url=url):
+                response = self.client.get(url, headers={'If-None-Match': old_etag})
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], old_etag)
+
+    def test_editing_the_article_moves_the_validators(self):
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        self.article.content = "Исправљено."
+        self.article.save()
+        self.assert_changed(etags)
+
+    def test_adding_or_removing_an_image_moves_the_validators(self):
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        image = ArticleImage.objects.create(article=self.article, image=upload('board.png', 'white'))
+        self.assert_changed(etags)
+
+        etags = [self.client.get(url)['ETag'] for url in self.urls]
+        image.delete()
+        self.assert_changed(etags)
+
+    def test_last_modified_follows_the_article(self):
+        url = self.urls[0]
+        last_modified = self.client.get(url)['Last-Modified']
+        # Last-Modified has one-second resolution, so move the timestamp past it
+        Article.objects.filter(pk=self.article.pk).update(updated_at=timezone.now() + timedelta(seconds=2))
+        self.assertEqual(self.client.get(url, headers={'If-Modified-Since': last_modified}).status_code, 200)
+
+
+def create_tournament(players, rounds=5, system=ClubTournament.System.SWISS):
+    today = timezone.localdate()
+    tournament = ClubTournament.objects.create(
+        name="Турнир", description="...", start_date=today, end_date=today, rounds=rounds, system=system,
+    )
+    TournamentPlayer.objects.bulk_create([
+        TournamentPlayer(tournament=tournament, name=f"Играч {i}", rating=2000 - 10 * i) for i in range(players)
+    ])
+    return tournament
+
+
+def standings(tournament):
+    return list(tournament.players.order_by('pk').values_list('score', 'buchholz', 'sonneborn_berger', 'colors'))
+
+
+def recomputed_standings(tournament):
+    incremental = standings(tournament)
+    recompute(tournament)
+    return incremental, standings(tournament)
+
+
+class TournamentGameTests(TestCase):
+    def setUp(self):
+        self.tournament = create_tournament(5)
+        pair_next_round(self.tournament)
+        for game in TournamentGame.objects.exclude(result=TournamentGame.Result.BYE):
+            game.result = TournamentGame.Result.WHITE_WINS
+            game.save()
+        pair_next_round(self.tournament)
+
+    def test_changing_players_of_a_finished_game_moves_its_result(self):
+        game = TournamentGame.objects.filter(round__number=1, black__isnull=False).first()
+        bye_player = TournamentGame.objects.get(round__number=1, black__isnull=True).white
+        game.black = bye_player
+        game.save()
+        incremental, full = recomputed_standings(self.tournament)
+        self.assertEqual(incremental, full)
+
+    def test_recompute_rebuilds_colours(self):
+        before = standings(self.tournament)
+        self.tournament.players.update(colors='')
+        recompute(self.tournament)
+        self.assertEqual(standings(self.tournament), before)
+
+    def test_deleting_a_finished_game_takes_it_off_the_standings(self):
+        TournamentGame.objects.filter(round__number=1, black__isnull=False).first().delete()
+        incremental, full = recomputed_standings(self.tournament)
+        self.assertEqual(incremental, full)
+        self.assertEqual(sum(colors[0] == '-' for *_, colors in full), 2)
+
+    def test_deleting_the_last_round_lets_it_be_paired_again(self):
+        self.tournament.pairing_rounds.get(number=2).delete()
+        incremental, full = recomputed_standings(self.tournament)
+        self.assertEqual(incremental, full)
+        self.assertTrue(all(len(colors) == 1 for *_, colors in full))
+        self.assertEqual(pair_next_round(self.tournament).number, 2)
+
+    def test_deleting_the_tournament(self):
+        self.tournament.delete()
+        self.assertFalse(TournamentPlayer.objects.exists())
+
+    def test_bye_is_not_a_game_result(self):
+        game = TournamentGame.objects.filter(black__isnull=False).first()
+        game.result = TournamentGame.Result.BYE
+        with self.assertRaises(ValidationError):
+            game.full_clean()
+
+        bye = TournamentGame.objects.filter(black__isnull=True).first()
+        bye.result = TournamentGame.Result.DRAW
+        with self.assertRaises(ValidationError):
+            bye.full_clean()
+
+    def test_admin_offers_the_bye_only_for_byes(self):
+        game = TournamentGame.objects.filter(black__isnull=False).first()
+        bye = TournamentGame.objects.filter(black__isnull=True).first()
+        game_choices = [value for value, _ in TournamentGameForm(instance=game).fields['result'].choices]
+        bye_choices = [value for value, _ in TournamentGameForm(instance=bye).fields['result'].choices]
+        self.assertNotIn(TournamentGame.Result.BYE, game_choices)
+        self.assertEqual(bye_choices, [TournamentGame.Result.BYE])
+
+    def test_admin_pairings_are_read_only_once_saved(self):
+        admin = TournamentGameAdmin(TournamentGame, AdminSite())
+        game = TournamentGame.objects.first()
+        self.assertEqual(set(admin.get_readonly_fields(None, game)), {'round', 'white', 'black'})
+
+
+def can_pair_all(entrants, level):
+    """Whether entrants can all be paired at level, by exhaustive search"""
+    @lru_cache(maxsize=None)
+    def search(paired):
+        if paired == (1 << len(entrants)) - 1:
+            return True
+        i = next(k for k in range(len(entrants)) if not paired >> k & 1)
+        return any(
+            not paired >> j & 1 and can_meet(entrants[i], entrants[j], level) and search(paired | 1 << i | 1 << j)
+            for j in range(i + 1, len(entrants))
+        )
+    return search(0)
+
+
+class PairingTests(SimpleTestCase):
+    def test_round_robin_pairs_everyone_once_with_balanced_colours(self):
+        for count in range(2, 13):
+            with self.subTest(players=count):
+                ids = list(range(count))
+                met = set()
+                colors = dict.fromkeys(ids, '')
+                for number in range(1, count + count % 2):
+                    pairs, bye = round_robin(ids, number)
+                    self.assertCountEqual([pk for pair in pairs for pk in pair] + [bye] * (bye is not None), ids)
+                    for white, black in pairs:
+                        met.add(frozenset((white, black)))
+                        colors[white] += WHITE
+                        colors[black] += BLACK
+                    # The second cycle repeats the first with colours reversed
+                    again, _ = round_robin(ids, number + count - 1 + count % 2)
+                    self.assertEqual(again, [(black, white) for white, black in pairs])
+                self.assertEqual(len(met), count * (count - 1) // 2)
+                for played in colors.values():
+                    self.assertLessEqual(abs(played.count(WHITE) - played.count(BLACK)), 1)
+
+    def test_swiss_invariants(self):
+        # Random small tournaments, where an exhaustive search can tell which rematches and colour clashes are avoidable
+        for seed in range(150):
+            rng = random.Random(seed)
+            count = rng.randint(4, 12)
+            entrants = {pk: Entrant(pk, 2000 - 10 * pk) for pk in range(count)}
+            for number in range(1, min(count - 1, rng.randint(3, 9)) + 1):
+                with self.subTest(seed=seed, round=number):
+                    pairs, bye = swiss(entrants.values())
+                    self.assertCountEqual([pk for pair in pairs for pk in pair] + [bye] * (bye is not None), entrants)
+                    if bye is not None:
+                        self.assertTrue(not entrants[bye].had_bye or all(e.had_bye for e in entrants.values()))
+
+                    if can_pair_all([e for pk, e in entrants.items() if pk != bye], STRICT):
+                        for white, black in pairs:
+                            self.assertTrue(can_meet(entrants[white], entrants[black]))
+                            for pk, color in ((white, WHITE), (black, BLACK)):
+                                preference, strength = color_preference(entrants[pk])
+                                if strength == ABSOLUTE:
+                                    self.assertEqual(preference, color)
+
+                results = {}
+                for white, black in pairs:
+                    score = rng.choice([1.0, 0.5, 0.0])
+                    results[white] = (score, WHITE, black)
+                    results[black] = (1 - score, BLACK, white)
+                if bye is not None:
+                    results[bye] = (1.0, BYE, None)
+                entrants = {
+                    pk: e._replace(
+                        score=e.score + results[pk][0],
+                        colors=e.colors + results[pk][1],
+                        opponents=e.opponents | {results[pk][2]} - {None},
+                    )
+                    for pk, e in entrants.items()
+                }
+
+
+class StandingsTests(TestCase):
+    """The incremental apply_result must agree with a full recompute whatever is corrected"""
+
+    def play_round(self, tournament, rng):
+        pair_next_round(tournament)
+        for game in TournamentGame.objects.filter(round__tournament=tournament, result=TournamentGame.Result.PENDING):
+            game.result = rng.choice([
+                TournamentGame.Result.WHITE_WINS, TournamentGame.Result.BLACK_WINS, TournamentGame.Result.DRAW,
+            ])
+            game.save()
+
+    def correct_results(self, tournament, rng):
+        games = list(TournamentGame.objects.filter(round__tournament=tournament, black__isnull=False))
+        results = [result for result in TournamentGame.Result if result != TournamentGame.Result.BYE]
+        for game in rng.sample(games, min(len(games), 3)):
+            game.result = rng.choice(results)
+            game.save()
+            incremental, full = recomputed_standings(tournament)
+            self.assertEqual(incremental, full)
+        # Results taken back are entered again, so the next round can be paired
+        for game in TournamentGame.objects.filter(round__tournament=tournament, result=TournamentGame.Result.PENDING):
+            game.result = TournamentGame.Result.DRAW
+            game.save()
+
+    def test_swiss_corrections(self):
+        rng = random.Random(1)
+        tournament = create_tournament(7)
+        for number in range(1, 6):
+            if number == 3:
+                TournamentPlayer.objects.filter(pk=tournament.players.order_by('pk')[0].pk).update(withdrawn=True)
+            self.play_round(tournament, rng)
+            self.correct_results(tournament, rng)
+        incremental, full = recomputed_standings(tournament)
+        self.assertEqual(incremental, full)
+        # Every finished game and bye hands out one point
+        self.assertEqual(sum(score for score, *_ in full), TournamentGame.objects.count())
+
+    def test_round_robin_corrections(self):
+        rng = random.Random(2)
+        tournament = create_tournament(5, rounds=0, system=ClubTournament.System.ROUND_ROBIN)
+        for number in range(1, 6):
+            if number == 2:
+                TournamentPlayer.objects.filter(pk=tournament.players.order_by('pk')[4].pk).update(withdrawn=True)
+            self.play_round(tournament, rng)
+            self.correct_results(tournament, rng)
+        incremental, full = recomputed_standings(tournament)
+        self.assertEqual(incremental, full)
+
+
+class StubFideHandler(BaseHTTPRequestHandler):
+    """Answers each fide_id with its scripted responses in turn, repeating the last"""
+
+    def do_GET(self):
+        fide_id = parse_qs(urlparse(self.path).query)['fide_id'][0]
+        server = self.server
+        with server.lock:
+            server.requests.append((fide_id, dict(self.headers), time.monotonic()))
+            script = server.script[fide_id]
+            status, headers, body = script.pop(0) if len(script) > 1 else script[0]
+        if status == 200 and headers.get('ETag') and self.headers.get('If-None-Match') == headers['ETag']:
+            status, body = 304, b''
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def rating_body(rating):
+    return json.dumps({'name': 'Player', 'classical_rating': rating}).encode()
+
+
+class StubFideServerMixin:
+    """Runs a local stand-in for the FIDE API for the duration of the test class"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubFideHandler)
+        cls.server.lock = threading.Lock()
+        cls.api_url = f"http://127.0.0.1:{cls.server.server_port}/player_info/"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.script = {}
+        self.server.requests = []
+
+    def fetch(self, fide_id, cached=None, retries=2):
+        with make_session(1, retries) as session:
+            return fetch_rating(session, TokenBucket(100), fide_id, cached, api_url=self.api_url, timeout=5)
+
+
+class FetchRatingTests(StubFideServerMixin, SimpleTestCase):
+    def test_retries_transient_errors_with_backoff(self):
+        self.server.script['1'] = [(503, {}, b''), (503, {}, b''), (200, {}, rating_body(2100))]
+        result = self.fetch('1')
+        self.assertEqual(result.rating, 2100)
+        self.assertIsNone(result.error)
+        times = [at for _, _, at in self.server.requests]
+        self.assertEqual(len(times), 3)
+        # urllib3 retries the first failure at once and backs off 0.5 * 2 s before the second
+        self.assertGreaterEqual(times[2] - times[1], 0.9)
+
+    def test_gives_up_after_retries(self):
+        self.server.script['1'] = [(503, {}, b'')]
+        result = self.fetch('1', retries=1)
+        self.assertEqual(result.error, "HTTP 503")
+        self.assertEqual(len(self.server.requests), 2)
+
+    def test_etag_makes_the_request_conditional(self):
+        self.server.script['1'] = [(200, {'ETag': '"v1"'}, rating_body(2100))]
+        first = self.fetch('1')
+        self.assertEqual((first.rating, first.etag), (2100, '"v1"'))
+
+        second = self.fetch('1', CachedResponse(first.etag, first.last_modified, first.content_hash))
+        self.assertTrue(second.not_modified)
+        self.assertIsNone(second.error)
+        self.assertEqual(second.etag, '"v1"')
+        self.assertEqual(self.server.requests[-1][1].get('If-None-Match'), '"v1"')
+
+    def test_unchanged_body_without_validators_is_not_modified(self):
+        self.server.script['1'] = [(200, {}, rating_body(2100))]
+        first = self.fetch('1')
+        second = self.fetch('1', CachedResponse('', '', first.content_hash))
+        self.assertTrue(second.not_modified)
+        self.assertIsNone(second.rating)
+
+    def test_parse_failures_are_errors(self):
+        cached = CachedResponse('"old"', '', 'hash')
+        for body, error in [
+            (b'<html>maintenance</html>', "Unexpected response"),
+            (b'[1, 2]', "Unexpected response"),
+            (json.dumps({'classical_rating': None}).encode(), "No rating returned"),
+        ]:
+            with self.subTest(body=body):
+                self.server.script['1'] = [(200, {}, body)]
+                result = self.fetch('1', cached)
+                self.assertTrue(result.error.startswith(error))
+                self.assertIsNone(result.rating)
+                # The cached validators are kept, so the next run still asks conditionally
+                self.assertEqual(result.etag, '"old"')
+
+    def test_fetch_ratings_yields_in_submission_order(self):
+        for fide_id in '123':
+            self.server.script[fide_id] = [(200, {}, rating_body(2000 + int(fide_id)))]
+        results = list(fetch_ratings(dict.fromkeys('123'), api_url=self.api_url, concurrency=3, rate=100))
+        self.assertEqual([(fide_id, r.rating) for fide_id, r in results], [('1', 2001), ('2', 2002), ('3', 2003)])
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_limits_the_rate(self):
+        bucket = TokenBucket(rate=20, capacity=1)
+        start = time.monotonic()
+        for _ in range(5):
+            bucket.acquire()
+        # The first token is there at once, the other four take 1/20 s each
+        self.assertGreaterEqual(time.monotonic() - start, 0.18)
+
+    def test_rate_must_be_positive(self):
+        for rate in (0, -1):
+            with self.subTest(rate=rate), self.assertRaises(ValueError):
+                TokenBucket(rate)
+
+
+class UpdateFideRatingsTests(StubFideServerMixin, TestCase):
+    def test_updates_ratings_and_history(self):
+        member = ClubMember.objects.create(first_name="Марко", last_name="Марковић", fide_id='7', rating=1900)
+        self.server.script['7'] = [(200, {'ETag': '"a"'}, rating_body(1950))]
+        call_command('update_fide_ratings', api_url=self.api_url, rate=100, stdout=StringIO())
+
+        member.refresh_from_db()
+        self.assertEqual((member.rating, member.previous_rating, member.rating_change), (1950, 1900, 50))
+        self.assertEqual(member.fide_etag, '"a"')
+        self.assertEqual(list(RatingHistory.objects.values_list('rating', flat=True)), [1950])
+
+        # The second run is a conditional request answered with 304
+        call_command('update_fide_ratings', api_url=self.api_url, rate=100, stdout=StringIO())
+        self.assertEqual(self.server.requests[-1][1].get('If-None-Match'), '"a"')
+        self.assertEqual(RatingHistory.objects.count(), 1)
+
+    def test_rejects_non_positive_rate(self):
+        with self.assertRaises(CommandError):
+            call_command('update_fide_ratings', api_url=self.api_url, rate=0, stdout=StringIO())
+
+
+class RunJobsTests(TestCase):
+    def setUp(self):
+        self.worker = RunJobsCommand(stdout=StringIO())
+
+    def test_claims_the_oldest_queued_job_once(self):
+        first = Job.enqueue(Job.Command.PRERENDER_PUZZLES)
+        second = Job.enqueue(Job.Command.PRERENDER_PUZZLES)
+        Job.objects.filter(pk=second.pk).update(created_at=first.created_at - timedelta(minutes=1))
+
+        self.assertEqual(self.worker.claim_next().pk, second.pk)
+        self.assertEqual(self.worker.claim_next().pk, first.pk)
+        self.assertIsNone(self.worker.claim_next())
+        self.assertEqual(Job.objects.filter(status=Job.Status.RUNNING, started_at__isnull=False).count(), 2)
+
+    def test_requeues_only_stale_running_jobs(self):
+        stale = Job.enqueue(Job.Command.PRERENDER_PUZZLES)
+        fresh = Job.enqueue(Job.Command.PRERENDER_PUZZLES)
+        now = timezone.now()
+        Job.objects.filter(pk=stale.pk).update(status=Job.Status.RUNNING, started_at=now - timedelta(hours=13))
+        Job.objects.filter(pk=fresh.pk).update(status=Job.Status.RUNNING, started_at=now - timedelta(hours=1))
+
+        self.assertEqual(self.worker.requeue_stale(timedelta(hours=12)), 1)
+        self.assertEqual(self.worker.claim_next().pk, stale.pk)
+        self.assertIsNone(self.worker.claim_next())
+
+    def test_worker_runs_the_queue_and_records_failures(self):
+        done = Job.enqueue(Job.Command.PRERENDER_PUZZLES, all=True, ranges=[[1, 10]])
+        failed = Job.enqueue(Job.Command.PRERENDER_PUZZLES, no_such_option=True)
+        call_command('run_jobs', once=True, stdout=StringIO())
+
+        done.refresh_from_db()
+        failed.refresh_from_db()
+        self.assertEqual(done.status, Job.Status.DONE)
+        self.assertIn('Backfill complete', done.progress)
+        self.assertEqual(failed.status, Job.Status.FAILED)
+        self.assertIn('Traceback', failed.output)
+        self.assertIsNotNone(failed.finished_at)
@@ -0,0 +1,251 @@
+"""
+Club tournament rounds and standings.
+
+pair_next_round loads the field with a couple of queries, hands plain
+Entrant tuples to the pairing engines and writes the round back in bulk.
+
+Standings (score, Buchholz, Sonneborn-Berger) live on TournamentPlayer and
+are updated by apply_result whenever a game's result changes: only the two
+players and their opponents in finished games are touched, however many
+rounds have been played. A deleted game is taken off the same way by
+remove_game. recompute rebuilds the standings and colours from every game,
+e.g. after a round was deleted.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Max, Q, Value
+from django.db.models.functions import Concat
+
+from .models import ClubTournament, TournamentGame, TournamentPlayer, TournamentRound
+from .pairing import BLACK, BYE, WHITE, Entrant, round_robin, swiss
+
+STANDINGS_FIELDS = ['score', 'buchholz', 'sonneborn_berger']
+
+
+def points(result):
+    """(white, black) points for a result; nothing for a pending game or the missing black of a bye"""
+    white, black = TournamentGame.POINTS.get(result, (0.0, 0.0))
+    return white, black or 0.0
+
+
+def counts_for_tiebreaks(result):
+    # Byes add to the score only, as if no game was played
+    return result not in (TournamentGame.Result.PENDING, TournamentGame.Result.BYE)
+
+
+def round_limit(tournament, player_count):
+    """Number of rounds to play; a round robin without a set number plays one full cycle"""
+    if tournament.rounds:
+        return tournament.rounds
+    if tournament.system == ClubTournament.System.ROUND_ROBIN:
+        return player_count - 1 + player_count % 2
+    raise ValueError("Унесите број кола пре упаривања турнира по швајцарском систему.")
+
+
+def pair_next_round(tournament):
+    """Pair and save the next round of tournament; raises ValueError if it cannot be paired yet"""
+    with transaction.atomic():
+        last = tournament.pairing_rounds.order_by('-number').first()
+        if last and last.games.filter(result=TournamentGame.Result.PENDING).exists():
+            raise ValueError(f"У {last.number}. колу има партија без резултата.")
+        number = last.number + 1 if last else 1
+
+        players = list(tournament.players.select_for_update().order_by('pk'))
+        active = [player for player in players if not player.withdrawn]
+        if len(active) < 2:
+            raise ValueError("За упаривање кола потребна су најмање два играча.")
+        if number > round_limit(tournament, len(players)):
+            raise ValueError("Сва кола су већ упарена.")
+
+        if tournament.system == ClubTournament.System.ROUND_ROBIN:
+            if number == 1:
+                # Table numbers are fixed for the whole tournament
+                for seed, player in enumerate(sorted(players, key=lambda p: (-p.rating, p.pk)), start=1):
+                    player.seed = seed
+                TournamentPlayer.objects.bulk_update(players, ['seed'])
+            pairs, bye = pair_round_robin(players, number)
+        else:
+            pairs, bye = pair_swiss(tournament, active)
+
+        pairing_round = TournamentRound.objects.create(tournament=tournament, number=number)
+        games = [
+            TournamentGame(round=pairing_round, board=board, white_id=white, black_id=black)
+            for board, (white, black) in enumerate(pairs, start=1)
+        ]
+        if bye is not None:
+            games.append(TournamentGame(
+                round=pairing_round, board=len(games) + 1, white_id=bye, result=TournamentGame.Result.BYE,
+            ))
+        TournamentGame.objects.bulk_create(games)
+
+        # One appending UPDATE per colour; bulk_update would build a CASE clause per player
+        colors = {white: WHITE for white, _ in pairs} | {black: BLACK for _, black in pairs}
+        if bye is not None:
+            colors[bye] = BYE
+        by_color = defaultdict(list)
+        for player in players:
+            if len(player.colors) < number - 1:
+                # Joined late: unpaired in the rounds they missed
+                TournamentPlayer.objects.filter(pk=player.pk).update(colors=player.colors.ljust(number - 1, '-'))
+            by_color[colors.get(player.pk, '-')].append(player.pk)
+        for color, pks in by_color.items():
+            TournamentPlayer.objects.filter(pk__in=pks).update(colors=Concat('colors', Value(color)))
+
+        if bye is not None:
+            # bulk_create skips save(), so the bye's point is added here
+            apply_result(games[-1], TournamentGame.Result.PENDING)
+        if tournament.status < ClubTournament.Status.ONGOING:
+            # save() rather than update(), so the home page's tournaments section is invalidated
+            tournament.status = ClubTournament.Status.ONGOING
+            tournament.save(update_fields=['status', 'updated_at'])
+    return pairing_round
+
+
+def pair_swiss(tournament, active):
+    opponents = {player.pk: set() for player in active}
+    played = TournamentGame.objects.filter(
+        round__tournament=tournament, black__isnull=False
+    ).values_list('white_id', 'black_id')
+    for white, black in played:
+        opponents.setdefault(white, set()).add(black)
+        opponents.setdefault(black, set()).add(white)
+
+    return swiss([
+        Entrant(player.pk, player.rating, player.score, player.colors, frozenset(opponents[player.pk]))
+        for player in active
+    ])
+
+
+def pair_round_robin(players, number):
+    """Berger pairings by seed; games against withdrawn players are not paired and the bye scores nothing"""
+    seeded = sorted((player for player in players if player.seed), key=lambda p: p.seed)
+    pairs, _ = round_robin([player.pk for player in seeded], number)
+    withdrawn = {player.pk for player in players if player.withdrawn}
+    return [(white, black) for white, black in pairs if white not in withdrawn and black not in withdrawn], None
+
+
+def apply_result(game, old_result):
+    """Update standings for game's result changing from old_result to game.result"""
+    with transaction.atomic():
+        changed = {game.white_id, game.black_id} - {None}
+        # Opponents of the two players, whose tiebreaks include their scores
+        others = list(
+            TournamentGame.objects.filter(Q(white_id__in=changed) | Q(black_id__in=changed))
+            .exclude(pk=game.pk)
+            .exclude(result__in=[TournamentGame.Result.PENDING, TournamentGame.Result.BYE])
+            .values_list('white_id', 'black_id', 'result')
+        )
+        players = TournamentPlayer.objects.select_for_update().only(*STANDINGS_FIELDS).in_bulk(
+            changed | {pk for white, black, _ in others for pk in (white, black)}
+        )
+        white, black = players[game.white_id], players.get(game.black_id)
+        is_game = black is not None
+
+        # Take out the old result with the scores it was counted with...
+        old_white, old_black = points(old_result)
+        if is_game and counts_for_tiebreaks(old_result):
+            white.buchholz -= black.score
+            white.sonneborn_berger -= old_white * black.score
+            black.buchholz -= white.score
+            black.sonneborn_berger -= old_black * white.score
+
+        new_white, new_black = points(game.result)
+        deltas = {white.pk: new_white - old_white}
+        if is_game:
+            deltas[black.pk] = new_black - old_black
+        for pk, delta in deltas.items():
+            players[pk].score += delta
+
+        # ...move their other opponents' tiebreaks by the score change...
+        for other_white, other_black, result in others:
+            white_points, black_points = points(result)
+            if other_white in deltas:
+                players[other_black].buchholz += deltas[other_white]
+                players[other_black].sonneborn_berger += black_points * deltas[other_white]
+            if other_black in deltas:
+                players[other_white].buchholz += deltas[other_black]
+                players[other_white].sonneborn_berger += white_points * deltas[other_black]
+
+        # ...and count the new result with the new scores
+        if is_game and counts_for_tiebreaks(game.result):
+            white.buchholz += black.score
+            white.sonneborn_berger += new_white * black.score
+            black.buchholz += white.score
+            black.sonneborn_berger += new_black * white.score
+
+        TournamentPlayer.objects.bulk_update(players.values(), STANDINGS_FIELDS)
+
+
+def remove_game(game):
+    """Take a deleted game's result off the standings and leave its players unpaired in that round"""
+    with transaction.atomic():
+        if game.result != TournamentGame.Result.PENDING:
+            # Counted as if the result had been taken back
+            unplayed = TournamentGame(
+                pk=game.pk, white_id=game.white_id, black_id=game.black_id, result=TournamentGame.Result.PENDING,
+            )
+            apply_result(unplayed, game.result)
+
+        set_colors(game.round_id, {game.white_id: '-', game.black_id: '-'})
+
+
+def game_colors(game):
+    """Colour each player of game gets in its round"""
+    if game.black_id is None:
+        return {game.white_id: BYE}
+    return {game.white_id: WHITE, game.black_id: BLACK}
+
+
+def set_colors(round_id, colors):
+    """Overwrite the players' colour for one round; colors maps player pk to the character"""
+    colors.pop(None, None)
+    number = TournamentRound.objects.filter(pk=round_id).values_list('number', flat=True).first()
+    players = TournamentPlayer.objects.select_for_update().only('colors').in_bulk(list(colors))
+    if number is None or not players:
+        return
+    for pk, player in players.items():
+        if len(player.colors) >= number:
+            player.colors = player.colors[:number - 1] + colors[pk] + player.colors[number:]
+    TournamentPlayer.objects.bulk_update(players.values(), ['colors'])
+
+
+def recompute(tournament):
+    """Rebuild tournament's standings and colours from all of its games"""
+    with transaction.atomic():
+        players = tournament.players.select_for_update().only(*STANDINGS_FIELDS, 'colors').in_bulk()
+        rounds = tournament.pairing_rounds.aggregate(last=Max('number'))['last'] or 0
+        colors = {pk: ['-'] * rounds for pk in players}
+        for player in players.values():
+            player.score = player.buchholz = player.sonneborn_berger = 0.0
+
+        rows = TournamentGame.objects.filter(round__tournament=tournament).values_list(
+            'white_id', 'black_id', 'result', 'round__number'
+        )
+        games = []
+        # Byes first, so a player given a game in the same round shows that game's colour
+        for white, black, result, number in sorted(rows, key=lambda row: row[1] is not None):
+            if black is None:
+                colors[white][number - 1] = BYE
+            else:
+                colors[white][number - 1] = WHITE
+                colors[black][number - 1] = BLACK
+            if result != TournamentGame.Result.PENDING:
+                games.append((white, black, result))
+
+        for white, black, result in games:
+            white_points, black_points = points(result)
+            players[white].score += white_points
+            if black is not None:
+                players[black].score += black_points
+        for white, black, result in games:
+            if black is not None and counts_for_tiebreaks(result):
+                white_points, black_points = points(result)
+                players[white].buchholz += players[black].score
+                players[white].sonneborn_berger += white_points * players[black].score
+                players[black].buchholz += players[white].score
+                players[black].sonneborn_berger += black_points * players[white].score
+
+        for pk, player in players.items():
+            player.colors = ''.join(colors[pk])
+        TournamentPlayer.objects.bulk_update(players.values(), [*STANDINGS_FIELDS, 'colors'], batch_size=500)
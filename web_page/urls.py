@@ -7,4 +7,9 @@ urlpatterns = [
     path('vesti/', views.article_list, name='article_list'),
     path('vesti/<int:pk>/', views.article_detail, name='article_detail'),
     path('galerija', views.gallery_view, name='gallery'),
+    path('galerija/api/', views.gallery_api, name='gallery_api'),
+    path('pretraga/', views.search_view, name='search'),
+    path('trening/', views.training_view, name='training'),
+    path('turniri/<int:pk>/', views.tournament_detail, name='tournament_detail'),
+    path('igraci/<int:pk>/rejting/', views.rating_history, name='rating_history'),
 ]
\ No newline at end of file
@@ -1,172 +1,185 @@
-import random
-import chess
-from django.shortcuts import render
+from datetime import datetime, time
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.db.models import Exists, OuterRef, Prefetch
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404, render
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.cache import cache_control
 
-from .models import Article, ArticleImage, ClubMember, ClubTournament, LeagueStatisticsField
 from puzzles.models import Puzzle
 
-# Piece symbols mapping
-PIECE_SYMBOLS = {
-    'K': '♔', 'Q': '♕', 'R': '♖', 'B': '♗', 'N': '♘', 'P': '♙',
-    'k': '♚', 'q': '♛', 'r': '♜', 'b': '♝', 'n': '♞', 'p': '♟'
+from . import search
+from .concurrency import gather_queries
+from .conditional import article_version, articles_version, conditional
+from .fragments import cached_sections
+from .images import picture_data
+from .models import (
+    Article, ArticleImage, ClubMember, ClubTournament, LeagueStatisticsField, RatingHistory, TournamentGame,
+)
+from .pagination import KeysetPaginator
+
+ARTICLES_PER_PAGE = 10
+GALLERY_ARTICLES_PER_PAGE = 6
+GALLERY_SIZES = "(max-width: 600px) 100vw, 300px"
+
+# Home page section ({% cache %} fragment name) -> context variable it renders
+HOME_SECTION_CONTEXT = {
+    'home_players': 'club_players',
+    'home_articles': 'articles',
+    'home_tournaments': 'tournaments',
+    'home_league': 'statictics_fields',
 }
 
-def remove_consecutive_duplicates(move_str):
-    """Remove consecutive identical lowercase letters"""
-    if not move_str:
-        return move_str
-    result = move_str[0]
-    for c in move_str[1:]:
-        if not (c.islower() and c == result[-1]):
-            result += c
-    return result
-
-def get_valid_puzzle(max_attempts=10):
-    """Try to get a valid puzzle, deleting invalid ones"""
-    attempts = 0
-    while attempts < max_attempts:
-        puzzle_ids = list(Puzzle.objects.values_list('id', flat=True))
-        if not puzzle_ids:
-            return None
-        
-        puzzle_id = random.choice(puzzle_ids)
-        try:
-            puzzle = Puzzle.objects.get(id=puzzle_id)
-            
-            # Validate the puzzle
-            moves_uci = puzzle.moves.split()
-            if len(moves_uci) < 2:
-                # Invalid puzzle with insufficient moves
-                puzzle.delete()
-                attempts += 1
-                continue
-                
-            first_move = moves_uci[0]
-            
-            # Test if we can process the puzzle without errors
-            board = chess.Board(puzzle.fen)
-            board.push_uci(first_move)
-            
-            board_solution = chess.Board(puzzle.fen)
-            moves_clean = []
-            
-            for move_uci in moves_uci[1:]:
-                try:
-                    move = chess.Move.from_uci(move_uci)
-                    # This will raise AssertionError if move is illegal
-                    san = board_solution.san(move)
-                    board_solution.push(move)
-                except (AssertionError, ValueError) as e:
-                    # Invalid move found - delete the puzzle
-                    puzzle.delete()
-                    raise ValueError(f"Invalid move in puzzle {puzzle.id}: {e}")
-            
-            # If we get here, puzzle is valid
-            return puzzle
-            
-        except (Puzzle.DoesNotExist, ValueError) as e:
-            # Puzzle was deleted or invalid, try another one
-            attempts += 1
-            continue
+
+async def index(request):
+    context = {
+        'club_players': ClubMember.objects.filter(is_active=True).order_by('order', '-rating'),
+        'articles': Article.objects.filter(is_published=True).order_by('-published_at', '-id')[:8],
+        'tournaments': ClubTournament.objects.all().order_by('status', 'end_date')[:3],
+        'statictics_fields': LeagueStatisticsField.objects.filter(is_active=True).order_by('order'),
+    }
+
+    # Only sections missing from the fragment cache need their query, and those run concurrently.
+    # Cached sections keep their lazy queryset in case the fragment expires before rendering.
+    cached = await cached_sections()
+    queries = {
+        name: partial(list, context[name])
+        for fragment, name in HOME_SECTION_CONTEXT.items() if fragment not in cached
+    }
+    # Puzzles are validated and pre-rendered by import_puzzles/prerender_puzzles,
+    # so serving one is a single indexed lookup with no chess work
+    queries['puzzle'] = Puzzle.objects.rendered().random
+    context.update(await gather_queries(**queries))
+
+    puzzle = context['puzzle']
+    context.update({
+        'puzzle_fen': puzzle.start_fen if puzzle else '',
+        'puzzle_first_move': puzzle.first_move if puzzle else '',
+        'puzzle_move_url': reverse('puzzle_move', args=[puzzle.puzzle_id]) if puzzle else '',
+    })
+    return await sync_to_async(render)(request, 'web_page/home.html', context)
     
-    return None
+@cache_control(public=True, max_age=60)
+@conditional(articles_version)
+async def article_list(request):
+    paginator = KeysetPaginator(Article.objects.filter(is_published=True), 'published_at', ARTICLES_PER_PAGE)
+    page = await sync_to_async(paginator.page)(after=request.GET.get('posle'), before=request.GET.get('pre'))
+    return await sync_to_async(render)(request, "web_page/list.html", {
+        "articles": page.items,
+        "page": page,
+    })
 
-def index(request):
-    club_players = ClubMember.objects.filter(is_active=True).order_by('order', '-rating')
 
-    articles = Article.objects.filter(is_published=True).order_by('-published_at')[:8]
+@cache_control(public=True, max_age=300)
+@conditional(article_version)
+async def article_detail(request, pk):
+    # The images only depend on pk, so they are fetched alongside the article rather than after it
+    results = await gather_queries(
+        article=Article.objects.filter(pk=pk, is_published=True).first,
+        images=lambda: list(ArticleImage.objects.filter(article_id=pk)),
+    )
+    if results['article'] is None:
+        raise Http404("No Article matches the given query.")
+    return await sync_to_async(render)(request, "web_page/detail.html", results)
+
+
+def gallery_page(request):
+    """One keyset page of published articles that have images, each with its images prefetched"""
+    images = ArticleImage.objects.only('article_id', 'image', 'caption', 'order').order_by('order', 'pk')
+    articles = (
+        Article.objects
+        .filter(is_published=True)
+        .filter(Exists(ArticleImage.objects.filter(article=OuterRef('pk'))))
+        .only('title', 'published_at')
+        .prefetch_related(Prefetch('images', queryset=images, to_attr='gallery_images'))
+    )
+    paginator = KeysetPaginator(articles, 'published_at', GALLERY_ARTICLES_PER_PAGE)
+    return paginator.page(after=request.GET.get('posle'))
+
+
+@cache_control(public=True, max_age=300)
+@conditional(articles_version)
+def gallery_view(request):
+    return render(request, "web_page/gallery.html", {
+        "page": gallery_page(request),
+        "gallery_sizes": GALLERY_SIZES,
+    })
 
-    tournaments = ClubTournament.objects.all().order_by('status', 'end_date')[:3]
 
-    statistics_fields = LeagueStatisticsField.objects.filter(is_active=True).order_by('order')
+@cache_control(public=True, max_age=300)
+@conditional(articles_version)
+def gallery_api(request):
+    """JSON for infinite scroll: the next page of article groups and the cursor after it"""
+    page = gallery_page(request)
+    return JsonResponse({
+        'articles': [
+            {
+                'title': article.title,
+                'url': reverse('article_detail', args=[article.pk]),
+                'images': [
+                    {'caption': image.caption, **picture_data(image.image, GALLERY_SIZES)}
+                    for image in article.gallery_images
+                ],
+            }
+            for article in page.items
+        ],
+        'next': page.next_cursor,
+    })
 
-    # Get a valid puzzle
-    puzzle = get_valid_puzzle()
-    
-    # If no valid puzzles found, render without puzzle
-    if not puzzle:
-        return render(request, 'web_page/home.html', {
-            'club_players': club_players,
-            'articles': articles,
-            'tournaments': tournaments,
-            'puzzle': None,
-        })
-    
-    try:
-        moves_uci = puzzle.moves.split()
-        first_move = moves_uci[0]
-
-        # Puzzle FEN after first move
-        board = chess.Board(puzzle.fen)
-        board.push_uci(first_move)
-        puzzle_fen = board.fen()
-
-        # Generate cleaned solution
-        board_solution = chess.Board(puzzle.fen)
-        moves_clean = []
-
-        for move_uci in moves_uci[1:]:  # skip first move
-            move = chess.Move.from_uci(move_uci)
-            san = board_solution.san(move)
-
-            # Replace piece letters with symbols
-            piece = board_solution.piece_at(move.from_square)
-            if piece:
-                symbol = PIECE_SYMBOLS[piece.symbol()]
-                if san and san[0] in "KQRBN":
-                    san = symbol + san[1:]
-
-            # Remove x and all non-alphanumeric except piece symbols
-            san_clean = "".join(c for c in san if c != 'x' and (c.isalnum() or c in PIECE_SYMBOLS.values()))
-
-            # Remove consecutive identical lowercase letters
-            san_clean = remove_consecutive_duplicates(san_clean)
-
-            moves_clean.append(san_clean)
-            board_solution.push(move)
-
-        # Number moves: 1. move1 move2 2. move3 move4 ...
-        numbered_solution = []
-        for i in range(0, len(moves_clean), 2):
-            white_move = moves_clean[i]
-            black_move = moves_clean[i+1] if i+1 < len(moves_clean) else ""
-            numbered_solution.append(f"{i//2 + 1}. {white_move} {black_move}".strip())
-
-        text_solution = "  ".join(numbered_solution)
-
-        return render(request, 'web_page/home.html', {
-            'club_players': club_players,
-            'articles': articles,
-            'tournaments': tournaments,
-            'statictics_fields': statistics_fields,
-            'puzzle': puzzle,
-            'puzzle_fen': puzzle_fen,
-            'puzzle_first_move': first_move,
-            'puzzle_solution': text_solution,
-        })
-        
-    except (AssertionError, ValueError) as e:
-        # If we encounter an error during processing, delete the puzzle and try again
-        puzzle.delete()
-        # Recursively call index to try another puzzle
-        return index(request)
-    
-def article_list(request):
-    articles = Article.objects.filter(is_published=True)
-    return render(request, "web_page/list.html", {
-        "articles": articles
+
+def search_view(request):
+    query = request.GET.get('q', '').strip()[:100]
+    return render(request, "web_page/search.html", {
+        "query": query,
+        "articles": search.search_articles(query) if query else [],
+        "puzzles": search.search_puzzles(query, limit=10) if query else [],
     })
 
 
-def article_detail(request, pk):
-    article = Article.objects.get(pk=pk, is_published=True)
-    return render(request, "web_page/detail.html", {
-        "article": article
+def training_view(request):
+    """Puzzle training page; the board loads puzzles from the training API"""
+    return render(request, "web_page/training.html")
+
+
+def tournament_detail(request, pk):
+    """Standings and the pairings of one round (?kolo=N, the latest by default)"""
+    tournament = get_object_or_404(ClubTournament, pk=pk)
+    rounds = list(tournament.pairing_rounds.values_list('number', flat=True))
+    try:
+        number = int(request.GET.get('kolo', rounds[-1] if rounds else 0))
+    except ValueError:
+        raise Http404
+    if rounds and number not in rounds:
+        raise Http404
+
+    return render(request, "web_page/tournament.html", {
+        "tournament": tournament,
+        # Kept up to date as results are entered, so this is an index scan
+        "standings": tournament.players.order_by('-score', '-buchholz', '-sonneborn_berger', '-rating'),
+        "rounds": rounds,
+        "round_number": number,
+        "games": TournamentGame.objects.filter(
+            round__tournament=tournament, round__number=number
+        ).select_related('white', 'black'),
     })
 
-def gallery_view(request):
-    images = ArticleImage.objects.select_related("article").all()
 
-    return render(request, "web_page/gallery.html", {
-        "images": images
-    })
\ No newline at end of file
+def rating_history(request, pk):
+    """Rating chart data for one member; ?since=YYYY-MM-DD limits the range"""
+    member = get_object_or_404(ClubMember, pk=pk, is_active=True)
+    try:
+        since = parse_date(request.GET.get('since', ''))
+    except ValueError:
+        since = None
+    if since:
+        since = timezone.make_aware(datetime.combine(since, time.min))
+
+    points = RatingHistory.objects.for_member(member, since=since)
+    return JsonResponse({
+        'member': member.full_name,
+        'history': [[recorded_at.isoformat(), rating] for recorded_at, rating in points],
+    })